@@ -1,5 +1,6 @@
 import cmd
 from bibliotheque import Bibliotheque,Livre, Membre
+from bibliotheque_sqlite import BibliothequeSQLite
 from exceptions import *
 from visualisations import Visualisation
 import sys
@@ -13,19 +14,20 @@ class BibliothequeCLI(cmd.Cmd):
 Tapez 'aide' pour la liste des commandes
 Tapez 'menu' pour afficher le menu principal
 """
+    # Nombre de livres / membres affichés par page de listing
+    TAILLE_PAGE = 20
 
-    def __init__(self):
+    def __init__(self, sqlite: bool = False, compact: bool = False, paresseux: bool = False):
+        if sqlite and (compact or paresseux):
+            # Le stockage SQLite a son propre chargement : ces modes ne s'y appliquent pas
+            raise ValueError("--sqlite ne se combine ni avec --compact ni avec --paresseux")
         super().__init__()
-        self.biblio = Bibliotheque()
-        self.charger_donnees()
-        
-    def charger_donnees(self):
-        """Charge les données au démarrage"""
-        try:
-            self.biblio.charger_donnees()
-            print("\n✅ Données chargées avec succès")
-        except Exception as e:
-            print(f"\n❌ Erreur lors du chargement: {e}")
+        if sqlite:
+            self.biblio = BibliothequeSQLite()
+        else:
+            self.biblio = Bibliotheque(journal=True, compact=compact, paresseux=paresseux)
+        # Le constructeur a déjà chargé les données et rejoué le journal : pas de second chargement
+        print("\n✅ Données chargées avec succès")
 
     def do_menu(self, arg):
         """Affiche le menu principal"""
@@ -119,26 +121,64 @@ ou le numéro du menu (ex: '1')
             print(f"\n❌ Erreur: {e}")
 
     # ===== Commandes de consultation =====
+    def _options_pagination(self, arg, ordre: bool = False):
+        """(page, taille, ordre) lus dans ``--page N --taille N [--ordre isbn|annee]``."""
+        options = {"page": 1, "taille": self.TAILLE_PAGE}
+        if ordre:
+            options["ordre"] = "isbn"
+        mots = arg.replace('=', ' ').split()
+        if len(mots) % 2:
+            raise ValueError(f"valeur manquante pour {mots[-1]}")
+        for nom, valeur in zip(mots[::2], mots[1::2]):
+            nom = nom.lstrip('-')
+            if nom not in options:
+                raise ValueError(f"option inconnue : --{nom}")
+            options[nom] = valeur if nom == "ordre" else int(valeur)
+        if options["page"] < 1 or options["taille"] < 1:
+            raise ValueError("--page et --taille doivent être positifs")
+        return options["page"], options["taille"], options.get("ordre")
+
+    @staticmethod
+    def _pied_de_page(commande: str, page: int, taille: int, resultat, suite: str = ""):
+        if resultat.suivant is not None:
+            print(f"\n➡️  Page suivante : {commande} --page {page + 1} --taille {taille}{suite}")
+
     def do_lister_livres(self, arg):
-        """Affiche la liste complète des livres"""
-        print("\n=== LIVRES DISPONIBLES ===")
-        if not self.biblio.livres:
+        """Affiche une page de la liste des livres : lister_livres [--page N] [--taille N] [--ordre isbn|annee]"""
+        try:
+            page, taille, ordre = self._options_pagination(arg, ordre=True)
+            resultat = self.biblio.page_livres(taille, ordre=ordre, decalage=(page - 1) * taille)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            return
+
+        print(f"\n=== LIVRES (page {page}/{max(1, -(-resultat.total // taille))}, {resultat.total} au total) ===")
+        if not resultat.total:
             print("Aucun livre enregistré")
             return
             
-        for livre in self.biblio.livres.values():
+        for livre in resultat:
             statut = "Disponible" if livre.statut == "disponible" else f"Emprunté ({livre.statut.split(':')[1]})"
             print(f"\n📖 {livre.titre} ({livre.auteur}, {livre.annee})")
             print(f"   ISBN: {livre.isbn} | Genre: {livre.genre} | Statut: {statut}")
+        self._pied_de_page("lister_livres", page, taille, resultat,
+                           f" --ordre {ordre}" if ordre != "isbn" else "")
 
     def do_lister_membres(self, arg):
-        """Affiche la liste des membres"""
-        print("\n=== MEMBRES INSCRITS ===")
-        if not self.biblio.membres:
+        """Affiche une page de la liste des membres : lister_membres [--page N] [--taille N]"""
+        try:
+            page, taille, _ = self._options_pagination(arg)
+            resultat = self.biblio.page_membres(taille, decalage=(page - 1) * taille)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            return
+
+        print(f"\n=== MEMBRES INSCRITS (page {page}/{max(1, -(-resultat.total // taille))}, {resultat.total} au total) ===")
+        if not resultat.total:
             print("Aucun membre inscrit")
             return
             
-        for membre in self.biblio.membres.values():
+        for membre in resultat:
             print(f"\n👤 {membre.nom} (ID: {membre.id})")
             print(f"   Livres empruntés: {len(membre.livres_empruntes)}/{Membre.MAX_EMPRUNTS}")
             if membre.livres_empruntes:
@@ -146,6 +186,7 @@ ou le numéro du menu (ex: '1')
                 for isbn in membre.livres_empruntes:
                     if isbn in self.biblio.livres:
                         print(f"    - {self.biblio.livres[isbn].titre}")
+        self._pied_de_page("lister_membres", page, taille, resultat)
 
     def do_rechercher(self, arg):
         """Recherche un livre par titre, auteur ou genre"""
@@ -156,13 +197,13 @@ ou le numéro du menu (ex: '1')
             print("Veuillez entrer un terme de recherche")
             return
             
-        resultats = [
-            livre for livre in self.biblio.livres.values()
-            if (terme in livre.titre.lower() or 
-                terme in livre.auteur.lower() or 
-                terme in livre.genre.lower())
-        ]
-        
+        resultats = self.biblio.rechercher(terme)
+        if not resultats:
+            # Aucune correspondance exacte : on tolère quelques fautes de frappe
+            resultats = self.biblio.rechercher(terme, flou=True)
+            if resultats:
+                print("\n(aucun résultat exact, résultats approchés)")
+
         print(f"\n🔍 {len(resultats)} résultat(s) trouvé(s):")
         for livre in resultats:
             print(f"\n- {livre.titre} ({livre.auteur}) | {livre.genre} | ISBN: {livre.isbn}")
@@ -171,24 +212,26 @@ ou le numéro du menu (ex: '1')
     def do_statistiques(self, arg):
         """Affiche les statistiques de la bibliothèque"""
         print("\n=== STATISTIQUES ===")
-        print(f"📚 Nombre total de livres: {len(self.biblio.livres)}")
+        compteurs = self.biblio.compteurs()
+        print(f"📚 Nombre total de livres: {compteurs['total']}")
+        print(f"✅ Livres disponibles: {compteurs['disponibles']}")
         print(f"👥 Nombre de membres: {len(self.biblio.membres)}")
         
-        emprunts = sum(1 for l in self.biblio.livres.values() if l.statut != "disponible")
-        print(f"🔁 Emprunts actifs: {emprunts}")
-        
+        print(f"🔁 Emprunts actifs: {compteurs['empruntes']}")
+
+        # Tous les agrégats de l'historique en une seule analyse
+        analyse = self.biblio.analyser_historique(3)
+
         # Top 3 livres les plus empruntés
-        top_livres = self.biblio.top_livres_empruntes(3)
-        if top_livres:
+        if analyse.top_livres:
             print("\n🏆 Top 3 des livres les plus empruntés :")
-            for livre, count in top_livres:
+            for livre, count in analyse.top_livres:
                 print(f" - {livre.titre} ({count} emprunts)")
 
         # Top 3 membres les plus actifs
-        top_membres = self.biblio.top_membres_actifs(3)
-        if top_membres:
+        if analyse.top_membres:
             print("\n🎖️ Top 3 des membres les plus actifs :")
-            for membre, count in top_membres:
+            for membre, count in analyse.top_membres:
                 print(f" - {membre.nom} ({count} emprunts)")
 
         # Génération des graphiques
@@ -196,7 +239,8 @@ ou le numéro du menu (ex: '1')
             print("\n📊 Génération des graphiques...")
             Visualisation.generer_tous_graphiques(
                 livres=list(self.biblio.livres.values()),
-                historique_path="data/historique.csv"
+                historique_path="data/historique",
+                analyse=analyse
             )
             print("✅ Graphiques générés dans le dossier 'assets'")
         except Exception as e:
@@ -213,7 +257,11 @@ ou le numéro du menu (ex: '1')
 
     def do_quitter(self, arg):
         """Quitte l'application après sauvegarde"""
-        self.do_sauvegarder(None)
+        try:
+            self.biblio.fermer()
+            print("\n✅ Données sauvegardées avec succès")
+        except Exception as e:
+            print(f"\n❌ Erreur lors de la sauvegarde: {e}")
         print("\nMerci d'avoir utilisé notre système. Au revoir !")
         return True
 
@@ -270,6 +318,8 @@ ou le numéro du menu (ex: '1')
 Commandes avancées utiles :
 - exporter_csv : Sauvegarde les données en CSV dans 'export/'
 - voir_emprunts : Liste les emprunts en cours
+- lister_livres --page N --taille N [--ordre annee] : Parcourir le catalogue page par page
+- lister_membres --page N --taille N : Parcourir les membres page par page
 - rechercher [terme] : Chercher un livre par titre, auteur ou genre
 - supprimer_membre [ID] : Supprimer un membre (avec confirmation)
 - supprimer_livre [ISBN] : Supprimer un livre (avec confirmation)
@@ -281,17 +331,19 @@ Utilisez les raccourcis numériques pour un accès rapide.
     def do_voir_emprunts(self, arg):
         """Affiche les emprunts en cours"""
         print("\n=== EMPRUNTS EN COURS ===")
-        emprunts = [l for l in self.biblio.livres.values() if l.statut != "disponible"]
+        emprunts = self.biblio.emprunts_actifs
         
         if not emprunts:
             print("Aucun emprunt en cours")
             return
             
-        for livre in emprunts:
-            id_membre = livre.statut.split(":")[1]
+        for isbn, (id_membre, date_emprunt) in emprunts.items():
+            livre = self.biblio.livres.get(isbn, None)
+            titre = livre.titre if livre else isbn
             membre = self.biblio.membres.get(id_membre, None)
             nom_membre = membre.nom if membre else "Membre inconnu"
-            print(f"\n- {livre.titre} emprunté par {nom_membre} (ID: {id_membre})")
+            depuis = f" depuis le {date_emprunt:%d/%m/%Y %H:%M}" if date_emprunt else ""
+            print(f"\n- {titre} emprunté par {nom_membre} (ID: {id_membre}){depuis}")
 
     # ===== Commandes système =====
     def emptyline(self):
@@ -324,7 +376,10 @@ Utilisez les raccourcis numériques pour un accès rapide.
 
 if __name__ == "__main__":
     try:
-        BibliothequeCLI().cmdloop()
+        BibliothequeCLI(sqlite="--sqlite" in sys.argv, compact="--compact" in sys.argv,
+                        paresseux="--paresseux" in sys.argv).cmdloop()
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
     except KeyboardInterrupt:
         print("\n\nInterruption par l'utilisateur")
         sys.exit(0)
@@ -1,16 +1,28 @@
 import csv
+import itertools
+import warnings
+from bisect import bisect_left, bisect_right, insort
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from exceptions import *
-from collections import Counter
+from journal import Journal
+import historique
+from historique import AnalyseHistorique, EcrivainHistorique, ResultatAnalyse
+import instantane
+from evenements import (BusEvenements, DonneesChargees, Emprunt, LivreAjoute, LivreSupprime,
+                         MembreAjoute, MembreSupprime, Retour)
+from index_catalogue import IndexCatalogue
+from recherche import IndexRecherche
 
 
 
 
 class Livre:
     """Représente un livre avec ses informations de base."""
+    __slots__ = ('isbn', 'titre', 'auteur', 'annee', 'genre', 'statut')
+
     def __init__(self, isbn: str, titre: str, auteur: str, annee: int, genre: str, statut: str = "disponible"):
         self.isbn = isbn
         self.titre = titre
@@ -26,6 +38,7 @@ class Livre:
 class Membre:
     """Représente un membre inscrit à la bibliothèque."""
     MAX_EMPRUNTS = 5
+    __slots__ = ('id', 'nom', 'livres_empruntes')
 
     def __init__(self, id: str, nom: str):
         self.id = id
@@ -33,17 +46,173 @@ class Membre:
         self.livres_empruntes: List[str] = []
 
 
+class Page:
+    """Une page d'une liste ordonnée (voir Bibliotheque.page_livres / page_membres).
+
+    ``elements`` : Livre ou Membre de la page ; ``suivant`` : curseur à passer en ``apres``
+    pour la page suivante (None en fin de liste) ; ``position`` : rang du premier élément ;
+    ``total`` : taille de la liste complète.
+    """
+    __slots__ = ('elements', 'suivant', 'position', 'total')
+
+    def __init__(self, elements: list, suivant, position: int, total: int):
+        self.elements = elements
+        self.suivant = suivant
+        self.position = position
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+
+# Versions du catalogue, uniques dans tout le processus (voir Bibliotheque.version_catalogue)
+_VERSIONS = itertools.count(1)
+
+
 class Bibliotheque:
-    """Classe principale de gestion des livres, membres et emprunts."""
-    def __init__(self):
-        self.livres: Dict[str, Livre] = {}
+    """Classe principale de gestion des livres, membres et emprunts.
+
+    Avec ``journal=True``, chaque modification est ajoutée à ``data/journal.log``
+    au lieu de provoquer une réécriture complète de livres.txt / membres.txt ;
+    ces fichiers ne sont réécrits qu'au compactage du journal.
+    Avec ``compact=True``, ``livres`` est un CatalogueCompact (stockage en colonnes).
+    Avec ``paresseux=True``, ``livres`` est un CatalogueParesseux : livres.txt est
+    projeté en mémoire et les livres ne sont lus qu'à la demande.
+    Chaque modification est publiée sur ``evenements`` (voir evenements.BusEvenements),
+    auquel s'abonnent les index internes comme l'interface. ``version_catalogue`` change
+    à chaque ajout ou suppression de livre et à chaque chargement : les graphiques qui ne
+    dépendent que des livres (genres, auteurs) sont retrouvés en cache tant qu'elle est la même.
+    """
+    # Nombre d'entrées du journal au-delà duquel on compacte automatiquement
+    SEUIL_COMPACTAGE = 500
+    # Fichiers de l'instantané, tous réécrits à chaque compactage (voir _ecrire_instantane)
+    FICHIERS_INSTANTANE = ('data/livres.txt', 'data/membres.txt', 'data/emprunts.txt', 'data/donnees.bin')
+    # Présent du moment où un nouvel instantané est complet jusqu'au vidage du journal
+    MARQUEUR_COMPACTAGE = 'data/compactage.valide'
+    # Politique d'écriture de l'historique : tous les N événements ou après T millisecondes
+    HISTORIQUE_TOUS_LES_N = 50
+    HISTORIQUE_DELAI_MS = 1000
+    # Processus utilisés pour analyser un long historique au premier chargement
+    HISTORIQUE_PROCESSUS = os.cpu_count() or 1
+
+    def __init__(self, journal: bool = False, compact: bool = False, paresseux: bool = False):
+        if compact and paresseux:
+            raise ValueError("Les modes compact et paresseux sont incompatibles")
+        if compact:
+            from catalogue_compact import CatalogueCompact
+            self.livres: Dict[str, Livre] = CatalogueCompact()
+        elif paresseux:
+            from catalogue_paresseux import CatalogueParesseux
+            self.livres: Dict[str, Livre] = CatalogueParesseux()
+        else:
+            self.livres: Dict[str, Livre] = {}
+        self._paresseux = paresseux
         self.membres: Dict[str, Membre] = {}
+        # Emprunts en cours : isbn -> (id_membre, date d'emprunt)
+        self.emprunts_actifs: Dict[str, Tuple[str, Optional[datetime]]] = {}
+        self._recherche = None   # IndexRecherche, construit à la première recherche
+        self._index = None       # IndexCatalogue, construit à la première requête
+        self._ids_membres = None  # ID des membres triés, construits à la première page
+        self.evenements = BusEvenements()
+        self.evenements.abonner(self._tenir_index_a_jour)
+        self.version_catalogue = 0
+        self.evenements.abonner(self._changer_version, LivreAjoute, LivreSupprime, DonneesChargees)
+        self._journal = Journal() if journal else None
+        self._rejeu = False
+        self.entrees_ignorees = []  # entrées du journal qui n'ont pas pu être rejouées
+        self._analyse = AnalyseHistorique()
+        self._ecrivain = self._creer_ecrivain()
         self.charger_donnees()
 
     # === Chargement des données ===
     def charger_donnees(self):
-        self._charger_livres()
-        self._charger_membres()
+        self._recherche = None
+        self._index = None
+        self._ids_membres = None
+        self.membres.clear()
+        self.emprunts_actifs.clear()
+        if os.path.exists(self.MARQUEUR_COMPACTAGE):
+            self._terminer_compactage()  # compactage validé puis interrompu
+        self._charger_analyse()
+        if self._paresseux:
+            # Seul l'index ISBN -> position est chargé, les livres sont lus à la demande
+            self.livres.rouvrir()
+            self._charger_membres()
+            self._charger_emprunts()
+        else:
+            self.livres.clear()
+            if not self._charger_instantane_binaire():
+                self._charger_livres()
+                self._charger_membres()
+                self._charger_emprunts()
+        if self._journal is not None:
+            self._rejouer_journal()
+        self.evenements.publier(DonneesChargees())
+
+    def _charger_analyse(self):
+        """Analyse de l'historique : point de reprise + lignes ajoutées depuis dans les partitions."""
+        self.flush()
+        if self._preparer_historique() and os.path.exists('data/historique.compteurs'):
+            os.remove('data/historique.compteurs')  # partitions réécrites : recomptage complet
+        self._analyse = AnalyseHistorique.charger('data/historique', 'data/historique.compteurs',
+                                                  self.HISTORIQUE_PROCESSUS)
+
+    @staticmethod
+    def _preparer_historique() -> bool:
+        """Migre l'ancien historique.csv en partitions mensuelles et compresse les mois clos.
+
+        Retourne True si des partitions existantes ont été modifiées.
+        """
+        migre = historique.migrer_fichier_unique('data/historique.csv', 'data/historique')
+        return historique.compresser_mois_clos('data/historique') or migre
+
+    def _charger_instantane_binaire(self) -> bool:
+        """Charge data/donnees.bin s'il est plus récent que les fichiers texte."""
+        if not instantane.est_a_jour('data/donnees.bin', 'data/livres.txt', 'data/membres.txt',
+                                     'data/emprunts.txt'):
+            return False
+        contenu = instantane.lire('data/donnees.bin')
+        if contenu is None:
+            return False
+
+        livres, membres, emprunts = contenu
+        for ligne in livres:
+            self.livres[ligne[0]] = Livre(*ligne)
+        for id_membre, nom, empruntes in membres:
+            membre = Membre(id_membre, nom)
+            membre.livres_empruntes = list(empruntes)
+            self.membres[id_membre] = membre
+        for isbn, id_membre, date_str in emprunts:
+            self.emprunts_actifs[isbn] = (id_membre, self._lire_date(date_str))
+        return True
+
+    @staticmethod
+    def _lire_date(date_str: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(date_str, "%Y-%m-%d %H:%M")
+        except (TypeError, ValueError):
+            return None
+
+    def _charger_emprunts(self):
+        """Charge data/emprunts.txt (isbn;id_membre;date) ; le reconstruit s'il est absent."""
+        try:
+            with open('data/emprunts.txt', 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    data = ligne.strip().split(';')
+                    if len(data) == 3:
+                        self.emprunts_actifs[data[0]] = (data[1], self._lire_date(data[2]))
+            return
+        except FileNotFoundError:
+            pass
+
+        # Première exécution : emprunts déduits des membres, dates tirées de l'analyse de l'historique
+        for membre in self.membres.values():
+            for isbn in membre.livres_empruntes:
+                _, date_str = self._analyse.en_cours.get(isbn, (None, None))
+                self.emprunts_actifs[isbn] = (membre.id, self._lire_date(date_str))
 
     def _charger_livres(self):
         try:
@@ -84,33 +253,209 @@ class Bibliotheque:
         except FileNotFoundError:
             open('data/membres.txt', 'w').close()
 
-    def sauvegarder_donnees(self):
-        with open('data/livres.txt', 'w', encoding='utf-8') as f:
-            for livre in self.livres.values():
-                f.write(f"{livre.isbn};{livre.titre};{livre.auteur};{livre.annee};{livre.genre};{livre.statut}\n")
+    def _rejouer_journal(self):
+        """Applique les entrées du journal par-dessus l'instantané chargé.
 
-        with open('data/membres.txt', 'w', encoding='utf-8') as f:
-            for membre in self.membres.values():
-                livres = ','.join(membre.livres_empruntes)
-                f.write(f"{membre.id};{membre.nom};{livres}\n")
+        Le journal ne contient que des modifications postérieures à l'instantané (voir
+        _ecrire_instantane) : une entrée qui échoue révèle une incohérence. Elle est
+        écartée pour que l'application démarre, mais signalée (``entrees_ignorees``).
+        """
+        self.entrees_ignorees = []
+        self._rejeu = True
+        try:
+            for entree in self._journal.relire():
+                try:
+                    self._appliquer_entree(entree)
+                except (BibliothequeError, ValueError, KeyError) as e:
+                    self.entrees_ignorees.append((entree, e))
+        finally:
+            self._rejeu = False
+        if self.entrees_ignorees:
+            warnings.warn(f"{len(self.entrees_ignorees)} entrée(s) du journal ignorée(s) au rejeu : "
+                          + "; ".join(f"{entree} ({e})" for entree, e in self.entrees_ignorees[:5]),
+                          RuntimeWarning, stacklevel=2)
+
+    def _appliquer_entree(self, entree: dict):
+        op = entree["op"]
+        if op == "ajout_livre":
+            self.ajouter_livre(Livre(entree["isbn"], entree["titre"], entree["auteur"],
+                                     entree["annee"], entree["genre"], entree["statut"]))
+        elif op == "ajout_membre":
+            self.enregistrer_membre(Membre(entree["id"], entree["nom"]))
+        elif op == "emprunt":
+            self.emprunter_livre(entree["isbn"], entree["id_membre"])
+            self.emprunts_actifs[entree["isbn"]] = (entree["id_membre"], self._lire_date(entree.get("date")))
+        elif op == "retour":
+            self.rendre_livre(entree["isbn"])
+        elif op == "suppression_livre":
+            self.supprimer_livre(entree["isbn"])
+        elif op == "suppression_membre":
+            self.supprimer_membre(entree["id"])
+
+    def _publier(self, evenement):
+        # Le rejeu du journal fait partie du chargement, signalé en bloc par DonneesChargees
+        if not self._rejeu:
+            self.evenements.publier(evenement)
+
+    def _tenir_index_a_jour(self, evenement):
+        """Abonné interne : reporte chaque modification dans les index déjà construits."""
+        if isinstance(evenement, (LivreAjoute, LivreSupprime)):
+            for index in (self._recherche, self._index):
+                if index is None:
+                    continue
+                if isinstance(evenement, LivreAjoute):
+                    index.ajouter(self.livres[evenement.isbn])
+                else:
+                    index.supprimer(evenement.isbn)
+        elif isinstance(evenement, (Emprunt, Retour)):
+            if self._index is not None:
+                self._index.changer_statut(evenement.isbn, self.livres[evenement.isbn].statut)
+        elif isinstance(evenement, MembreAjoute):
+            if self._ids_membres is not None:
+                insort(self._ids_membres, evenement.id_membre)
+        elif isinstance(evenement, MembreSupprime):
+            if self._ids_membres is not None:
+                del self._ids_membres[bisect_left(self._ids_membres, evenement.id_membre)]
+
+    def _changer_version(self, evenement):
+        # Jamais deux fois la même valeur, même entre deux instances de Bibliotheque
+        self.version_catalogue = next(_VERSIONS)
+
+    def _noter_mutation(self, operation: str, **donnees):
+        """Appelée après chaque modification de l'état (ajout au journal si actif)."""
+        if self._rejeu or self._journal is None:
+            return
+        self._journal.ajouter(operation, **donnees)
+        if self._journal.nb_entrees >= self.SEUIL_COMPACTAGE:
+            self.compacter_journal()
+
+    def _creer_ecrivain(self) -> Optional[EcrivainHistorique]:
+        """Écrivain de l'historique (None pour un stockage qui écrit l'historique lui-même)."""
+        return EcrivainHistorique('data/historique', self.HISTORIQUE_TOUS_LES_N, self.HISTORIQUE_DELAI_MS)
+
+    def flush(self):
+        """Écrit sur disque les événements d'historique encore en mémoire tampon."""
+        if self._ecrivain is not None:
+            self._ecrivain.flush()
 
-    def _enregistrer_historique(self, isbn: str, id_membre: str, action: str):
-        """Ajoute une entrée dans le fichier historique.csv"""
+    def sauvegarder_donnees(self):
+        self.flush()
+        if self._journal is not None:
+            # Les modifications sont déjà dans le journal : on garantit leur durabilité
+            self._journal.synchroniser()
+            return
+        self._ecrire_instantane()
+
+    def compacter_journal(self):
+        """Réécrit livres.txt / membres.txt puis vide le journal."""
+        self._ecrire_instantane()
+
+    def fermer(self):
+        """À appeler en quittant l'application : compacte le journal s'il est actif."""
+        if self._journal is not None:
+            self.compacter_journal()
+            self._journal.fermer()
+        else:
+            self.sauvegarder_donnees()
+        self._ecrivain.fermer()
+
+    def _ecrire_instantane(self):
+        """Réécrit l'instantané (FICHIERS_INSTANTANE) puis vide le journal.
+
+        Tous les fichiers sont d'abord écrits complets sous un nom temporaire (``.tmp``),
+        puis MARQUEUR_COMPACTAGE valide le nouvel instantané d'un coup ; viennent ensuite
+        les remplacements et le vidage du journal (_terminer_compactage). Un arrêt avant le
+        marqueur laisse l'ancien instantané et le journal intacts ; après, le chargement
+        suivant termine le compactage. Aucun mélange d'ancien et de nouveau n'est relu.
+        """
         Path('data').mkdir(exist_ok=True)
-        fichier = Path('data/historique.csv')
-        fichier_existe = fichier.exists()
-
-        with open(fichier, 'a', newline='', encoding='utf-8') as f:
-            fieldnames = ["date", "isbn", "id_membre", "action"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';')
-            if not fichier_existe:
-                writer.writeheader()
-            writer.writerow({
-                "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "isbn": isbn,
-                "id_membre": id_membre,
-                "action": action
-            })
+        for chemin in self.FICHIERS_INSTANTANE:
+            # Restes d'un compactage interrompu avant validation : jamais installés
+            if os.path.exists(chemin + '.tmp'):
+                os.remove(chemin + '.tmp')
+        self._ecrire_temporaire('data/livres.txt', (
+            f"{livre.isbn};{livre.titre};{livre.auteur};{livre.annee};{livre.genre};{livre.statut}\n"
+            for livre in self.livres.values()))
+        self._ecrire_temporaire('data/membres.txt', (
+            f"{membre.id};{membre.nom};{','.join(membre.livres_empruntes)}\n"
+            for membre in self.membres.values()))
+        self._ecrire_temporaire('data/emprunts.txt', (
+            f"{isbn};{id_membre};{date_emprunt.strftime('%Y-%m-%d %H:%M') if date_emprunt else ''}\n"
+            for isbn, (id_membre, date_emprunt) in self.emprunts_actifs.items()))
+        if not self._paresseux:  # l'instantané binaire matérialiserait tout le catalogue
+            # Copie binaire écrite en dernier : plus récente que les fichiers texte
+            instantane.ecrire(
+                'data/donnees.bin.tmp',
+                [(l.isbn, l.titre, l.auteur, l.annee, l.genre, l.statut) for l in self.livres.values()],
+                [(m.id, m.nom, tuple(m.livres_empruntes)) for m in self.membres.values()],
+                [(isbn, id_membre, date_emprunt.strftime("%Y-%m-%d %H:%M") if date_emprunt else "")
+                 for isbn, (id_membre, date_emprunt) in self.emprunts_actifs.items()])
+
+        # Point de validation : à partir d'ici, le nouvel instantané fait foi
+        with open(self.MARQUEUR_COMPACTAGE, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        if self._paresseux:
+            # Libère la projection mémoire de l'ancien fichier avant de le remplacer
+            self.livres.fermer()
+        self._terminer_compactage()
+        if self._paresseux:
+            self.livres.rouvrir()
+
+        # Le point de reprise doit correspondre exactement au contenu des partitions
+        self.rafraichir_historique()
+        self._analyse.sauvegarder('data/historique.compteurs')
+
+    @staticmethod
+    def _ecrire_temporaire(chemin: str, lignes):
+        """Écrit ``lignes`` dans ``chemin``.tmp, jusque sur le disque."""
+        with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+            f.writelines(lignes)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _terminer_compactage(self):
+        """Remplace les fichiers de l'instantané validé par leur .tmp, vide le journal puis
+        retire le marqueur. Peut être repris autant de fois que nécessaire."""
+        for chemin in self.FICHIERS_INSTANTANE:
+            if os.path.exists(chemin + '.tmp'):
+                os.replace(chemin + '.tmp', chemin)
+        # Les entrées du journal sont toutes dans l'instantané, même s'il n'est pas actif ici
+        journal = self._journal if self._journal is not None else Journal()
+        if self._journal is not None or journal.chemin.exists():
+            journal.vider()
+        os.remove(self.MARQUEUR_COMPACTAGE)
+
+    def _enregistrer_historique(self, isbn: str, id_membre: str, action: str, date: datetime = None):
+        """Ajoute une entrée à l'historique (écriture tamponnée, voir EcrivainHistorique)"""
+        if self._rejeu:
+            return  # l'historique contient déjà les opérations rejouées
+        date = date or datetime.now()
+        self._ecrivain.ecrire(date.strftime("%Y-%m-%d %H:%M"), isbn, id_membre, action)
+
+    def rafraichir_historique(self) -> int:
+        """Met à jour l'analyse avec les seuls événements ajoutés depuis le dernier passage.
+
+        Les événements de cette instance (après flush) comme ceux écrits par un autre
+        processus sont lus à la suite des partitions ; retourne le nombre d'octets lus.
+        """
+        self.flush()
+        return self._analyse.lire_suite('data/historique', self.HISTORIQUE_PROCESSUS)
+
+    def lire_historique(self, debut=None, fin=None):
+        """Itère sur l'historique : tuples (date, isbn, id_membre, action).
+
+        ``debut`` / ``fin`` (date, datetime ou chaîne, inclus) limitent la lecture
+        aux partitions mensuelles concernées.
+        """
+        self.flush()
+        yield from historique.lire_partitions('data/historique', debut, fin)
+
+    def historique_colonnes(self, debut=None, fin=None):
+        """Historique compris entre debut et fin chargé en colonnes NumPy (voir HistoriqueColonnes)."""
+        from historique_colonnes import HistoriqueColonnes
+        self.flush()
+        return HistoriqueColonnes.charger('data/historique', debut, fin)
 
     # === Méthodes métier ===
     def ajouter_livre(self, livre: Livre):
@@ -118,12 +463,17 @@ class Bibliotheque:
         if livre.isbn in self.livres:
             raise ValueError(f"Livre avec ISBN {livre.isbn} existe déjà")
         self.livres[livre.isbn] = livre
+        self._noter_mutation("ajout_livre", isbn=livre.isbn, titre=livre.titre, auteur=livre.auteur,
+                             annee=livre.annee, genre=livre.genre, statut=livre.statut)
+        self._publier(LivreAjoute(livre.isbn))
 
     def enregistrer_membre(self, membre: Membre):
         """Inscrit un nouveau membre."""
         if membre.id in self.membres:
             raise ValueError(f"Membre avec ID {membre.id} existe déjà")
         self.membres[membre.id] = membre
+        self._noter_mutation("ajout_membre", id=membre.id, nom=membre.nom)
+        self._publier(MembreAjoute(membre.id))
 
     def emprunter_livre(self, isbn: str, id_membre: str) -> None:
         isbn, id_membre = isbn.strip(), id_membre.strip()
@@ -142,9 +492,15 @@ class Bibliotheque:
             raise QuotaEmpruntDepasseError(id_membre, Membre.MAX_EMPRUNTS)
 
     # OPÉRATION D'EMPRUNT
+        maintenant = datetime.now()
         livre.statut = f"emprunté:{id_membre}"
+        self.livres[isbn] = livre  # signale la modification aux catalogues non-dict
         membre.livres_empruntes.append(isbn)
-        self._enregistrer_historique(isbn, id_membre, "emprunt")
+        self.emprunts_actifs[isbn] = (id_membre, maintenant)
+        self._enregistrer_historique(isbn, id_membre, "emprunt", maintenant)
+        self._noter_mutation("emprunt", isbn=isbn, id_membre=id_membre,
+                             date=maintenant.strftime("%Y-%m-%d %H:%M"))
+        self._publier(Emprunt(isbn, id_membre))
         
     def _valider_isbn(self, isbn: str):
         """Validation basique d'ISBN"""
@@ -173,6 +529,8 @@ class Bibliotheque:
     
         id_membre = livre.statut.split(":")[1]
         livre.statut = "disponible"
+        self.livres[isbn] = livre  # signale la modification aux catalogues non-dict
+        self.emprunts_actifs.pop(isbn, None)
     
         if id_membre in self.membres:
             membre = self.membres[id_membre]
@@ -181,6 +539,8 @@ class Bibliotheque:
     
     # Historique
         self._enregistrer_historique(isbn, id_membre, "retour")
+        self._noter_mutation("retour", isbn=isbn)
+        self._publier(Retour(isbn, id_membre))
 
 
     def supprimer_membre(self, id_membre: str):
@@ -198,6 +558,8 @@ class Bibliotheque:
     
     # Suppression
         del self.membres[id_membre]
+        self._noter_mutation("suppression_membre", id=id_membre)
+        self._publier(MembreSupprime(id_membre))
 
 
     def supprimer_livre(self, isbn: str):
@@ -213,10 +575,12 @@ class Bibliotheque:
     
     # Suppression
         del self.livres[isbn]
+        self._noter_mutation("suppression_livre", isbn=isbn)
+        self._publier(LivreSupprime(isbn))
 
 
-    def exporter_csv(self):
-        """Exporte livres, membres et historique dans dossier export/"""
+    def exporter_csv(self, debut=None, fin=None):
+        """Exporte livres, membres et historique (éventuellement limité à [debut, fin]) dans dossier export/"""
         os.makedirs("export", exist_ok=True)
 
         # Export livres
@@ -246,69 +610,90 @@ class Bibliotheque:
                     'livres_empruntes': ",".join(membre.livres_empruntes)
                 })
 
-        # Export historique (copie simple)
-        historique_src = "data/historique.csv"
-        historique_dst = "export/historique.csv"
-        if os.path.exists(historique_src):
-            with open(historique_src, "r", encoding='utf-8') as src, \
-                 open(historique_dst, "w", encoding='utf-8') as dst:
-                dst.write(src.read())
-
-
+        # Export historique (partitions concaténées)
+        with open("export/historique.csv", "w", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(historique.ENTETE)
+            writer.writerows(self.lire_historique(debut, fin))
+
+
+
+    def rechercher(self, requete: str, champs=("titre", "auteur", "genre"), flou: bool = False) -> List[Livre]:
+        """Livres dont chaque mot de ``requete`` figure dans l'un des ``champs``
+        (isbn, titre, auteur, genre), via l'index inversé (voir IndexRecherche).
+
+        La comparaison ignore accents, casse et ponctuation ; ``flou=True`` tolère
+        aussi quelques fautes de frappe par mot.
+        """
+        if self._recherche is None:
+            self._recherche = IndexRecherche(self.livres.values())
+        return [self.livres[isbn] for isbn in self._recherche.rechercher(requete, champs, flou)]
+
+    def _index_catalogue(self) -> IndexCatalogue:
+        if self._index is None:
+            self._index = IndexCatalogue(self.livres.values())
+        return self._index
+
+    def requete(self, auteur: str = None, genre: str = None, annee_min: int = None,
+                annee_max: int = None, disponible: bool = None) -> List[Livre]:
+        """Livres satisfaisant tous les critères donnés, via les index secondaires
+        (voir IndexCatalogue) : auteur et genre sans accents ni casse, années incluses.
+
+        Ex. ``requete(auteur="Hugo", annee_min=1850, disponible=True)``.
+        """
+        return [self.livres[isbn] for isbn in self._index_catalogue().requete(
+            auteur, genre, annee_min, annee_max, disponible)]
+
+    def page_livres(self, taille: int = 50, apres=None, ordre: str = "isbn", decalage: int = 0) -> Page:
+        """``taille`` livres dans l'ordre ``ordre`` ("isbn" ou "annee"), après le curseur
+        ``apres`` (``Page.suivant`` de la page précédente) ou à partir du rang ``decalage``.
+
+        Les listes triées sont tenues à jour avec les index secondaires : le coût d'une
+        page dépend de sa taille, pas de celle du catalogue.
+        """
+        index = self._index_catalogue()
+        isbns, dernier, position = index.tranche(ordre, taille, apres, decalage)
+        suivant = dernier if position + len(isbns) < len(index) else None
+        return Page([self.livres[isbn] for isbn in isbns], suivant, position, len(index))
+
+    def page_membres(self, taille: int = 50, apres: str = None, decalage: int = 0) -> Page:
+        """``taille`` membres par ID croissant, après l'ID ``apres`` ou à partir du rang ``decalage``."""
+        if self._ids_membres is None:
+            self._ids_membres = sorted(self.membres)
+        debut = bisect_right(self._ids_membres, apres) if apres is not None else max(decalage, 0)
+        ids = self._ids_membres[debut:debut + taille]
+        suivant = ids[-1] if ids and debut + len(ids) < len(self._ids_membres) else None
+        return Page([self.membres[id_membre] for id_membre in ids], suivant, debut, len(self._ids_membres))
+
+    def isbns_disponibles(self) -> set:
+        """ISBN des livres disponibles, ensemble tenu à jour par les emprunts et retours
+        (à ne pas modifier)."""
+        return self._index_catalogue().disponibles
+
+    def compteurs(self) -> dict:
+        """Nombre de livres au total, disponibles et empruntés, sans parcours du catalogue."""
+        total, empruntes = len(self.livres), len(self.emprunts_actifs)
+        return {"total": total, "disponibles": total - empruntes, "empruntes": empruntes}
+
+    def nb_par_genre(self) -> Dict[str, int]:
+        """Nombre de livres par genre, tenu à jour avec les index secondaires."""
+        return dict(self._index_catalogue().genres)
+
+    def analyser_historique(self, n=3) -> ResultatAnalyse:
+        """Tous les agrégats de l'historique (tops, séries quotidiennes, emprunts en cours).
+
+        Seuls les événements ajoutés depuis la dernière analyse sont lus.
+        """
+        return self._analyse.resultat(self.top_livres_empruntes(n), self.top_membres_actifs(n))
 
     def top_livres_empruntes(self, n=3):
         """Retourne une liste (livre, nb_emprunts) triée par nb emprunts décroissant"""
-        compteur = Counter()
-        historique_path = "data/historique.csv"
-        
-        if not os.path.exists(historique_path):
-            return []
-        
-        with open(historique_path, "r", encoding='utf-8') as f:
-            # On lit chaque ligne et compte les emprunts
-            for line in f:
-                parts = line.strip().split(";")
-                if len(parts) >= 4:
-                    action = parts[3].strip().lower()
-                    isbn = parts[1].strip()
-                    if action == "emprunt":
-                        compteur[isbn] += 1
-        
-        livres_counts = []
-        for isbn, count in compteur.most_common(n):
-            livre = self.livres.get(isbn, None)
-            if livre:
-                livres_counts.append((livre, count))
-        return livres_counts
-    
-
+        self.rafraichir_historique()
+        top = AnalyseHistorique.top(self._analyse.par_livre, n, existe=self.livres.__contains__)
+        return [(self.livres[isbn], count) for isbn, count in top]
 
     def top_membres_actifs(self, n=3):
         """Retourne une liste (membre, nb_emprunts) triée par nb emprunts décroissant"""
-        compteur = Counter()
-        historique_path = "data/historique.csv"
-        
-        if not os.path.exists(historique_path):
-            return []
-        
-        with open(historique_path, "r", encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split(";")
-                if len(parts) >= 4:
-                    action = parts[3].strip().lower()
-                    id_membre = parts[2].strip()
-                    if action == "emprunt":
-                        compteur[id_membre] += 1
-        
-        membres_counts = []
-        for id_membre, count in compteur.most_common(n):
-            membre = self.membres.get(id_membre, None)
-            if membre:
-                membres_counts.append((membre, count))
-        return membres_counts
-
-
-
-
-
-
+        self.rafraichir_historique()
+        top = AnalyseHistorique.top(self._analyse.par_membre, n, existe=self.membres.__contains__)
+        return [(self.membres[id_membre], count) for id_membre, count in top]
@@ -0,0 +1,256 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+import historique
+from bibliotheque import Bibliotheque, Livre, Membre
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS livres (
+    isbn   TEXT PRIMARY KEY,
+    titre  TEXT NOT NULL,
+    auteur TEXT NOT NULL,
+    annee  INTEGER NOT NULL,
+    genre  TEXT NOT NULL,
+    statut TEXT NOT NULL DEFAULT 'disponible'
+);
+CREATE TABLE IF NOT EXISTS membres (
+    id  TEXT PRIMARY KEY,
+    nom TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS emprunts (
+    isbn      TEXT PRIMARY KEY,
+    id_membre TEXT NOT NULL,
+    date      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS historique (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    date      TEXT NOT NULL,
+    isbn      TEXT NOT NULL,
+    id_membre TEXT NOT NULL,
+    action    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_livres_auteur ON livres(auteur);
+CREATE INDEX IF NOT EXISTS idx_livres_genre ON livres(genre);
+CREATE INDEX IF NOT EXISTS idx_livres_statut ON livres(statut);
+CREATE INDEX IF NOT EXISTS idx_emprunts_membre ON emprunts(id_membre);
+CREATE INDEX IF NOT EXISTS idx_historique_isbn ON historique(action, isbn);
+CREATE INDEX IF NOT EXISTS idx_historique_membre ON historique(action, id_membre);
+CREATE INDEX IF NOT EXISTS idx_historique_date ON historique(date);
+"""
+# PRAGMA user_version : 0 tant que les fichiers texte n'ont pas été importés dans la base
+VERSION_IMPORTEE = 1
+
+
+class BibliothequeSQLite(Bibliotheque):
+    """Variante de Bibliotheque stockée dans une base SQLite (module standard sqlite3).
+
+    Les dictionnaires ``livres`` / ``membres`` restent disponibles pour l'interface,
+    mais chaque opération publique s'exécute dans une transaction unique qui ne
+    touche que les lignes concernées ; les statistiques sont des agrégats SQL indexés.
+    Au premier lancement, les fichiers texte existants sont importés dans la base ;
+    l'import est marqué dans la base (``PRAGMA user_version``), dans la même transaction,
+    et n'est jamais refait, même si tous les livres sont ensuite supprimés.
+    """
+
+    def __init__(self, chemin: str = 'data/bibliotheque.db', compact: bool = False):
+        os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+        # isolation_level=None : les transactions sont gérées explicitement (_transaction)
+        self._conn = sqlite3.connect(chemin, isolation_level=None)
+        self._conn.executescript(SCHEMA)
+        self._profondeur_transaction = 0
+        self._memoire_modifiee = False
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < VERSION_IMPORTEE:
+            self.livres, self.membres = {}, {}
+            self._importer_fichiers_texte()
+        super().__init__(compact=compact)
+
+    @contextmanager
+    def _transaction(self):
+        """Transaction unique ; les appels imbriqués rejoignent la transaction englobante.
+
+        Les méthodes de Bibliotheque modifient la mémoire avant d'appeler _noter_mutation /
+        _enregistrer_historique, qui écrivent en base. Si l'un d'eux a été appelé, la mémoire
+        a pu changer : une annulation la recharge alors depuis la base, même si l'écriture a
+        échoué avant de toucher une ligne. Une erreur de validation (levée avant toute
+        modification) n'entraîne aucun rechargement.
+        """
+        if self._profondeur_transaction == 0:
+            self._conn.execute("BEGIN")
+            self._memoire_modifiee = False
+        self._profondeur_transaction += 1
+        try:
+            yield
+        except BaseException:
+            self._profondeur_transaction -= 1
+            if self._profondeur_transaction == 0:
+                self._conn.execute("ROLLBACK")
+                if self._memoire_modifiee:
+                    self.charger_donnees()
+            raise
+        else:
+            self._profondeur_transaction -= 1
+            if self._profondeur_transaction == 0:
+                self._conn.execute("COMMIT")
+
+    # === Chargement ===
+    def _importer_fichiers_texte(self):
+        """Importe livres.txt, membres.txt et l'historique dans une base vide, une seule fois."""
+        Bibliotheque._charger_livres(self)
+        Bibliotheque._charger_membres(self)
+        self._preparer_historique()
+        evenements = list(historique.lire_partitions('data/historique'))
+
+        with self._transaction():
+            # Base créée avant le marqueur d'import : déjà remplie, rien n'est réimporté
+            deja_remplie = any(self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                               for table in ("livres", "membres", "historique"))
+            self._conn.execute(f"PRAGMA user_version = {VERSION_IMPORTEE}")
+            if deja_remplie:
+                return
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO livres VALUES (?, ?, ?, ?, ?, ?)",
+                [(l.isbn, l.titre, l.auteur, l.annee, l.genre, l.statut) for l in self.livres.values()])
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO membres VALUES (?, ?)",
+                [(m.id, m.nom) for m in self.membres.values()])
+            self._conn.executemany(
+                "INSERT INTO historique (date, isbn, id_membre, action) VALUES (?, ?, ?, ?)",
+                evenements)
+
+            # Les emprunts en cours sont déduits de l'historique (date du dernier emprunt)
+            dates = {}
+            for date, isbn, _, action in evenements:
+                if action == "emprunt":
+                    dates[isbn] = date
+            for livre in self.livres.values():
+                if livre.statut.startswith("emprunté:"):
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO emprunts VALUES (?, ?, ?)",
+                        (livre.isbn, livre.statut.split(":")[1], dates.get(livre.isbn, "")))
+
+    def _charger_instantane_binaire(self) -> bool:
+        return False  # la base est la seule source de vérité
+
+    def _charger_analyse(self):
+        pass  # les statistiques sont calculées en SQL (voir analyser_historique)
+
+    def _charger_livres(self):
+        for isbn, titre, auteur, annee, genre, statut in self._conn.execute("SELECT * FROM livres"):
+            self.livres[isbn] = Livre(isbn, titre, auteur, annee, genre, statut)
+
+    def _charger_membres(self):
+        for id_membre, nom in self._conn.execute("SELECT id, nom FROM membres"):
+            self.membres[id_membre] = Membre(id_membre, nom)
+        for isbn, id_membre in self._conn.execute("SELECT isbn, id_membre FROM emprunts ORDER BY rowid"):
+            if id_membre in self.membres:
+                self.membres[id_membre].livres_empruntes.append(isbn)
+
+    def _charger_emprunts(self):
+        for isbn, id_membre, date_str in self._conn.execute("SELECT isbn, id_membre, date FROM emprunts"):
+            self.emprunts_actifs[isbn] = (id_membre, self._lire_date(date_str))
+
+    def _creer_ecrivain(self):
+        return None  # l'historique est écrit dans la table historique (_enregistrer_historique)
+
+    def rafraichir_historique(self) -> int:
+        return 0  # les requêtes lisent directement la table historique
+
+    def lire_historique(self, debut=None, fin=None):
+        debut, fin = historique.normaliser_borne(debut), historique.normaliser_borne(fin)
+        yield from self._conn.execute(
+            "SELECT date, isbn, id_membre, action FROM historique "
+            "WHERE (:debut IS NULL OR date >= :debut) "
+            "AND (:fin IS NULL OR substr(date, 1, length(:fin)) <= :fin) ORDER BY id",
+            {"debut": debut, "fin": fin})
+
+    def historique_colonnes(self, debut=None, fin=None):
+        from historique_colonnes import HistoriqueColonnes
+        return HistoriqueColonnes.depuis_evenements(self.lire_historique(debut, fin))
+
+    # === Persistance ligne à ligne ===
+    def _noter_mutation(self, operation: str, **donnees):
+        self._memoire_modifiee = True
+        if operation == "ajout_livre":
+            self._conn.execute(
+                "INSERT INTO livres VALUES (:isbn, :titre, :auteur, :annee, :genre, :statut)", donnees)
+        elif operation == "ajout_membre":
+            self._conn.execute("INSERT INTO membres VALUES (:id, :nom)", donnees)
+        elif operation == "emprunt":
+            self._conn.execute("UPDATE livres SET statut = ? WHERE isbn = ?",
+                               (f"emprunté:{donnees['id_membre']}", donnees["isbn"]))
+            self._conn.execute("INSERT OR REPLACE INTO emprunts VALUES (?, ?, ?)",
+                               (donnees["isbn"], donnees["id_membre"], donnees["date"]))
+        elif operation == "retour":
+            self._conn.execute("UPDATE livres SET statut = 'disponible' WHERE isbn = ?", (donnees["isbn"],))
+            self._conn.execute("DELETE FROM emprunts WHERE isbn = ?", (donnees["isbn"],))
+        elif operation == "suppression_livre":
+            self._conn.execute("DELETE FROM livres WHERE isbn = ?", (donnees["isbn"],))
+        elif operation == "suppression_membre":
+            self._conn.execute("DELETE FROM membres WHERE id = ?", (donnees["id"],))
+
+    def _enregistrer_historique(self, isbn: str, id_membre: str, action: str, date: datetime = None):
+        self._memoire_modifiee = True
+        self._conn.execute(
+            "INSERT INTO historique (date, isbn, id_membre, action) VALUES (?, ?, ?, ?)",
+            ((date or datetime.now()).strftime("%Y-%m-%d %H:%M"), isbn, id_membre, action))
+
+    def sauvegarder_donnees(self):
+        """Rien à réécrire : chaque opération est validée dans sa propre transaction."""
+        pass
+
+    def fermer(self):
+        self._conn.close()
+
+    # === Méthodes métier transactionnelles ===
+    def ajouter_livre(self, livre: Livre):
+        with self._transaction():
+            super().ajouter_livre(livre)
+
+    def enregistrer_membre(self, membre: Membre):
+        with self._transaction():
+            super().enregistrer_membre(membre)
+
+    def emprunter_livre(self, isbn: str, id_membre: str) -> None:
+        with self._transaction():
+            super().emprunter_livre(isbn, id_membre)
+
+    def rendre_livre(self, isbn: str):
+        with self._transaction():
+            super().rendre_livre(isbn)
+
+    def supprimer_membre(self, id_membre: str):
+        with self._transaction():
+            super().supprimer_membre(id_membre)
+
+    def supprimer_livre(self, isbn: str):
+        with self._transaction():
+            super().supprimer_livre(isbn)
+
+    # === Statistiques (agrégats SQL indexés) ===
+    def analyser_historique(self, n=3) -> historique.ResultatAnalyse:
+        par_jour = {"emprunt": {}, "retour": {}}
+        for jour, action, nb in self._conn.execute(
+                "SELECT substr(date, 1, 10), action, COUNT(*) FROM historique "
+                "WHERE action IN ('emprunt', 'retour') GROUP BY 1, 2"):
+            par_jour[action][jour] = nb
+        en_cours = {isbn: (id_membre, date_emprunt.strftime("%Y-%m-%d %H:%M") if date_emprunt else "")
+                    for isbn, (id_membre, date_emprunt) in self.emprunts_actifs.items()}
+        return historique.ResultatAnalyse(self.top_livres_empruntes(n), self.top_membres_actifs(n),
+                                          par_jour["emprunt"], par_jour["retour"], en_cours)
+
+    def top_livres_empruntes(self, n=3):
+        """Retourne une liste (livre, nb_emprunts) triée par nb emprunts décroissant"""
+        lignes = self._conn.execute(
+            "SELECT h.isbn, COUNT(*) AS nb FROM historique h JOIN livres l ON l.isbn = h.isbn "
+            "WHERE h.action = 'emprunt' GROUP BY h.isbn ORDER BY nb DESC LIMIT ?", (n,))
+        return [(self.livres[isbn], nb) for isbn, nb in lignes if isbn in self.livres]
+
+    def top_membres_actifs(self, n=3):
+        """Retourne une liste (membre, nb_emprunts) triée par nb emprunts décroissant"""
+        lignes = self._conn.execute(
+            "SELECT h.id_membre, COUNT(*) AS nb FROM historique h JOIN membres m ON m.id = h.id_membre "
+            "WHERE h.action = 'emprunt' GROUP BY h.id_membre ORDER BY nb DESC LIMIT ?", (n,))
+        return [(self.membres[id_membre], nb) for id_membre, nb in lignes if id_membre in self.membres]
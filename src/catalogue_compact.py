@@ -0,0 +1,180 @@
+import sys
+import tracemalloc
+from array import array
+from collections.abc import MutableMapping
+
+from bibliotheque import Livre
+
+
+class _Dictionnaire:
+    """Encodage par dictionnaire : chaque valeur distincte n'est stockée qu'une fois."""
+
+    def __init__(self):
+        self.valeurs = []
+        self.codes = {}
+
+    def encoder(self, valeur: str) -> int:
+        code = self.codes.get(valeur)
+        if code is None:
+            code = len(self.valeurs)
+            self.codes[valeur] = code
+            self.valeurs.append(valeur)
+        return code
+
+
+class LivreCompact(Livre):
+    """Vue sur une ligne de CatalogueCompact, utilisable comme un Livre.
+
+    Les lectures et écritures d'attributs (ex. ``livre.statut = ...``) sont
+    répercutées directement dans les colonnes du catalogue.
+    """
+    __slots__ = ('_catalogue', '_ligne')
+
+    def __init__(self, catalogue: "CatalogueCompact", ligne: int):
+        self._catalogue = catalogue
+        self._ligne = ligne
+
+    @property
+    def isbn(self):
+        return self._catalogue._isbns[self._ligne]
+
+    @property
+    def titre(self):
+        return self._catalogue._titres[self._ligne]
+
+    @titre.setter
+    def titre(self, valeur):
+        self._catalogue._titres[self._ligne] = valeur
+
+    @property
+    def auteur(self):
+        return self._catalogue._auteurs.valeurs[self._catalogue._codes_auteur[self._ligne]]
+
+    @auteur.setter
+    def auteur(self, valeur):
+        self._catalogue._codes_auteur[self._ligne] = self._catalogue._auteurs.encoder(valeur)
+
+    @property
+    def annee(self):
+        return self._catalogue._annees[self._ligne]
+
+    @annee.setter
+    def annee(self, valeur):
+        self._catalogue._annees[self._ligne] = valeur
+
+    @property
+    def genre(self):
+        return self._catalogue._genres.valeurs[self._catalogue._codes_genre[self._ligne]]
+
+    @genre.setter
+    def genre(self, valeur):
+        self._catalogue._codes_genre[self._ligne] = self._catalogue._genres.encoder(valeur)
+
+    @property
+    def statut(self):
+        return self._catalogue._statuts.valeurs[self._catalogue._codes_statut[self._ligne]]
+
+    @statut.setter
+    def statut(self, valeur):
+        self._catalogue._codes_statut[self._ligne] = self._catalogue._statuts.encoder(valeur)
+
+
+class CatalogueCompact(MutableMapping):
+    """Catalogue en colonnes, remplaçant le dict ``Bibliotheque.livres`` en mode compact.
+
+    L'année est stockée dans un tableau d'entiers, auteur / genre / statut sont
+    encodés par dictionnaire ; ``catalogue[isbn]`` renvoie une vue LivreCompact.
+    """
+
+    def __init__(self):
+        self._lignes = {}    # isbn -> numéro de ligne
+        self._libres = []    # lignes libérées par des suppressions, réutilisables
+        self._isbns = []
+        self._titres = []
+        self._annees = array('i')
+        self._auteurs = _Dictionnaire()
+        self._genres = _Dictionnaire()
+        self._statuts = _Dictionnaire()
+        self._codes_auteur = array('I')
+        self._codes_genre = array('I')
+        self._codes_statut = array('I')
+
+    def __getitem__(self, isbn):
+        return LivreCompact(self, self._lignes[isbn])
+
+    def __setitem__(self, isbn, livre):
+        ligne = self._lignes.get(isbn)
+        if ligne is None:
+            if self._libres:
+                ligne = self._libres.pop()
+            else:
+                ligne = len(self._isbns)
+                self._isbns.append(None)
+                self._titres.append(None)
+                self._annees.append(0)
+                self._codes_auteur.append(0)
+                self._codes_genre.append(0)
+                self._codes_statut.append(0)
+            self._lignes[isbn] = ligne
+        elif isinstance(livre, LivreCompact) and livre._catalogue is self and livre._ligne == ligne:
+            return  # la vue écrit déjà dans les colonnes
+
+        self._isbns[ligne] = isbn
+        self._titres[ligne] = livre.titre
+        self._annees[ligne] = livre.annee
+        self._codes_auteur[ligne] = self._auteurs.encoder(livre.auteur)
+        self._codes_genre[ligne] = self._genres.encoder(livre.genre)
+        self._codes_statut[ligne] = self._statuts.encoder(livre.statut)
+
+    def __delitem__(self, isbn):
+        ligne = self._lignes.pop(isbn)
+        self._isbns[ligne] = None
+        self._titres[ligne] = None
+        self._libres.append(ligne)
+
+    def __iter__(self):
+        return iter(self._lignes)
+
+    def __len__(self):
+        return len(self._lignes)
+
+    def __contains__(self, isbn):
+        return isbn in self._lignes
+
+    def clear(self):
+        self.__init__()
+
+
+def rapport_memoire(lignes) -> dict:
+    """Mesure (tracemalloc) la mémoire d'un catalogue standard et d'un catalogue compact.
+
+    ``lignes`` : liste de tuples (isbn, titre, auteur, annee, genre, statut).
+    Retourne les octets alloués par chaque mode.
+    """
+    resultats = {}
+    for mode in ("standard", "compact"):
+        tracemalloc.start()
+        catalogue = {} if mode == "standard" else CatalogueCompact()
+        for isbn, titre, auteur, annee, genre, statut in lignes:
+            # Copie des chaînes : simule des valeurs lues depuis le fichier
+            catalogue[isbn] = Livre(isbn, "".join(titre), "".join(auteur), annee, "".join(genre), statut)
+        resultats[mode] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del catalogue
+    return resultats
+
+
+if __name__ == "__main__":
+    # python src/catalogue_compact.py [nb_livres] : rapport sur un catalogue synthétique
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    genres = ["Roman", "Science", "Histoire", "Informatique", "Programmation", "Poésie"]
+    lignes = [
+        (f"978{i:010d}", f"Titre du livre numéro {i}", f"Auteur {i % 5000}",
+         1900 + i % 125, genres[i % len(genres)], "disponible")
+        for i in range(nb)
+    ]
+    rapport = rapport_memoire(lignes)
+    print(f"=== Mémoire du catalogue ({nb} livres) ===")
+    for mode, octets in rapport.items():
+        print(f"{mode:>9} : {octets / 1e6:8.1f} Mo  ({octets / nb:6.1f} octets/livre)")
+    print(f"Gain : {100 * (1 - rapport['compact'] / rapport['standard']):.0f} %")
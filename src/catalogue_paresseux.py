@@ -0,0 +1,185 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from bibliotheque import Livre
+
+# Index persistant : entête (signature, version, taille et date du fichier source, nombre
+# d'entrées), puis les positions (octets) des lignes, puis les ISBN triés, chacun suivi de '\n'
+# (un index tronqué au milieu d'un ISBN est ainsi détecté).
+SIGNATURE = b'BIBIDX\0\0'
+VERSION = 2
+_ENTETE = struct.Struct('<8sHQqI')
+
+
+class CatalogueParesseux(MutableMapping):
+    """Catalogue à chargement paresseux, remplaçant le dict ``Bibliotheque.livres``.
+
+    ``livres.txt`` est projeté en mémoire (mmap) et seul l'index trié ISBN -> position
+    est chargé au démarrage. Un Livre n'est analysé que lorsqu'on y accède ; les plus
+    utilisés restent dans un cache LRU. Les livres ajoutés ou modifiés sont conservés
+    en mémoire jusqu'à la prochaine sauvegarde de livres.txt.
+
+    Non sûr entre threads : même une lecture réordonne le cache LRU. Comme le dict qu'il
+    remplace, il n'est utilisé que depuis le thread de l'interface (les graphiques
+    reçoivent une copie des livres, voir ``Visualisation.taches``).
+    """
+
+    def __init__(self, chemin: str = 'data/livres.txt', chemin_index: str = 'data/livres.idx',
+                 taille_cache: int = 1024):
+        self.chemin = chemin
+        self.chemin_index = chemin_index
+        self.taille_cache = taille_cache
+        self._fichier = None
+        self._mmap = None
+        self._isbns = []
+        self._positions = array('Q')
+        self._cache = OrderedDict()
+        self._modifies = {}
+        self._supprimes = set()
+        self._nb = 0
+
+    # === Ouverture et index ===
+    def rouvrir(self):
+        """(Ré)ouvre livres.txt et son index ; oublie les modifications non sauvegardées."""
+        self.fermer()
+        if not os.path.exists(self.chemin):
+            os.makedirs(os.path.dirname(self.chemin) or '.', exist_ok=True)
+            open(self.chemin, 'w').close()
+
+        self._fichier = open(self.chemin, 'rb')
+        stat = os.fstat(self._fichier.fileno())
+        if stat.st_size > 0:
+            self._mmap = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        if not self._lire_index(stat):
+            self._construire_index(stat)
+        self._nb = len(self._isbns)
+
+    def fermer(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+        self._isbns = []
+        self._positions = array('Q')
+        self._cache.clear()
+        self._modifies.clear()
+        self._supprimes.clear()
+        self._nb = 0
+
+    def _lire_index(self, stat) -> bool:
+        try:
+            with open(self.chemin_index, 'rb') as f:
+                donnees = f.read()
+        except FileNotFoundError:
+            return False
+        if len(donnees) < _ENTETE.size:
+            return False
+
+        signature, version, taille, date, nb = _ENTETE.unpack_from(donnees)
+        if (signature, version, taille, date) != (SIGNATURE, VERSION, stat.st_size, stat.st_mtime_ns):
+            return False  # index absent ou périmé : livres.txt a changé
+
+        fin_positions = _ENTETE.size + 8 * nb
+        self._positions = array('Q')
+        self._positions.frombytes(donnees[_ENTETE.size:fin_positions])
+        isbns = donnees[fin_positions:]
+        if nb and not isbns.endswith(b'\n'):
+            return False
+        self._isbns = isbns.decode('utf-8').split('\n')[:-1]
+        return len(self._isbns) == nb == len(self._positions)
+
+    def _construire_index(self, stat):
+        positions = {}
+        if self._mmap is not None:
+            position = 0
+            for ligne in iter(self._mmap.readline, b''):
+                if ligne.count(b';') == 5:
+                    isbn = ligne.split(b';', 1)[0].strip().decode('utf-8')
+                    positions[isbn] = position  # en cas de doublon, la dernière ligne l'emporte
+                position += len(ligne)
+
+        self._isbns = sorted(positions)
+        self._positions = array('Q', (positions[isbn] for isbn in self._isbns))
+
+        temporaire = self.chemin_index + '.tmp'
+        with open(temporaire, 'wb') as f:
+            f.write(_ENTETE.pack(SIGNATURE, VERSION, stat.st_size, stat.st_mtime_ns, len(self._isbns)))
+            f.write(self._positions.tobytes())
+            f.write(''.join(isbn + '\n' for isbn in self._isbns).encode('utf-8'))
+        os.replace(temporaire, self.chemin_index)
+
+    def _rang(self, isbn):
+        """Rang de l'ISBN dans l'index trié, ou None."""
+        i = bisect_left(self._isbns, isbn)
+        if i < len(self._isbns) and self._isbns[i] == isbn:
+            return i
+        return None
+
+    def _lire_livre(self, rang: int) -> Livre:
+        debut = self._positions[rang]
+        fin = self._mmap.find(b'\n', debut)
+        if fin == -1:
+            fin = len(self._mmap)
+        isbn, titre, auteur, annee, genre, statut = \
+            (champ.strip() for champ in self._mmap[debut:fin].decode('utf-8').split(';'))
+        return Livre(isbn, titre, auteur, int(annee), genre, statut)
+
+    # === Interface MutableMapping ===
+    def __getitem__(self, isbn):
+        livre = self._modifies.get(isbn)
+        if livre is not None:
+            return livre
+        if isbn in self._supprimes:
+            raise KeyError(isbn)
+
+        livre = self._cache.get(isbn)
+        if livre is not None:
+            self._cache.move_to_end(isbn)
+            return livre
+
+        rang = self._rang(isbn)
+        if rang is None:
+            raise KeyError(isbn)
+        livre = self._lire_livre(rang)
+        self._cache[isbn] = livre
+        if len(self._cache) > self.taille_cache:
+            self._cache.popitem(last=False)
+        return livre
+
+    def __setitem__(self, isbn, livre):
+        if isbn not in self:
+            self._nb += 1
+        # Épinglé hors du cache LRU pour ne pas perdre la modification avant la sauvegarde
+        self._modifies[isbn] = livre
+        self._cache.pop(isbn, None)
+        self._supprimes.discard(isbn)
+
+    def __delitem__(self, isbn):
+        if isbn not in self:
+            raise KeyError(isbn)
+        self._modifies.pop(isbn, None)
+        self._cache.pop(isbn, None)
+        if self._rang(isbn) is not None:
+            self._supprimes.add(isbn)
+        self._nb -= 1
+
+    def __contains__(self, isbn):
+        if isbn in self._modifies:
+            return True
+        return isbn not in self._supprimes and self._rang(isbn) is not None
+
+    def __iter__(self):
+        for isbn in self._isbns:
+            if isbn not in self._supprimes and isbn not in self._modifies:
+                yield isbn
+        yield from list(self._modifies)
+
+    def __len__(self):
+        return self._nb
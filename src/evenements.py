@@ -0,0 +1,79 @@
+class Evenement:
+    """Modification de l'état d'une Bibliotheque, publiée sur son bus ``evenements``."""
+    __slots__ = ()
+
+    def __repr__(self):
+        champs = ", ".join(f"{nom}={getattr(self, nom)!r}" for nom in self.__slots__)
+        return f"{type(self).__name__}({champs})"
+
+
+class LivreAjoute(Evenement):
+    __slots__ = ('isbn',)
+
+    def __init__(self, isbn: str):
+        self.isbn = isbn
+
+
+class LivreSupprime(Evenement):
+    __slots__ = ('isbn',)
+
+    def __init__(self, isbn: str):
+        self.isbn = isbn
+
+
+class Emprunt(Evenement):
+    __slots__ = ('isbn', 'id_membre')
+
+    def __init__(self, isbn: str, id_membre: str):
+        self.isbn = isbn
+        self.id_membre = id_membre
+
+
+class Retour(Evenement):
+    __slots__ = ('isbn', 'id_membre')
+
+    def __init__(self, isbn: str, id_membre: str):
+        self.isbn = isbn
+        self.id_membre = id_membre
+
+
+class MembreAjoute(Evenement):
+    __slots__ = ('id_membre',)
+
+    def __init__(self, id_membre: str):
+        self.id_membre = id_membre
+
+
+class MembreSupprime(Evenement):
+    __slots__ = ('id_membre',)
+
+    def __init__(self, id_membre: str):
+        self.id_membre = id_membre
+
+
+class DonneesChargees(Evenement):
+    """Données (re)chargées en bloc : tout ce qui en dérive est à reconstruire."""
+    __slots__ = ()
+
+
+class BusEvenements:
+    """Diffusion synchrone des événements aux abonnés, dans l'ordre d'abonnement.
+
+    Un abonné est appelé avec l'événement, après que la modification a été appliquée ;
+    ``abonner(rappel, Emprunt, Retour)`` le limite à certains types d'événements.
+    """
+
+    def __init__(self):
+        self._abonnes = []  # [(rappel, types ou None pour tous)]
+
+    def abonner(self, rappel, *types):
+        self._abonnes.append((rappel, types or None))
+        return rappel
+
+    def desabonner(self, rappel):
+        self._abonnes = [(abonne, types) for abonne, types in self._abonnes if abonne != rappel]
+
+    def publier(self, evenement: Evenement):
+        for rappel, types in list(self._abonnes):
+            if types is None or isinstance(evenement, types):
+                rappel(evenement)
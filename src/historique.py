@@ -0,0 +1,503 @@
+import atexit
+import csv
+import gzip
+import heapq
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import groupby
+from operator import itemgetter
+
+# L'historique est découpé en partitions mensuelles : data/historique/AAAA-MM.csv.
+# Les mois clos sont compressés (AAAA-MM.csv.gz) ; chaque partition commence par l'entête.
+ENTETE = ["date", "isbn", "id_membre", "action"]
+_NOM_PARTITION = re.compile(r'(\d{4}-\d{2})\.csv(\.gz)?')
+
+
+def normaliser_borne(valeur) -> str:
+    """Convertit une borne (date, datetime ou chaîne) au format des dates de l'historique."""
+    if valeur is None:
+        return None
+    if isinstance(valeur, datetime):
+        return valeur.strftime("%Y-%m-%d %H:%M")
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    return str(valeur)
+
+
+def date_valide(date_evt: str) -> bool:
+    """Vrai si ``date_evt`` est une date ISO lisible ("AAAA-MM-JJ HH:MM") ; les lignes dont
+    la date est tronquée ou illisible sont ignorées par l'analyse, ligne à ligne comme en colonnes."""
+    try:
+        datetime.fromisoformat(date_evt)
+    except ValueError:
+        return False
+    return True
+
+
+def partitions(dossier: str, debut=None, fin=None) -> list:
+    """Chemins des partitions dont le mois recoupe [debut, fin], dans l'ordre chronologique."""
+    debut, fin = normaliser_borne(debut), normaliser_borne(fin)
+    try:
+        noms = os.listdir(dossier)
+    except FileNotFoundError:
+        return []
+
+    trouvees = []
+    for nom in noms:
+        correspondance = _NOM_PARTITION.fullmatch(nom)
+        if correspondance is None:
+            continue
+        mois = correspondance.group(1)
+        if (debut and mois < debut[:7]) or (fin and mois > fin[:7]):
+            continue  # élagage : partition hors de l'intervalle demandé
+        # Pour un même mois, l'archive compressée précède le fichier en cours
+        trouvees.append((mois, correspondance.group(2) is None, os.path.join(dossier, nom)))
+    return [chemin for _, _, chemin in sorted(trouvees)]
+
+
+def _colonnes():
+    """Module historique_colonnes, ou None si NumPy n'est pas installé."""
+    try:
+        import historique_colonnes
+    except ImportError:
+        return None
+    return historique_colonnes
+
+
+def _ouvrir_partition(chemin: str):
+    if chemin.endswith('.gz'):
+        return gzip.open(chemin, 'rb')
+    return open(chemin, 'rb')
+
+
+def lire_partitions(dossier: str, debut=None, fin=None):
+    """Itère sur les tuples (date, isbn, id_membre, action) compris entre debut et fin (inclus)."""
+    debut, fin = normaliser_borne(debut), normaliser_borne(fin)
+    for chemin in partitions(dossier, debut, fin):
+        with _ouvrir_partition(chemin) as f:
+            for ligne in f:
+                parts = ligne.decode('utf-8').strip().split(";")
+                if len(parts) < 4 or parts[0] == "date":  # saute l'entête
+                    continue
+                date_evt = parts[0].strip()
+                if (debut and date_evt < debut) or (fin and date_evt[:len(fin)] > fin):
+                    continue
+                yield date_evt, parts[1].strip(), parts[2].strip(), parts[3].strip().lower()
+
+
+def migrer_fichier_unique(ancien: str, dossier: str) -> bool:
+    """Répartit l'ancien historique.csv dans les partitions mensuelles.
+
+    L'ancien fichier est renommé en ``.migre``. Retourne True si des lignes ont été migrées.
+    """
+    if not os.path.exists(ancien):
+        return False
+    os.makedirs(dossier, exist_ok=True)
+    with open(ancien, 'r', encoding='utf-8') as f:
+        lignes = [parts for parts in (ligne.strip().split(";") for ligne in f)
+                  if len(parts) >= 4 and parts[0] != "date"]
+
+    for mois, groupe in groupby(sorted(lignes, key=lambda p: p[0]), key=lambda p: p[0][:7]):
+        chemin = os.path.join(dossier, f"{mois}.csv")
+        nouveau = not os.path.exists(chemin)
+        with open(chemin, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=';')
+            if nouveau:
+                writer.writerow(ENTETE)
+            writer.writerows(groupe)
+    os.replace(ancien, ancien + '.migre')
+    return bool(lignes)
+
+
+def compresser_mois_clos(dossier: str, aujourd_hui: date = None) -> bool:
+    """Compresse en gzip les partitions des mois antérieurs au mois courant.
+
+    Retourne True si une archive existante a dû être complétée (cas rare : horloge modifiée).
+    """
+    mois_courant = (aujourd_hui or date.today()).strftime("%Y-%m")
+    archive_completee = False
+    for chemin in partitions(dossier):
+        nom = os.path.basename(chemin)
+        if nom.endswith('.gz') or nom[:7] >= mois_courant:
+            continue
+        archive = chemin + '.gz'
+        archive_completee |= os.path.exists(archive)
+        # Mode 'ab' : ajoute un membre gzip, la lecture enchaîne les membres
+        with open(chemin, 'rb') as src, gzip.open(archive, 'ab') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(chemin)
+    return archive_completee
+
+
+class ResultatAnalyse:
+    """Agrégats de l'historique produits par AnalyseHistorique.
+
+    ``top_livres`` / ``top_membres`` : listes (Livre ou Membre, nb_emprunts) ;
+    ``emprunts_par_jour`` / ``retours_par_jour`` : "AAAA-MM-JJ" -> nombre d'événements ;
+    ``emprunts_en_cours`` : isbn -> (id_membre, date du dernier emprunt).
+    """
+
+    def __init__(self, top_livres: list, top_membres: list, emprunts_par_jour: dict,
+                 retours_par_jour: dict, emprunts_en_cours: dict):
+        self.top_livres = top_livres
+        self.top_membres = top_membres
+        self.emprunts_par_jour = emprunts_par_jour
+        self.retours_par_jour = retours_par_jour
+        self.emprunts_en_cours = emprunts_en_cours
+
+    def serie(self, jours, action: str = "emprunt") -> list:
+        """Nombre d'emprunts (ou de retours) pour chacun des ``jours`` (objets date)."""
+        par_jour = self.emprunts_par_jour if action == "emprunt" else self.retours_par_jour
+        return [par_jour.get(jour.isoformat(), 0) for jour in jours]
+
+
+class AnalyseHistorique:
+    """Moteur d'analyse de l'historique : tous les agrégats en un seul passage.
+
+    Chaque événement met à jour les compteurs d'emprunts par ISBN et par membre,
+    les séries quotidiennes d'emprunts et de retours, et les emprunts en cours.
+    L'analyse suit les partitions comme ``tail -f`` : elle mémorise, pour chaque
+    partition, le nombre d'octets déjà analysés et l'identité du fichier, et
+    ``lire_suite`` ne lit que les lignes ajoutées depuis (par cette application ou
+    par un autre processus). Un point de reprise (``data/historique.compteurs``)
+    conserve agrégats et positions d'une exécution à l'autre. Les archives .gz sont
+    immuables et ne sont lues qu'une fois.
+    """
+
+    # Taille (octets) à partir de laquelle un bloc est analysé en colonnes NumPy
+    SEUIL_VECTORISATION = 1 << 20
+    # Lecture en parallèle : volume minimal à relire, taille des plages confiées aux processus
+    SEUIL_PARALLELE = 64 << 20
+    TAILLE_PLAGE = 16 << 20
+
+    def __init__(self):
+        self.par_livre = Counter()
+        self.par_membre = Counter()
+        self.emprunts_par_jour = Counter()
+        self.retours_par_jour = Counter()
+        self.en_cours = {}    # isbn -> (id_membre, date du dernier emprunt)
+        self.positions = {}   # partition -> octets (décompressés) déjà analysés
+        self.identites = {}   # partition -> (inode, taille, date de modification) au dernier passage
+
+    def enregistrer(self, date: str, isbn: str, id_membre: str, action: str):
+        if action == "emprunt":
+            self.par_livre[isbn] += 1
+            self.par_membre[id_membre] += 1
+            self.emprunts_par_jour[date[:10]] += 1
+            self.en_cours[isbn] = (id_membre, date)
+        elif action == "retour":
+            self.retours_par_jour[date[:10]] += 1
+            self._rendu(isbn)
+
+    def _rendu(self, isbn: str):
+        self.en_cours.pop(isbn, None)
+
+    def resultat(self, top_livres: list = None, top_membres: list = None) -> ResultatAnalyse:
+        """Copie des agrégats courants ; les tops (objets Livre / Membre) sont fournis par l'appelant."""
+        return ResultatAnalyse(top_livres or [], top_membres or [], dict(self.emprunts_par_jour),
+                               dict(self.retours_par_jour), dict(self.en_cours))
+
+    @staticmethod
+    def top(compteur: Counter, n: int, existe=None) -> list:
+        """Les n plus grands compteurs, en O(N log n) grâce à un tas ; ``existe`` filtre les clés."""
+        elements = compteur.items() if existe is None else \
+            ((cle, nb) for cle, nb in compteur.items() if existe(cle))
+        return heapq.nlargest(n, elements, key=itemgetter(1))
+
+    # === Lecture des partitions ===
+    def lire_suite(self, dossier: str, processus: int = 1) -> int:
+        """Analyse les lignes ajoutées depuis le dernier passage ; retourne les octets lus.
+
+        Le coût est proportionnel aux nouveaux événements : une partition dont l'identité
+        (inode, taille, date de modification) n'a pas changé n'est pas rouverte. Si une
+        partition a disparu, a été tronquée ou remplacée, l'analyse est reconstruite.
+        Avec ``processus`` > 1 et au moins SEUIL_PARALLELE octets à relire (premier
+        chargement d'un long historique), les partitions sont découpées en plages
+        analysées en parallèle, puis les résultats partiels fusionnés dans l'ordre.
+        """
+        chemins = partitions(dossier)
+        noms = {os.path.basename(chemin) for chemin in chemins}
+        if any(nom not in noms and nom + '.gz' not in noms for nom in self.positions):
+            self.__init__()
+
+        taches = []   # (partition, chemin, position de reprise, taille)
+        for chemin in chemins:
+            nom = os.path.basename(chemin)
+            try:
+                stat = os.stat(chemin)
+            except FileNotFoundError:
+                continue  # partition compressée entre-temps : lue au prochain passage
+            identite = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            connue = self.identites.get(nom)
+            if connue == identite:
+                continue  # inchangée depuis le dernier passage
+            if connue is not None and (connue[0] != identite[0] or (
+                    connue[1] == identite[1] and connue[2] != identite[2])):
+                # Fichier remplacé, ou réécrit sur place à taille égale
+                self.__init__()
+                return self.lire_suite(dossier, processus)
+            if nom.endswith('.gz'):
+                if nom in self.positions:
+                    self.identites[nom] = identite
+                    continue
+                # Partition tout juste compressée : on reprend là où le .csv s'était arrêté
+                debut = self.positions.pop(nom[:-3], 0)
+                self.identites.pop(nom[:-3], None)
+            else:
+                debut = self.positions.get(nom, 0)
+                if stat.st_size < debut:
+                    self.__init__()
+                    return self.lire_suite(dossier, processus)
+            self.identites[nom] = identite
+            taches.append((nom, chemin, debut, stat.st_size))
+
+        a_lire = sum(taille - debut for _, _, debut, taille in taches)
+        if processus > 1 and a_lire >= self.SEUIL_PARALLELE:
+            return self._lire_en_parallele(taches, processus)
+        lus = 0
+        for nom, chemin, debut, _ in taches:
+            nb = self._analyser(chemin, debut)
+            self.positions[nom] = debut + nb
+            lus += nb
+        return lus
+
+    def _lire_en_parallele(self, taches: list, processus: int) -> int:
+        plages = []   # (partition, chemin, début, fin) ; fin None : jusqu'au bout du fichier
+        for nom, chemin, debut, _ in taches:
+            if nom.endswith('.gz'):
+                plages.append((nom, chemin, debut, None))  # une archive ne se découpe pas sans la décompresser
+            else:
+                plages.extend((nom, chemin, a, b) for a, b in _decouper(chemin, debut, self.TAILLE_PLAGE))
+
+        lus = 0
+        with ProcessPoolExecutor(processus) as executeur:
+            resultats = executeur.map(_analyser_plage, *zip(*((chemin, a, b) for _, chemin, a, b in plages)))
+            # map conserve l'ordre des plages : la fusion respecte l'ordre chronologique
+            for (nom, _, debut, _), (partielle, nb) in zip(plages, resultats):
+                self._fusionner_partielle(partielle)
+                self.positions[nom] = debut + nb
+                lus += nb
+        return lus
+
+    def _fusionner_partielle(self, partielle: "_AnalysePartielle"):
+        self.par_livre.update(partielle.par_livre)
+        self.par_membre.update(partielle.par_membre)
+        self.emprunts_par_jour.update(partielle.emprunts_par_jour)
+        self.retours_par_jour.update(partielle.retours_par_jour)
+        for isbn, emprunt in partielle.en_cours.items():
+            if emprunt is None:
+                self.en_cours.pop(isbn, None)
+            else:
+                self.en_cours[isbn] = emprunt
+
+    def _analyser(self, chemin: str, debut: int, fin: int = None) -> int:
+        with _ouvrir_partition(chemin) as f:
+            f.seek(debut)
+            bloc = f.read() if fin is None else f.read(fin - debut)
+        # Une ligne en cours d'écriture (sans '\n') sera lue au prochain passage
+        bloc = bloc[:bloc.rfind(b'\n') + 1]
+        colonnes = _colonnes() if len(bloc) >= self.SEUIL_VECTORISATION else None
+        if colonnes is not None:
+            self.fusionner(colonnes.HistoriqueColonnes.depuis_octets(bloc))
+            return len(bloc)
+        for ligne in bloc.splitlines():
+            parts = ligne.decode('utf-8').strip().split(";")
+            if len(parts) >= 4 and date_valide(parts[0].strip()):  # écarte aussi l'entête
+                self.enregistrer(parts[0].strip(), parts[1].strip(), parts[2].strip(),
+                                 parts[3].strip().lower())
+        return len(bloc)
+
+    def fusionner(self, colonnes):
+        """Ajoute les agrégats d'un bloc HistoriqueColonnes, postérieur aux événements déjà vus."""
+        from historique_colonnes import EMPRUNT, RETOUR
+
+        def non_nuls(categories, nombres):
+            return {cle: nb for cle, nb in zip(categories.tolist(), nombres.tolist()) if nb}
+
+        self.par_livre.update(non_nuls(colonnes.isbns, colonnes.par_isbn(EMPRUNT)))
+        self.par_membre.update(non_nuls(colonnes.membres, colonnes.par_membre(EMPRUNT)))
+        for action, par_jour in ((EMPRUNT, self.emprunts_par_jour), (RETOUR, self.retours_par_jour)):
+            jours, nombres = colonnes.par_jour(action)
+            par_jour.update(dict(zip(jours.astype(str).tolist(), nombres.tolist())))
+        for isbn in colonnes.isbns[colonnes.par_isbn(RETOUR) > 0].tolist():
+            self._rendu(isbn)
+        self.en_cours.update(colonnes.en_cours())  # livres dont le dernier événement est un emprunt
+
+    # === Point de reprise ===
+    @classmethod
+    def charger(cls, dossier: str, chemin_point: str, processus: int = 1) -> "AnalyseHistorique":
+        analyse = cls()
+        try:
+            with open(chemin_point, 'r', encoding='utf-8') as f:
+                point = json.load(f)
+            analyse.par_livre.update(point["livres"])
+            analyse.par_membre.update(point["membres"])
+            analyse.emprunts_par_jour.update(point["emprunts_par_jour"])
+            analyse.retours_par_jour.update(point["retours_par_jour"])
+            analyse.en_cours = {isbn: tuple(valeur) for isbn, valeur in point["en_cours"].items()}
+            analyse.positions = dict(point["positions"])
+            analyse.identites = {nom: tuple(identite) for nom, identite in point["identites"].items()}
+        except (FileNotFoundError, ValueError, KeyError, TypeError, AttributeError):
+            analyse = cls()  # point de reprise absent, ancien ou illisible : relecture complète
+
+        if analyse.lire_suite(dossier, processus):
+            analyse.sauvegarder(chemin_point)
+        return analyse
+
+    def sauvegarder(self, chemin_point: str):
+        os.makedirs(os.path.dirname(chemin_point) or '.', exist_ok=True)
+        temporaire = chemin_point + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump({
+                "positions": self.positions,
+                "identites": self.identites,
+                "livres": self.par_livre,
+                "membres": self.par_membre,
+                "emprunts_par_jour": self.emprunts_par_jour,
+                "retours_par_jour": self.retours_par_jour,
+                "en_cours": self.en_cours,
+            }, f, ensure_ascii=False)
+        os.replace(temporaire, chemin_point)
+
+
+class _AnalysePartielle(AnalyseHistorique):
+    """Analyse d'une plage d'octets : les livres rendus y sont notés (None) pour la fusion."""
+
+    def _rendu(self, isbn: str):
+        self.en_cours[isbn] = None
+
+
+def _decouper(chemin: str, debut: int, taille_plage: int) -> list:
+    """Découpe [debut, taille du fichier[ en plages d'environ taille_plage octets, alignées sur les lignes."""
+    with open(chemin, 'rb') as f:
+        taille = os.fstat(f.fileno()).st_size
+        bornes = [debut]
+        while bornes[-1] + taille_plage < taille:
+            f.seek(bornes[-1] + taille_plage)
+            f.readline()  # avance jusqu'au début de la ligne suivante
+            if f.tell() >= taille:
+                break
+            bornes.append(f.tell())
+    bornes.append(taille)
+    return list(zip(bornes, bornes[1:]))
+
+
+def _analyser_plage(chemin: str, debut: int, fin: int = None):
+    """Exécutée dans un processus de travail : (analyse partielle, octets lus)."""
+    partielle = _AnalysePartielle()
+    return partielle, partielle._analyser(chemin, debut, fin)
+
+
+class EcrivainHistorique:
+    """Écrivain de l'historique gardé ouvert, avec tampon mémoire.
+
+    Les événements sont accumulés puis écrits d'un bloc tous les ``tous_les_n``
+    événements, au plus tard ``delai_ms`` millisecondes après le premier événement
+    en attente, ou lors d'un appel explicite à ``flush()`` (sauvegarde, fermeture).
+    Chaque événement va dans la partition de son mois.
+    """
+    ENTETE = ENTETE
+
+    def __init__(self, dossier: str = 'data/historique', tous_les_n: int = 50, delai_ms: int = 1000):
+        self.dossier = dossier
+        self.tous_les_n = tous_les_n
+        self.delai_ms = delai_ms
+        self._mois = None     # mois de la partition ouverte
+        self._fichier = None
+        self._writer = None
+        self._tampon = []
+        self._minuteur = None
+        self._verrou = threading.Lock()
+        atexit.register(self.flush)
+
+    def ecrire(self, date: str, isbn: str, id_membre: str, action: str):
+        with self._verrou:
+            self._tampon.append((date, isbn, id_membre, action))
+            if len(self._tampon) >= self.tous_les_n:
+                self._vider_tampon()
+            elif self._minuteur is None and self.delai_ms:
+                self._minuteur = threading.Timer(self.delai_ms / 1000, self.flush)
+                self._minuteur.daemon = True
+                self._minuteur.start()
+
+    def flush(self):
+        """Écrit immédiatement les événements en attente."""
+        with self._verrou:
+            self._vider_tampon()
+
+    def fermer(self):
+        """Écrit les événements en attente et ferme la partition ; plus de flush à la sortie."""
+        atexit.unregister(self.flush)
+        self.flush()
+        with self._verrou:
+            self._fermer_partition()
+
+    def _fermer_partition(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+            self._writer = None
+            self._mois = None
+
+    def _ouvrir(self, mois: str):
+        self._fermer_partition()
+        os.makedirs(self.dossier, exist_ok=True)
+        self._fichier = open(os.path.join(self.dossier, f"{mois}.csv"), 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._fichier, delimiter=';')
+        self._mois = mois
+        if os.fstat(self._fichier.fileno()).st_size == 0:
+            self._writer.writerow(self.ENTETE)
+
+    def _vider_tampon(self):
+        # Appelée verrou acquis
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+            self._minuteur = None
+        if not self._tampon:
+            return
+        for mois, lignes in groupby(self._tampon, key=lambda ligne: ligne[0][:7]):
+            if mois != self._mois:
+                self._ouvrir(mois)
+            self._writer.writerows(lignes)
+            self._fichier.flush()
+        self._tampon.clear()
+
+
+if __name__ == "__main__":
+    # python src/historique.py [nb_lignes] [processus] : analyse séquentielle vs parallèle
+    # d'un historique synthétique (réparti sur 60 partitions mensuelles)
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    processus = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as dossier:
+        par_mois = -(-nb // 60)
+        for m in range(60):
+            mois = f"{2020 + m // 12}-{1 + m % 12:02d}"
+            with open(os.path.join(dossier, f"{mois}.csv"), 'w', newline='', encoding='utf-8') as f:
+                f.write(";".join(ENTETE) + "\r\n")
+                f.writelines(
+                    f"{mois}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d};978{i % 20000:010d};"
+                    f"M{i % 3000};{'emprunt' if i % 2 == 0 else 'retour'}\r\n"
+                    for i in range(m * par_mois, min(nb, (m + 1) * par_mois)))
+
+        durees = {}
+        for mode, nb_processus in (("séquentiel", 1), (f"{processus} processus", processus)):
+            analyse = AnalyseHistorique()
+            analyse.SEUIL_PARALLELE = 0
+            debut = time.perf_counter()
+            analyse.lire_suite(dossier, nb_processus)
+            durees[mode] = time.perf_counter() - debut
+            total = sum(analyse.par_livre.values())
+
+        print(f"=== Analyse de l'historique ({nb} lignes, {os.cpu_count()} CPU) ===")
+        for mode, duree in durees.items():
+            print(f"{mode:>12} : {duree:7.2f} s")
+        print(f"Accélération : x{durees['séquentiel'] / duree:.2f} ({total} emprunts comptés)")
@@ -0,0 +1,198 @@
+import sys
+import time
+
+import numpy as np
+
+import historique
+
+# Codes des actions dans la colonne ``actions``
+AUTRE, EMPRUNT, RETOUR = 0, 1, 2
+ENTETE = ";".join(historique.ENTETE) + "\n"
+
+
+class HistoriqueColonnes:
+    """Historique chargé en colonnes NumPy, pour des agrégats vectorisés.
+
+    ``dates`` : datetime64[m] ; ``codes_isbn`` / ``codes_membre`` : indices dans les
+    catégories triées ``isbns`` / ``membres`` ; ``actions`` : AUTRE, EMPRUNT ou RETOUR.
+    Les comptages (par jour, ISBN, membre, genre) se font par ``bincount`` / ``unique``
+    sans boucle Python sur les lignes.
+    """
+
+    def __init__(self, dates, isbns, codes_isbn, membres, codes_membre, actions):
+        self.dates = dates
+        self.isbns = isbns
+        self.codes_isbn = codes_isbn
+        self.membres = membres
+        self.codes_membre = codes_membre
+        self.actions = actions
+
+    def __len__(self):
+        return len(self.dates)
+
+    # === Chargement ===
+    @staticmethod
+    def _encoder(valeurs: list):
+        """Encodage par catégories : (catégories, codes) ; espaces superflus ignorés."""
+        codes = dict.fromkeys(valeurs)
+        for code, valeur in enumerate(codes):
+            codes[valeur] = code
+        indices = np.array(list(map(codes.__getitem__, valeurs)), dtype=np.intp)
+        categories = np.array([valeur.strip() for valeur in codes], dtype=str)
+        # Des valeurs ne différant que par des espaces partagent la même catégorie
+        categories, fusion = np.unique(categories, return_inverse=True)
+        return categories, fusion.ravel()[indices]
+
+    @staticmethod
+    def _date(date: str) -> np.datetime64:
+        """Date au format de la colonne ``dates`` ; NaT si elle est illisible."""
+        if not historique.date_valide(date):
+            return np.datetime64('NaT')
+        try:
+            return np.datetime64(date, 'm')
+        except ValueError:
+            return np.datetime64('NaT')
+
+    @classmethod
+    def depuis_colonnes(cls, dates: list, isbns: list, membres: list, actions: list) -> "HistoriqueColonnes":
+        """Construit les colonnes depuis quatre listes de chaînes de même longueur.
+
+        Les lignes dont la date est illisible (voir ``historique.date_valide``) sont écartées.
+        """
+        try:
+            dates = np.array(dates, dtype='datetime64[m]')
+        except ValueError:
+            # Espaces superflus ou date mal formée : conversion élément par élément
+            dates = np.array([cls._date(date.strip()) for date in dates], dtype='datetime64[m]')
+        invalides = np.isnat(dates)
+        if invalides.any():
+            valides = np.flatnonzero(~invalides).tolist()
+            dates = dates[~invalides]
+            isbns, membres, actions = ([colonne[i] for i in valides] for colonne in (isbns, membres, actions))
+        isbns, codes_isbn = cls._encoder(isbns)
+        membres, codes_membre = cls._encoder(membres)
+        noms_actions, codes_action = cls._encoder(actions)
+        enum = np.array([{"emprunt": EMPRUNT, "retour": RETOUR}.get(nom.lower(), AUTRE)
+                         for nom in noms_actions.tolist()], dtype=np.int8)
+        return cls(dates, isbns, codes_isbn, membres, codes_membre, enum[codes_action])
+
+    @classmethod
+    def depuis_octets(cls, bloc: bytes) -> "HistoriqueColonnes":
+        """Analyse un bloc de lignes complètes ``date;isbn;id_membre;action``."""
+        texte = bloc.decode('utf-8').replace('\r', '').replace(ENTETE, '')  # entêtes des partitions
+        # Un seul découpage pour tout le bloc : les lignes deviennent des champs consécutifs
+        texte = texte.strip('\n')
+        nb_lignes = texte.count('\n') + 1 if texte else 0
+        champs = texte.replace('\n', ';').split(';') if texte else []
+        if len(champs) != 4 * nb_lignes:
+            # Ligne au nombre de champs inattendu : découpage ligne par ligne
+            lignes = [parts for parts in (ligne.split(';') for ligne in texte.split('\n')) if len(parts) >= 4]
+            champs = [champ for parts in lignes for champ in parts[:4]]
+        return cls.depuis_colonnes(champs[0::4], champs[1::4], champs[2::4], champs[3::4])
+
+    @classmethod
+    def depuis_evenements(cls, evenements) -> "HistoriqueColonnes":
+        """Construit les colonnes depuis des tuples (date, isbn, id_membre, action)."""
+        evenements = list(evenements)
+        if not evenements:
+            return cls.depuis_colonnes([], [], [], [])
+        return cls.depuis_colonnes(*(list(colonne) for colonne in zip(*evenements)))
+
+    @classmethod
+    def charger(cls, dossier: str, debut=None, fin=None) -> "HistoriqueColonnes":
+        """Charge les partitions recoupant [debut, fin], puis filtre les dates (inclus)."""
+        blocs = []
+        for chemin in historique.partitions(dossier, debut, fin):
+            with historique._ouvrir_partition(chemin) as f:
+                bloc = f.read()
+            blocs.append(bloc[:bloc.rfind(b'\n') + 1])  # ignore une ligne en cours d'écriture
+        colonnes = cls.depuis_octets(b''.join(blocs))
+        return colonnes.filtrer(debut, fin)
+
+    def filtrer(self, debut=None, fin=None) -> "HistoriqueColonnes":
+        """Sous-ensemble des événements compris entre debut et fin (inclus, à la précision donnée)."""
+        debut, fin = historique.normaliser_borne(debut), historique.normaliser_borne(fin)
+        masque = np.ones(len(self), dtype=bool)
+        if debut:
+            masque &= self.dates >= np.datetime64(debut.replace(' ', 'T'), 'm')
+        if fin:
+            borne = np.datetime64(fin.replace(' ', 'T'))
+            # Fin incluse à sa propre précision : "2024-03" couvre tout le mois de mars
+            masque &= self.dates < (borne + np.timedelta64(1, np.datetime_data(borne.dtype)[0])).astype('datetime64[m]')
+        if masque.all():
+            return self
+        return HistoriqueColonnes(self.dates[masque], self.isbns, self.codes_isbn[masque],
+                                  self.membres, self.codes_membre[masque], self.actions[masque])
+
+    # === Agrégats ===
+    def par_jour(self, action: int = EMPRUNT):
+        """(jours datetime64[D], nombres) des événements ``action``, jours triés."""
+        return np.unique(self.dates[self.actions == action].astype('datetime64[D]'), return_counts=True)
+
+    def par_isbn(self, action: int = EMPRUNT) -> np.ndarray:
+        """Nombre d'événements par ISBN, aligné sur ``isbns``."""
+        return np.bincount(self.codes_isbn[self.actions == action], minlength=len(self.isbns))
+
+    def par_membre(self, action: int = EMPRUNT) -> np.ndarray:
+        """Nombre d'événements par membre, aligné sur ``membres``."""
+        return np.bincount(self.codes_membre[self.actions == action], minlength=len(self.membres))
+
+    def par_genre(self, livres, action: int = EMPRUNT) -> dict:
+        """Nombre d'événements par genre ; ``livres`` : mapping isbn -> Livre (ISBN inconnus ignorés)."""
+        # Une seule recherche par ISBN distinct, puis un bincount sur les codes de genre
+        genres_isbn = [livres[isbn].genre if isbn in livres else "" for isbn in self.isbns.tolist()]
+        genres, codes_genre = np.unique(np.array(genres_isbn, dtype=str), return_inverse=True)
+        nombres = np.bincount(codes_genre.ravel()[self.codes_isbn[self.actions == action]],
+                              minlength=len(genres))
+        return {genre: int(nb) for genre, nb in zip(genres.tolist(), nombres.tolist()) if genre and nb}
+
+    def en_cours(self) -> dict:
+        """isbn -> (id_membre, date) des livres dont le dernier événement est un emprunt."""
+        pertinents = np.flatnonzero(self.actions != AUTRE)
+        # Tri stable par ISBN : l'ordre chronologique du fichier est conservé dans chaque groupe
+        ordre = pertinents[np.argsort(self.codes_isbn[pertinents], kind='stable')]
+        codes = self.codes_isbn[ordre]
+        derniers = ordre[np.append(codes[1:] != codes[:-1], True)] if len(ordre) else ordre
+        derniers = derniers[self.actions[derniers] == EMPRUNT]
+        dates = np.datetime_as_string(self.dates[derniers], unit='m')
+        return {isbn: (id_membre, date.replace('T', ' ')) for isbn, id_membre, date in zip(
+            self.isbns[self.codes_isbn[derniers]].tolist(),
+            self.membres[self.codes_membre[derniers]].tolist(), dates.tolist())}
+
+    @staticmethod
+    def top(categories: np.ndarray, nombres: np.ndarray, n: int) -> list:
+        """Les n plus grands ``nombres`` avec leur catégorie, par ordre décroissant."""
+        n = min(n, np.count_nonzero(nombres))
+        if n <= 0:
+            return []
+        indices = np.argpartition(nombres, -n)[-n:]
+        indices = indices[np.argsort(nombres[indices], kind='stable')[::-1]]
+        return list(zip(categories[indices].tolist(), nombres[indices].tolist()))
+
+
+if __name__ == "__main__":
+    # python src/historique_colonnes.py [nb_lignes] : compare l'analyse ligne à ligne et vectorisée
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lignes = "".join(
+        f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d};978{i % 20000:010d};"
+        f"M{i % 3000};{'emprunt' if i % 2 == 0 else 'retour'}\r\n" for i in range(nb)).encode('utf-8')
+
+    debut = time.perf_counter()
+    analyse = historique.AnalyseHistorique()
+    for ligne in lignes.splitlines():  # boucle de AnalyseHistorique._analyser
+        parts = ligne.decode('utf-8').strip().split(";")
+        if historique.date_valide(parts[0].strip()):
+            analyse.enregistrer(parts[0].strip(), parts[1].strip(), parts[2].strip(), parts[3].strip().lower())
+    duree_python = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    colonnes = HistoriqueColonnes.depuis_octets(lignes)
+    duree_chargement = time.perf_counter() - debut
+    debut = time.perf_counter()
+    colonnes.par_jour(), colonnes.par_isbn(), colonnes.par_membre(), colonnes.en_cours()
+    duree_agregats = time.perf_counter() - debut
+
+    print(f"=== Analyse de l'historique ({nb} lignes) ===")
+    print(f"ligne à ligne        : {duree_python:7.2f} s")
+    print(f"colonnes (chargement): {duree_chargement:7.2f} s")
+    print(f"colonnes (agrégats)  : {1000 * duree_agregats:7.1f} ms")
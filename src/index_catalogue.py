@@ -0,0 +1,206 @@
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from functools import lru_cache
+
+from recherche import normaliser
+
+_AUCUN = frozenset()
+
+
+@lru_cache(maxsize=1 << 16)
+def _cle(valeur: str) -> str:
+    # Auteurs et genres se répètent : chaque valeur n'est normalisée qu'une fois
+    return sys.intern(normaliser(valeur))
+
+
+def categorie_statut(statut: str) -> str:
+    """"disponible" ou "emprunté" (le statut "emprunté:<id_membre>" est ramené à sa catégorie)."""
+    return statut.split(':', 1)[0].strip()
+
+
+class IndexCatalogue:
+    """Index secondaires du catalogue, tenus à jour par Bibliotheque.
+
+    Auteur, genre (clés normalisées, voir ``normaliser``) et catégorie de statut
+    associent chaque valeur à l'ensemble de ses ISBN ; les années forment une liste
+    triée de couples (annee, isbn) pour les intervalles. ``requete`` estime la taille
+    de chaque critère, parcourt le plus sélectif et vérifie les autres par livre.
+    ``disponibles`` et ``genres`` (nombre de livres par genre, tel qu'écrit) se lisent
+    sans parcours du catalogue. ``tranche`` pagine le catalogue dans l'ordre d'une
+    des listes triées (ORDRES).
+    """
+    ORDRES = ("isbn", "annee")
+
+    def __init__(self, livres=()):
+        self.par_auteur = {}   # auteur normalisé -> {isbn}
+        self.par_genre = {}    # genre normalisé -> {isbn}
+        self.par_statut = {}   # "disponible" / "emprunté" -> {isbn}
+        self.annees = []       # [(annee, isbn)] trié
+        self.isbns = []        # ISBN triés
+        self.genres = Counter()  # genre -> nombre de livres
+        self._cles = {}        # isbn -> (auteur, genre, annee, statut, genre tel qu'écrit)
+        for livre in livres:
+            cles = self.cles(livre)
+            self._cles[livre.isbn] = cles
+            self._indexer(livre.isbn, cles)
+            self.annees.append((cles[2], livre.isbn))
+        # Un seul tri pour la construction initiale
+        self.annees.sort()
+        self.isbns = sorted(self._cles)
+
+    def __len__(self):
+        return len(self._cles)
+
+    @property
+    def disponibles(self) -> set:
+        """ISBN des livres disponibles (ensemble tenu à jour, à ne pas modifier)."""
+        return self.par_statut.get("disponible", _AUCUN)
+
+    @staticmethod
+    def cles(livre) -> tuple:
+        return (_cle(livre.auteur), _cle(livre.genre), livre.annee, categorie_statut(livre.statut),
+                livre.genre)
+
+    def _indexer(self, isbn: str, cles: tuple):
+        auteur, genre, _, statut, nom_genre = cles
+        self.genres[nom_genre] += 1
+        self.par_auteur.setdefault(auteur, set()).add(isbn)
+        self.par_genre.setdefault(genre, set()).add(isbn)
+        self.par_statut.setdefault(statut, set()).add(isbn)
+
+    @staticmethod
+    def _retirer(index: dict, valeur: str, isbn: str):
+        isbns = index[valeur]
+        isbns.discard(isbn)
+        if not isbns:
+            del index[valeur]
+
+    # === Mises à jour ===
+    def ajouter(self, livre):
+        if livre.isbn in self._cles:
+            self.supprimer(livre.isbn)
+        cles = self.cles(livre)
+        self._cles[livre.isbn] = cles
+        self._indexer(livre.isbn, cles)
+        insort(self.annees, (cles[2], livre.isbn))
+        insort(self.isbns, livre.isbn)
+
+    def supprimer(self, isbn: str):
+        cles = self._cles.pop(isbn, None)
+        if cles is None:
+            return
+        auteur, genre, annee, statut, nom_genre = cles
+        self.genres[nom_genre] -= 1
+        if not self.genres[nom_genre]:
+            del self.genres[nom_genre]
+        self._retirer(self.par_auteur, auteur, isbn)
+        self._retirer(self.par_genre, genre, isbn)
+        self._retirer(self.par_statut, statut, isbn)
+        del self.annees[bisect_left(self.annees, (annee, isbn))]
+        del self.isbns[bisect_left(self.isbns, isbn)]
+
+    def changer_statut(self, isbn: str, statut: str):
+        """Emprunt ou retour : seul l'index des statuts change."""
+        cles = self._cles[isbn]
+        statut = categorie_statut(statut)
+        if statut != cles[3]:
+            self._retirer(self.par_statut, cles[3], isbn)
+            self.par_statut.setdefault(statut, set()).add(isbn)
+            self._cles[isbn] = cles[:3] + (statut,) + cles[4:]
+
+    # === Requêtes ===
+    def tranche(self, ordre: str, taille: int, apres=None, decalage: int = 0) -> tuple:
+        """(isbns, curseur du dernier, position du premier) : ``taille`` livres dans l'ordre
+        ``ordre``, après le curseur ``apres`` s'il est donné, sinon à partir de ``decalage``.
+
+        Le curseur est la clé de tri du livre (ISBN, ou couple (annee, isbn)) : il reste
+        valable quand des livres sont ajoutés ou supprimés entre deux pages.
+        """
+        if ordre not in self.ORDRES:
+            raise ValueError(f"Ordre de pagination inconnu : {ordre} (possibles : {', '.join(self.ORDRES)})")
+        liste = self.isbns if ordre == "isbn" else self.annees
+        debut = bisect_right(liste, tuple(apres) if ordre == "annee" else apres) if apres is not None \
+            else max(decalage, 0)
+        elements = liste[debut:debut + taille]
+        isbns = elements if ordre == "isbn" else [isbn for _, isbn in elements]
+        return isbns, elements[-1] if elements else None, debut
+
+    def requete(self, auteur: str = None, genre: str = None, annee_min: int = None,
+                annee_max: int = None, disponible: bool = None) -> list:
+        """ISBN des livres satisfaisant tous les critères donnés (None : critère ignoré).
+
+        ``auteur`` et ``genre`` sont comparés sans accents ni casse ; les bornes d'année
+        sont incluses. Sans critère sur les années, l'ordre du résultat n'est pas défini ;
+        quand l'intervalle d'années est le critère le plus sélectif, le résultat est trié par année.
+        """
+        ensembles = []
+        if auteur is not None:
+            ensembles.append(self.par_auteur.get(_cle(auteur), _AUCUN))
+        if genre is not None:
+            ensembles.append(self.par_genre.get(_cle(genre), _AUCUN))
+        if disponible is not None:
+            if disponible:
+                ensembles.append(self.par_statut.get("disponible", _AUCUN))
+            else:
+                ensembles.append(set().union(*(isbns for statut, isbns in self.par_statut.items()
+                                               if statut != "disponible")))
+        intervalle = annee_min is not None or annee_max is not None
+        if intervalle:
+            debut = 0 if annee_min is None else bisect_left(self.annees, (annee_min,))
+            fin = len(self.annees) if annee_max is None else bisect_left(self.annees, (annee_max + 1,))
+            fin = max(debut, fin)
+
+        ensembles.sort(key=len)
+        if intervalle and (not ensembles or fin - debut < len(ensembles[0])):
+            # L'intervalle d'années est le plus sélectif : parcours de la liste triée
+            return [isbn for _, isbn in self.annees[debut:fin]
+                    if all(isbn in isbns for isbns in ensembles)]
+        if not ensembles:
+            return list(self._cles)
+
+        candidats, autres = ensembles[0], ensembles[1:]
+        return [isbn for isbn in candidats
+                if all(isbn in isbns for isbns in autres)
+                and (annee_min is None or self._cles[isbn][2] >= annee_min)
+                and (annee_max is None or self._cles[isbn][2] <= annee_max)]
+
+
+if __name__ == "__main__":
+    # python src/index_catalogue.py [nb_livres] : requêtes indexées contre parcours complet
+    from bibliotheque import Livre
+
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    genres = ["Roman", "Science", "Histoire", "Informatique", "Programmation", "Poésie"]
+    livres = [Livre(f"978{i:010d}", f"Titre {i}", f"Auteur{i % 50000}", 1900 + i % 125, genres[i % 6],
+                    "disponible" if i % 10 else f"emprunté:M{i % 3000}")
+              for i in range(nb)]
+
+    debut = time.perf_counter()
+    index = IndexCatalogue(livres)
+    print(f"=== Index secondaires ({nb} livres) ===")
+    print(f"construction : {time.perf_counter() - debut:7.2f} s")
+    requetes = (
+        {"auteur": "auteur4242"},
+        {"genre": "poesie", "disponible": True},
+        {"annee_min": 2000, "annee_max": 2001},
+        {"auteur": "Auteur4242", "annee_min": 1950},
+        {"genre": "Roman", "annee_min": 1990, "annee_max": 1995, "disponible": False},
+    )
+    for criteres in requetes:
+        debut = time.perf_counter()
+        resultats = index.requete(**criteres)
+        duree_index = time.perf_counter() - debut
+        debut = time.perf_counter()
+        attendus = [livre.isbn for livre in livres
+                    if ("auteur" not in criteres or _cle(livre.auteur) == _cle(criteres["auteur"]))
+                    and ("genre" not in criteres or _cle(livre.genre) == _cle(criteres["genre"]))
+                    and livre.annee >= criteres.get("annee_min", livre.annee)
+                    and livre.annee <= criteres.get("annee_max", livre.annee)
+                    and ("disponible" not in criteres
+                         or (livre.statut == "disponible") == criteres["disponible"])]
+        duree_parcours = time.perf_counter() - debut
+        assert sorted(resultats) == sorted(attendus), criteres
+        print(f"{', '.join(f'{k}={v}' for k, v in criteres.items()):>58} : "
+              f"{1000 * duree_index:8.2f} ms  (parcours {1000 * duree_parcours:8.1f} ms, {len(resultats)} résultats)")
@@ -0,0 +1,59 @@
+import marshal
+import os
+import struct
+
+# Instantané binaire de livres.txt / membres.txt pour un démarrage rapide.
+# Format : entête (signature, version, taille de la charge utile) puis charge marshal
+# contenant ([(isbn, titre, auteur, annee, genre, statut), ...], [(id, nom, (isbn, ...)), ...],
+# [(isbn, id_membre, date), ...]).
+# Les fichiers texte restent le format de référence et d'échange.
+
+SIGNATURE = b'BIBSNAP\0'
+VERSION = 2
+_ENTETE = struct.Struct('<8sHQ')
+
+
+def ecrire(chemin: str, livres: list, membres: list, emprunts: list):
+    """Écrit l'instantané (remplacement atomique)."""
+    charge = marshal.dumps((livres, membres, emprunts))
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'wb') as f:
+        f.write(_ENTETE.pack(SIGNATURE, VERSION, len(charge)))
+        f.write(charge)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+
+
+def lire(chemin: str):
+    """Retourne (livres, membres, emprunts), ou None si le fichier est absent, d'une autre version ou tronqué."""
+    try:
+        with open(chemin, 'rb') as f:
+            donnees = f.read()
+    except FileNotFoundError:
+        return None
+
+    if len(donnees) < _ENTETE.size:
+        return None
+    signature, version, taille = _ENTETE.unpack_from(donnees)
+    if signature != SIGNATURE or version != VERSION or len(donnees) - _ENTETE.size != taille:
+        return None
+    try:
+        return marshal.loads(memoryview(donnees)[_ENTETE.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def est_a_jour(chemin: str, *sources: str) -> bool:
+    """Vrai si l'instantané existe et n'est pas plus ancien que les fichiers sources."""
+    try:
+        date_instantane = os.stat(chemin).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    for source in sources:
+        try:
+            if os.stat(source).st_mtime_ns > date_instantane:
+                return False
+        except FileNotFoundError:
+            continue
+    return True
@@ -0,0 +1,71 @@
+import json
+import os
+from pathlib import Path
+
+
+class Journal:
+    """Journal des modifications en ajout seul.
+
+    Chaque mutation de la bibliothèque y est écrite sur une ligne JSON.
+    Au démarrage, les entrées sont rejouées par-dessus le dernier instantané
+    (livres.txt / membres.txt) ; un compactage réécrit l'instantané et vide le journal.
+    """
+
+    def __init__(self, chemin: str = 'data/journal.log'):
+        self.chemin = Path(chemin)
+        self.nb_entrees = 0
+        self._fichier = None
+
+    def relire(self) -> list:
+        """Retourne les entrées du journal dans leur ordre d'écriture."""
+        entrees = []
+        if not self.chemin.exists():
+            self.nb_entrees = 0
+            return entrees
+
+        fin_valide = 0
+        with open(self.chemin, 'rb') as f:
+            for ligne in f:
+                if not ligne.endswith(b'\n'):
+                    break  # dernière ligne tronquée par un arrêt brutal
+                try:
+                    entrees.append(json.loads(ligne.decode('utf-8')))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                fin_valide += len(ligne)
+
+        # On coupe une éventuelle fin corrompue pour que les ajouts suivants restent lisibles
+        if fin_valide < self.chemin.stat().st_size:
+            with open(self.chemin, 'r+b') as f:
+                f.truncate(fin_valide)
+
+        self.nb_entrees = len(entrees)
+        return entrees
+
+    def ajouter(self, operation: str, **donnees):
+        """Ajoute une entrée à la fin du journal."""
+        if self._fichier is None:
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+            self._fichier = open(self.chemin, 'a', encoding='utf-8')
+        entree = {"op": operation, **donnees}
+        self._fichier.write(json.dumps(entree, ensure_ascii=False) + "\n")
+        self._fichier.flush()
+        self.nb_entrees += 1
+
+    def synchroniser(self):
+        """Force l'écriture physique du journal sur le disque."""
+        if self._fichier is not None:
+            self._fichier.flush()
+            os.fsync(self._fichier.fileno())
+
+    def vider(self):
+        """Tronque le journal (appelé une fois l'instantané réécrit)."""
+        self.fermer()
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        open(self.chemin, 'w', encoding='utf-8').close()
+        self.nb_entrees = 0
+
+    def fermer(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
@@ -2,18 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter.font import Font
 from datetime import datetime
-import csv
-from collections import Counter
-import os
-from pathlib import Path
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
 
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 
-from PIL import Image, ImageTk
+from PIL import ImageTk
 
 
 from bibliotheque import Bibliotheque, Livre, Membre
+from bibliotheque_sqlite import BibliothequeSQLite
+from evenements import (DonneesChargees, Emprunt, LivreAjoute, LivreSupprime, MembreAjoute,
+                         MembreSupprime, Retour)
+from index_catalogue import IndexCatalogue
 from exceptions import * 
 from visualisations import Visualisation
 
@@ -23,22 +25,412 @@ COULEUR_BLEU = "#3498db"
 COULEUR_ACCENT = "#f39c12"
 COULEUR_TEXTE = "#2c3e50"
 COULEUR_FOND = "#f5f7fa"
+# Recherche au fil de la frappe : délai d'inactivité avant filtrage
+DELAI_FILTRE_MS = 150
+# Graphiques des statistiques : intervalle de sondage du thread de travail, taille affichée
+DELAI_SONDAGE_MS = 50
+TAILLE_GRAPHIQUE = (350, 250)
 
 
-class BibliothequeApp(tk.Tk):
+class ModeleListe:
+    """Données d'une ListeVirtuelle : une liste de clés (ISBN, ID...), dont les lignes
+    ne sont construites que pour la fenêtre affichée.
+
+    Les sous-classes fournissent ``ligne(cle)`` (valeurs des colonnes) et
+    ``valeur_tri(cle, colonne)`` ; ``trier`` ordonne toutes les clés, pas seulement
+    les lignes visibles. ``inserer`` / ``retirer`` / ``modifier`` reportent une
+    modification ponctuelle sans reconstruire la liste.
+    """
+
     def __init__(self):
+        self.cles = []
+        self.tri = None  # (colonne, inverse) du dernier tri demandé
+
+    def __len__(self):
+        return len(self.cles)
+
+    def __contains__(self, cle):
+        return cle in self.cles
+
+    def ligne(self, cle) -> tuple:
+        raise NotImplementedError
+
+    def valeur_tri(self, cle, colonne):
+        raise NotImplementedError
+
+    def lignes(self, debut: int, fin: int) -> list:
+        """[(cle, valeurs)] des lignes de rang debut (inclus) à fin (exclu)."""
+        return [(cle, self.ligne(cle)) for cle in self.cles[debut:fin]]
+
+    def trier(self, colonne: str, inverse: bool = False):
+        self.tri = (colonne, inverse)
+        self.cles.sort(key=lambda cle: self.valeur_tri(cle, colonne), reverse=inverse)
+
+    # === Modifications ponctuelles ===
+    def inserer(self, cle):
+        """Place ``cle`` à son rang dans l'ordre du tri courant (dichotomie)."""
+        if self.tri is None:
+            self.cles.append(cle)
+            return
+        colonne, inverse = self.tri
+        valeur = self.valeur_tri(cle, colonne)
+        bas, haut = 0, len(self.cles)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            autre = self.valeur_tri(self.cles[milieu], colonne)
+            if (autre >= valeur) if inverse else (autre <= valeur):
+                bas = milieu + 1
+            else:
+                haut = milieu
+        self.cles.insert(bas, cle)
+
+    def retirer(self, cle):
+        if cle in self.cles:
+            self.cles.remove(cle)
+
+    def modifier(self, cle):
+        """Les valeurs de ``cle`` ont changé : son rang est recalculé si la liste est triée."""
+        if self.tri is not None and cle in self.cles:
+            self.cles.remove(cle)
+            self.inserer(cle)
+
+
+class ModeleLivres(ModeleListe):
+    """Catalogue, ou résultats d'une recherche (``filtrer``).
+
+    Catalogue complet trié par ISBN ou par année : les lignes sont lues page par page
+    dans les index (``Bibliotheque.page_livres``) sans liste de clés ; les autres tris
+    et les recherches utilisent une liste d'ISBN.
+    """
+
+    def __init__(self, biblio):
+        super().__init__()
+        self.biblio = biblio
+        self.cles = None        # None : catalogue complet dans l'ordre d'un index
+        self.resultats = None   # ISBN de la recherche en cours (None : pas de filtre)
+        self._filtre = None     # mêmes ISBN en ensemble, pour __contains__
+        self.tri = ("isbn", False)
+
+    def __len__(self):
+        return len(self.biblio.livres) if self.cles is None else len(self.cles)
+
+    def __contains__(self, isbn):
+        # Pendant une recherche, un livre masqué par le filtre n'est pas dans la liste
+        return isbn in self.biblio.livres and (self._filtre is None or isbn in self._filtre)
+
+    def ligne(self, isbn) -> tuple:
+        livre = self.biblio.livres[isbn]
+        return livre.isbn, livre.titre, livre.auteur, livre.annee, livre.genre, livre.statut
+
+    def valeur_tri(self, isbn, colonne):
+        return getattr(self.biblio.livres[isbn], colonne)
+
+    def lignes(self, debut: int, fin: int) -> list:
+        if self.cles is not None:
+            return super().lignes(debut, fin)
+        ordre, inverse = self.tri
+        if inverse:
+            # Rangs comptés depuis la fin de l'index
+            total = len(self)
+            debut, fin = max(total - fin, 0), total - debut
+        page = self.biblio.page_livres(max(fin - debut, 0), ordre=ordre, decalage=debut)
+        livres = reversed(page.elements) if inverse else page.elements
+        return [(livre.isbn, (livre.isbn, livre.titre, livre.auteur, livre.annee, livre.genre, livre.statut))
+                for livre in livres]
+
+    def filtrer(self, isbns):
+        """Restreint la liste aux ``isbns`` (None : tout le catalogue), en gardant le tri."""
+        self.resultats = isbns
+        self.actualiser()
+
+    def actualiser(self):
+        """Reprend les ajouts / suppressions du catalogue."""
+        colonne, inverse = self.tri
+        if self.resultats is None and colonne in IndexCatalogue.ORDRES:
+            self.cles = self._filtre = None
+            return
+        if self.resultats is None:
+            self.cles = list(self.biblio.livres)
+        else:
+            self.resultats = [isbn for isbn in self.resultats if isbn in self.biblio.livres]
+            self.cles = list(self.resultats)
+        self._filtre = None if self.resultats is None else set(self.resultats)
+        super().trier(colonne, inverse)
+
+    def trier(self, colonne: str, inverse: bool = False):
+        self.tri = (colonne, inverse)
+        self.actualiser()
+
+    def inserer(self, isbn):
+        # Ordre d'un index : déjà à jour ; recherche en cours : le nouveau livre n'y figure pas
+        if self.cles is not None and self.resultats is None:
+            super().inserer(isbn)
+
+    def retirer(self, isbn):
+        if self.resultats is not None and isbn in self._filtre:
+            self.resultats.remove(isbn)
+            self._filtre.discard(isbn)
+        if self.cles is not None:
+            super().retirer(isbn)
+
+    def modifier(self, isbn):
+        if self.cles is not None:
+            super().modifier(isbn)
+
+
+class ModeleMembres(ModeleListe):
+    """Membres : par ID croissant, lus page par page (``Bibliotheque.page_membres``),
+    ou liste d'ID triée sur une autre colonne."""
+
+    def __init__(self, biblio):
+        super().__init__()
+        self.biblio = biblio
+        self.cles = None
+        self.tri = ("id", False)
+
+    def __len__(self):
+        return len(self.biblio.membres) if self.cles is None else len(self.cles)
+
+    def __contains__(self, id_membre):
+        return id_membre in self.biblio.membres
+
+    def ligne(self, id_membre) -> tuple:
+        membre = self.biblio.membres[id_membre]
+        return membre.id, membre.nom, f"{len(membre.livres_empruntes)}/{Membre.MAX_EMPRUNTS}"
+
+    def valeur_tri(self, id_membre, colonne):
+        membre = self.biblio.membres[id_membre]
+        return len(membre.livres_empruntes) if colonne == "emprunts" else getattr(membre, colonne)
+
+    def lignes(self, debut: int, fin: int) -> list:
+        if self.cles is not None:
+            return super().lignes(debut, fin)
+        page = self.biblio.page_membres(max(fin - debut, 0), decalage=debut)
+        return [(membre.id, self.ligne(membre.id)) for membre in page]
+
+    def actualiser(self):
+        colonne, inverse = self.tri
+        if colonne == "id" and not inverse:
+            self.cles = None
+            return
+        self.cles = list(self.biblio.membres)
+        super().trier(colonne, inverse)
+
+    def trier(self, colonne: str, inverse: bool = False):
+        self.tri = (colonne, inverse)
+        self.actualiser()
+
+    def inserer(self, id_membre):
+        if self.cles is not None:
+            super().inserer(id_membre)
+
+    def retirer(self, id_membre):
+        if self.cles is not None:
+            super().retirer(id_membre)
+
+    def modifier(self, id_membre):
+        if self.cles is not None:
+            super().modifier(id_membre)
+
+
+class ModeleEmprunts(ModeleListe):
+    """Emprunts en cours (clé : ISBN), dont le livre et le membre existent."""
+
+    def __init__(self, biblio):
+        super().__init__()
+        self.biblio = biblio
+
+    def __contains__(self, isbn):
+        return isbn in self.biblio.emprunts_actifs
+
+    def ligne(self, isbn) -> tuple:
+        id_membre, date_emprunt = self.biblio.emprunts_actifs[isbn]
+        livre, membre = self.biblio.livres[isbn], self.biblio.membres[id_membre]
+        return (f"{membre.id} - {membre.nom}", f"{livre.isbn} - {livre.titre}",
+                date_emprunt.strftime("%Y-%m-%d %H:%M") if date_emprunt else "")
+
+    def valeur_tri(self, isbn, colonne):
+        id_membre, date_emprunt = self.biblio.emprunts_actifs[isbn]
+        if colonne == "date":
+            return date_emprunt or datetime.min
+        return id_membre if colonne == "membre" else isbn
+
+    def actualiser(self):
+        self.cles = [isbn for isbn, (id_membre, _) in self.biblio.emprunts_actifs.items()
+                     if self._affichable(isbn, id_membre)]
+        if self.tri is not None:
+            self.trier(*self.tri)
+
+    def _affichable(self, isbn, id_membre) -> bool:
+        return isbn in self.biblio.livres and id_membre in self.biblio.membres
+
+    def inserer(self, isbn):
+        if isbn in self.biblio.emprunts_actifs and self._affichable(isbn, self.biblio.emprunts_actifs[isbn][0]):
+            super().inserer(isbn)
+
+
+class ListeVirtuelle(ttk.Frame):
+    """Treeview virtualisée : seules les lignes visibles (plus OVERSCAN) existent dans le widget.
+
+    La barre de défilement est pilotée par la taille du modèle (voir ModeleListe) ;
+    à chaque défilement, les lignes de la nouvelle fenêtre sont demandées au modèle et
+    seules celles qui changent sont insérées, modifiées, déplacées ou retirées. Les lignes
+    ont pour identifiant la clé du modèle ; la sélection et la position de défilement
+    sont conservées d'un rafraîchissement à l'autre.
+    """
+    OVERSCAN = 5
+
+    def __init__(self, parent, modele: ModeleListe, colonnes: tuple, largeur: int = 120):
+        super().__init__(parent)
+        self.modele = modele
+        self.debut = 0
+        self.visibles = 20
+        self._selection = None
+        self._affichees = {}  # clé -> valeurs actuellement affichées
+
+        self.tree = ttk.Treeview(self, columns=colonnes, show='headings', selectmode='browse')
+        for col in colonnes:
+            self.tree.heading(col, text=col.upper(), command=lambda c=col: self.trier(c, False))
+            self.tree.column(col, width=largeur)
+        self.defilement = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.defiler)
+        self.defilement.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.tree.bind('<Configure>', self._redimensionner)
+        self.tree.bind('<<TreeviewSelect>>', self._memoriser_selection)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._molette)
+        for touche, pas, unite in (('<Up>', -1, 'units'), ('<Down>', 1, 'units'),
+                                   ('<Prior>', -1, 'pages'), ('<Next>', 1, 'pages')):
+            self.tree.bind(touche, lambda e, p=pas, u=unite: self._clavier(p, u))
+
+    def selection(self) -> tuple:
+        """Clé de la ligne sélectionnée (même hors de la fenêtre affichée), comme Treeview.selection()."""
+        if self._selection is not None and self._selection not in self.modele:
+            self._selection = None  # ligne supprimée ou masquée par un filtre depuis
+        return (self._selection,) if self._selection is not None else ()
+
+    def appliquer(self, inserees=(), modifiees=(), retirees=()):
+        """Reporte des modifications ponctuelles dans le modèle, puis redessine la fenêtre."""
+        for cle in retirees:
+            self.modele.retirer(cle)
+        for cle in modifiees:
+            self.modele.modifier(cle)
+        for cle in inserees:
+            self.modele.inserer(cle)
+        self.rafraichir()
+
+    def trier(self, colonne: str, inverse: bool):
+        self.modele.trier(colonne, inverse)
+        # Clic suivant sur le même entête : ordre inverse
+        self.tree.heading(colonne, command=lambda: self.trier(colonne, not inverse))
+        self.rafraichir(debut=0)
+
+    # === Défilement ===
+    def defiler(self, action, valeur, unite=None):
+        """Commande de la barre de défilement : ('moveto', fraction) ou ('scroll', n, 'units'|'pages')."""
+        if action == 'moveto':
+            debut = int(float(valeur) * len(self.modele))
+        else:
+            debut = self.debut + int(valeur) * (self.visibles if unite == 'pages' else 1)
+        self.rafraichir(debut)
+
+    def _molette(self, event):
+        pas = -1 if event.num == 4 or event.delta > 0 else 1
+        self.defiler('scroll', 3 * pas, 'units')
+        return 'break'
+
+    def _clavier(self, pas: int, unite: str):
+        rang = self._rang_selection()
+        if rang is None or not len(self.modele):
+            self.defiler('scroll', pas, unite)
+            return 'break'
+        rang += pas * (self.visibles if unite == 'pages' else 1)
+        rang = min(max(rang, 0), len(self.modele) - 1)
+        # Fait défiler juste assez pour que la nouvelle ligne soit visible
+        debut = min(self.debut, rang) if rang < self.debut + self.visibles else rang - self.visibles + 1
+        self.rafraichir(debut)
+        cle = self.tree.get_children()[rang - self.debut]
+        self.tree.selection_set(cle)
+        self.tree.focus(cle)
+        return 'break'
+
+    def _rang_selection(self):
+        if self._selection is None or not self.tree.exists(self._selection):
+            return None
+        return self.debut + self.tree.index(self._selection)
+
+    def _redimensionner(self, event):
+        hauteur_ligne = int(ttk.Style(self).lookup('Treeview', 'rowheight') or 20)
+        visibles = max(1, (event.height - hauteur_ligne) // hauteur_ligne)  # moins l'entête
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self.rafraichir()
+
+    def _memoriser_selection(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self._selection = selection[0]
+
+    # === Rendu ===
+    def rafraichir(self, debut: int = None):
+        """Affiche la fenêtre commençant au rang ``debut`` (par défaut : la fenêtre courante)."""
+        if not self.tree.winfo_exists():
+            return
+        total = len(self.modele)
+        if debut is not None:
+            self.debut = debut
+        self.debut = max(0, min(self.debut, total - self.visibles))
+        lignes = self.modele.lignes(self.debut, min(total, self.debut + self.visibles + self.OVERSCAN))
+
+        cles = {cle for cle, _ in lignes}
+        presentes = self.tree.get_children()
+        anciennes = [cle for cle in presentes if cle not in cles]
+        if anciennes:
+            self.tree.delete(*anciennes)
+        restantes = [cle for cle in presentes if cle in cles]
+        gardees = set(restantes)
+        # Lignes restantes déjà dans le bon ordre (cas d'un défilement) : insertions seules
+        deplacer = restantes != [cle for cle, _ in lignes if cle in gardees]
+        for rang, (cle, valeurs) in enumerate(lignes):
+            if cle in gardees:
+                if valeurs != self._affichees.get(cle):
+                    self.tree.item(cle, values=valeurs)
+                if deplacer:
+                    self.tree.move(cle, '', rang)
+            else:
+                self.tree.insert('', rang, iid=cle, values=valeurs)
+        self._affichees = dict(lignes)
+        if self._selection is not None and self._selection not in self.modele:
+            self._selection = None  # ligne supprimée ou masquée par un filtre
+        if self._selection is not None and self.tree.exists(self._selection):
+            self.tree.selection_set(self._selection)
+        self.tree.yview_moveto(0)
+        if total:
+            self.defilement.set(self.debut / total, min(1.0, (self.debut + self.visibles) / total))
+        else:
+            self.defilement.set(0, 1)
+
+
+class BibliothequeApp(tk.Tk):
+    def __init__(self, sqlite: bool = False, compact: bool = False, paresseux: bool = False):
+        if sqlite and (compact or paresseux):
+            # Le stockage SQLite a son propre chargement : ces modes ne s'y appliquent pas
+            raise ValueError("--sqlite ne se combine ni avec --compact ni avec --paresseux")
         super().__init__()
         self.title("📚 Système de Gestion de Bibliothèque")
         self.geometry("1100x700")
         
-        self.biblio = Bibliotheque()
-        # Création du fichier historique s'il n'existe pas
-        historique_path = Path("data/historique.csv")
-        if not historique_path.exists():
-            historique_path.parent.mkdir(parents=True, exist_ok=True)
-            with historique_path.open("w", encoding="utf-8", newline="") as f:
-                f.write("date;isbn;id_membre;action\n")
-
+        if sqlite:
+            self.biblio = BibliothequeSQLite()
+        else:
+            self.biblio = Bibliotheque(journal=True, compact=compact, paresseux=paresseux)
+        # Les vues affichées suivent les modifications publiées par la bibliothèque
+        self.biblio.evenements.abonner(self._sur_evenement)
+        # Un seul thread pour les graphiques : le rendu matplotlib garde le verrou global
+        # de Python, plusieurs threads ne rendraient pas plus vite et ralentiraient Tk
+        self._executeur_graphiques = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graphiques")
+        self._graphiques_en_cours = {}
         
         self._configurer_interface()
         self._creer_sidebar()
@@ -124,7 +516,12 @@ class BibliothequeApp(tk.Tk):
         widget.bind("<Leave>", leave)
 
     def _fermer_application(self):
-        self._sauvegarder()
+        # Compacte le journal dans livres.txt / membres.txt avant de quitter
+        self._executeur_graphiques.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.biblio.fermer()
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Échec de la sauvegarde : {e}")
         self.destroy()
 
     def _sauvegarder(self):
@@ -135,6 +532,7 @@ class BibliothequeApp(tk.Tk):
             messagebox.showerror("Erreur", f"Échec de la sauvegarde : {e}")
 
     def clear_main_area(self):
+        self._annuler_graphiques()
         for widget in self.main_area.winfo_children():
             widget.destroy()
 
@@ -172,13 +570,15 @@ class BibliothequeApp(tk.Tk):
         cartes_frame.pack(fill=tk.X, padx=20)
 
     # Données
-        livres_count = len(self.biblio.livres)
+        compteurs = self.biblio.compteurs()
+        livres_count = compteurs["total"]
         membres_count = len(self.biblio.membres)
-        emprunts_count = sum(len(m.livres_empruntes) for m in self.biblio.membres.values())
+        emprunts_count = compteurs["empruntes"]
         ratio = emprunts_count / livres_count if livres_count > 0 else 0
 
         stats = [
             ("📚 Livres", livres_count, COULEUR_BLEU),
+            ("✅ Disponibles", compteurs["disponibles"], "#16a085"),
             ("👥 Membres", membres_count, "#27ae60"),
             ("🔖 Emprunts", emprunts_count, COULEUR_ACCENT),
         ]
@@ -198,15 +598,18 @@ class BibliothequeApp(tk.Tk):
         # Chiffre grand et coloré
             chiffre = tk.Label(cadre, text=str(val), font=chiffre_font, bg=COULEUR_CARTES, fg=couleur)
             chiffre.pack(anchor='w', padx=15, pady=(5,10))
+            return chiffre
 
-        for label, val, couleur in stats:
-            creer_carte(cartes_frame, label, val, couleur)
+        self._chiffres_accueil = {}
+        for cle, (label, val, couleur) in zip(("total", "disponibles", "membres", "empruntes"), stats):
+            self._chiffres_accueil[cle] = creer_carte(cartes_frame, label, val, couleur)
 
     # Graphique camembert des emprunts / disponibles
         graphique_frame = ttk.Frame(self.main_area)
         graphique_frame.pack(pady=30, padx=20, fill=tk.BOTH, expand=True)
 
-        fig, ax = plt.subplots(figsize=(4,3), dpi=100)
+        fig = Figure(figsize=(4,3), dpi=100)
+        ax = fig.subplots()
         labels = ['Empruntés', 'Disponibles']
         sizes = [emprunts_count, max(livres_count - emprunts_count, 0)]
         colors = [COULEUR_ACCENT, COULEUR_BLEU]
@@ -257,17 +660,19 @@ class BibliothequeApp(tk.Tk):
         ttk.Label(search_frame, text="Rechercher:").pack(side=tk.LEFT)
         self.search_livre = ttk.Entry(search_frame)
         self.search_livre.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
-        self.search_livre.bind('<KeyRelease>', self._filtrer_livres)
+        self.search_livre.bind('<KeyRelease>', self._planifier_filtre)
+        self.recherche_floue = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Approchée", variable=self.recherche_floue,
+                        command=self._planifier_filtre).pack(side=tk.LEFT)
+        self._filtre_en_attente = None   # identifiant after() du filtrage planifié
+        self._filtre_precedent = None    # (terme, flou) affichés
         self.search_livre.focus_set()  # focus automatique
         
         colonnes = ('isbn', 'titre', 'auteur', 'annee', 'genre', 'statut')
-        self.tree_livres = ttk.Treeview(self.main_area, columns=colonnes, show='headings')
-        
-        for col in colonnes:
-            self.tree_livres.heading(col, text=col.upper(), command=lambda c=col: self._tri_treeview(self.tree_livres, c, False))
-            self.tree_livres.column(col, width=120)
-        
-        self.tree_livres.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.modele_livres = ModeleLivres(self.biblio)
+        self.liste_livres = ListeVirtuelle(self.main_area, self.modele_livres, colonnes)
+        self.liste_livres.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.tree_livres = self.liste_livres.tree
         
         form_frame = ttk.LabelFrame(self.main_area, text="Ajouter un nouveau livre")
         form_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -292,42 +697,30 @@ class BibliothequeApp(tk.Tk):
         
         self._actualiser_liste_livres()
 
-    def _tri_treeview(self, tree, col, reverse):
-        # Trie la Treeview par la colonne donnée
-        data = [(tree.set(k, col), k) for k in tree.get_children('')]
-        
-        # Essaye de convertir en int pour trier numériquement si possible
-        try:
-            data = [(int(item[0]), item[1]) for item in data]
-        except Exception:
-            pass
-        
-        data.sort(reverse=reverse)
-        
-        for index, (val, k) in enumerate(data):
-            tree.move(k, '', index)
-        
-        # Change le callback pour inverser le tri au clic suivant
-        tree.heading(col, command=lambda: self._tri_treeview(tree, col, not reverse))
-
     def _actualiser_liste_livres(self):
-        self.tree_livres.delete(*self.tree_livres.get_children())
-        for livre in self.biblio.livres.values():
-            self.tree_livres.insert('', 'end', values=(
-                livre.isbn, livre.titre, livre.auteur, 
-                livre.annee, livre.genre, livre.statut))
+        self.modele_livres.actualiser()
+        self.liste_livres.rafraichir()
+
+    def _planifier_filtre(self, event=None):
+        # Filtre après une courte pause de frappe ; chaque touche annule le filtrage en attente
+        if self._filtre_en_attente is not None:
+            self.after_cancel(self._filtre_en_attente)
+        self._filtre_en_attente = self.after(DELAI_FILTRE_MS, self._filtrer_livres)
 
     def _filtrer_livres(self, event=None):
-        terme = self.search_livre.get().lower()
-        self.tree_livres.delete(*self.tree_livres.get_children())
-        
-        for livre in self.biblio.livres.values():
-            if (terme in livre.isbn.lower() or 
-                terme in livre.titre.lower() or 
-                terme in livre.auteur.lower()):
-                self.tree_livres.insert('', 'end', values=(
-                    livre.isbn, livre.titre, livre.auteur, 
-                    livre.annee, livre.genre, livre.statut))
+        self._filtre_en_attente = None
+        if not self.tree_livres.winfo_exists():
+            return
+        terme = self.search_livre.get().strip()
+        flou = self.recherche_floue.get()
+        if self._filtre_precedent == (terme, flou):
+            return
+        self._filtre_precedent = (terme, flou)
+
+        # Seule la fenêtre visible est redessinée, quel que soit le nombre de résultats
+        self.modele_livres.filtrer([livre.isbn for livre in self.biblio.rechercher(
+            terme, champs=("isbn", "titre", "auteur"), flou=flou)] if terme else None)
+        self.liste_livres.rafraichir(debut=0)
 
     def _ajouter_livre(self):
         try:
@@ -345,7 +738,6 @@ class BibliothequeApp(tk.Tk):
             )
             
             self.biblio.ajouter_livre(livre)
-            self._actualiser_liste_livres()
             self._sauvegarder() 
             
             for entry in self.entries_livre.values():
@@ -361,18 +753,17 @@ class BibliothequeApp(tk.Tk):
             messagebox.showerror("Erreur", f"Impossible d'ajouter le livre : {e}")
 
     def _supprimer_livre(self):
-        selection = self.tree_livres.selection()
+        selection = self.liste_livres.selection()
         if not selection:
             messagebox.showwarning("Avertissement", "Veuillez sélectionner un livre")
             return
             
-        isbn = str(self.tree_livres.item(selection[0])['values'][0]).strip()
+        isbn = selection[0]
 
         
         try:
             # Utilise ta méthode métier ici (plus sûr)
             self.biblio.supprimer_livre(isbn)
-            self._actualiser_liste_livres()
             self._sauvegarder() 
             messagebox.showinfo("Succès", "Livre supprimé avec succès")
         except Exception as e:
@@ -387,13 +778,10 @@ class BibliothequeApp(tk.Tk):
                  font=('Segoe UI', 14, 'bold')).pack(pady=10)
         
         colonnes = ('id', 'nom', 'emprunts')
-        self.tree_membres = ttk.Treeview(self.main_area, columns=colonnes, show='headings')
-        
-        for col in colonnes:
-            self.tree_membres.heading(col, text=col.upper(), command=lambda c=col: self._tri_treeview(self.tree_membres, c, False))
-            self.tree_membres.column(col, width=120)
-        
-        self.tree_membres.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.modele_membres = ModeleMembres(self.biblio)
+        self.liste_membres = ListeVirtuelle(self.main_area, self.modele_membres, colonnes)
+        self.liste_membres.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.tree_membres = self.liste_membres.tree
         
         form_frame = ttk.LabelFrame(self.main_area, text="Ajouter un nouveau membre")
         form_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -421,11 +809,8 @@ class BibliothequeApp(tk.Tk):
         self.entry_membre_id.focus_set()
 
     def _actualiser_liste_membres(self):
-        self.tree_membres.delete(*self.tree_membres.get_children())
-        for membre in self.biblio.membres.values():
-            nb_emprunts = len(membre.livres_empruntes)
-            self.tree_membres.insert('', 'end', values=(
-                membre.id, membre.nom, f"{nb_emprunts}/{Membre.MAX_EMPRUNTS}"))
+        self.modele_membres.actualiser()
+        self.liste_membres.rafraichir()
 
     def _ajouter_membre(self):
         try:
@@ -440,7 +825,6 @@ class BibliothequeApp(tk.Tk):
             )
             
             self.biblio.enregistrer_membre(membre)
-            self._actualiser_liste_membres()
             self._sauvegarder() 
             
             self.entry_membre_id.delete(0, tk.END)
@@ -455,17 +839,16 @@ class BibliothequeApp(tk.Tk):
             messagebox.showerror("Erreur", f"Impossible d'ajouter le membre : {e}")
 
     def _supprimer_membre(self):
-        selection = self.tree_membres.selection()
+        selection = self.liste_membres.selection()
         if not selection:
             messagebox.showwarning("Avertissement", "Veuillez sélectionner un membre")
             return
             
-        id_membre = str(self.tree_membres.item(selection[0])['values'][0]).strip()
+        id_membre = selection[0]
 
         
         try:
             self.biblio.supprimer_membre(id_membre)
-            self._actualiser_liste_membres()
             self._sauvegarder() 
             messagebox.showinfo("Succès", "Membre supprimé avec succès")
         except Exception as e:
@@ -480,13 +863,10 @@ class BibliothequeApp(tk.Tk):
                  font=('Segoe UI', 14, 'bold')).pack(pady=10)
         
         colonnes = ('membre', 'livre', 'date')
-        self.tree_emprunts = ttk.Treeview(self.main_area, columns=colonnes, show='headings')
-        
-        for col in colonnes:
-            self.tree_emprunts.heading(col, text=col.upper())
-            self.tree_emprunts.column(col, width=150)
-        
-        self.tree_emprunts.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.modele_emprunts = ModeleEmprunts(self.biblio)
+        self.liste_emprunts = ListeVirtuelle(self.main_area, self.modele_emprunts, colonnes, largeur=150)
+        self.liste_emprunts.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.tree_emprunts = self.liste_emprunts.tree
         
         form_frame = ttk.LabelFrame(self.main_area, text="Actions")
         form_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -517,6 +897,58 @@ class BibliothequeApp(tk.Tk):
         self._actualiser_liste_emprunts()
         self._actualiser_comboboxes()
     
+    def _sur_evenement(self, evenement):
+        """Abonné au bus de la bibliothèque : seules les lignes concernées des vues
+        affichées sont mises à jour, quelle que soit l'action à l'origine du changement
+        (un membre supprimé publie aussi le Retour de chacun de ses livres)."""
+        if isinstance(evenement, LivreAjoute):
+            self._appliquer('liste_livres', inserees=[evenement.isbn])
+            self._option_livre_disponible(evenement.isbn, True)
+        elif isinstance(evenement, LivreSupprime):
+            self._appliquer('liste_livres', retirees=[evenement.isbn])
+            self._option_livre_disponible(evenement.isbn, False)
+        elif isinstance(evenement, (Emprunt, Retour)):
+            emprunt = isinstance(evenement, Emprunt)
+            self._appliquer('liste_emprunts', inserees=[evenement.isbn] if emprunt else (),
+                            retirees=() if emprunt else [evenement.isbn])
+            self._appliquer('liste_membres', modifiees=[evenement.id_membre])
+            self._appliquer('liste_livres', modifiees=[evenement.isbn])
+            self._option_livre_disponible(evenement.isbn, not emprunt)
+        elif isinstance(evenement, (MembreAjoute, MembreSupprime)):
+            self._appliquer('liste_membres', inserees=[evenement.id_membre]
+                            if isinstance(evenement, MembreAjoute) else (),
+                            retirees=[evenement.id_membre]
+                            if isinstance(evenement, MembreSupprime) else ())
+            if self._existe('combo_membres'):
+                self._actualiser_combo_membres()
+        elif isinstance(evenement, DonneesChargees):
+            for nom, actualiser in (('liste_livres', self._actualiser_liste_livres),
+                                    ('liste_membres', self._actualiser_liste_membres),
+                                    ('liste_emprunts', self._actualiser_liste_emprunts),
+                                    ('combo_livres', self._actualiser_comboboxes)):
+                if self._existe(nom):
+                    actualiser()
+        self._actualiser_chiffres_accueil()
+
+    def _existe(self, nom: str) -> bool:
+        """Le widget ``nom`` est-il affiché ? (ceux des autres onglets sont détruits par clear_main_area)"""
+        widget = getattr(self, nom, None)
+        return widget is not None and widget.winfo_exists()
+
+    def _actualiser_chiffres_accueil(self):
+        chiffres = getattr(self, '_chiffres_accueil', None)
+        if not chiffres or not chiffres["total"].winfo_exists():
+            return
+        valeurs = dict(self.biblio.compteurs(), membres=len(self.biblio.membres))
+        for cle, label in chiffres.items():
+            label.config(text=str(valeurs[cle]))
+
+    def _appliquer(self, nom: str, inserees=(), modifiees=(), retirees=()):
+        """Reporte des modifications ponctuelles dans la ListeVirtuelle ``nom``, si son onglet
+        est affiché (les widgets des autres onglets sont détruits par clear_main_area)."""
+        if self._existe(nom):
+            getattr(self, nom).appliquer(inserees, modifiees, retirees)
+
     def _actualiser_si_existe(self, nom_methode: str):
         """Appelle une méthode d'actualisation uniquement si elle existe déjà."""
         meth = getattr(self, nom_methode, None)
@@ -538,17 +970,16 @@ class BibliothequeApp(tk.Tk):
         - Bibliotheque.retourner_livre(isbn)
         - Bibliotheque.retourner_livre(isbn, id_membre)
         """
-        selection = self.tree_emprunts.selection()
+        selection = self.liste_emprunts.selection()
         if not selection:
             messagebox.showwarning(
                 "Avertissement",
                 "Veuillez sélectionner un emprunt à retourner")
             return
 
-        # Décompose la ligne sélectionnée
-        values = self.tree_emprunts.item(selection[0])['values']
-        id_membre  = values[0].split(" - ")[0].strip()
-        isbn_livre = values[1].split(" - ")[0].strip()
+        # Les lignes ont pour identifiant l'ISBN du livre emprunté
+        isbn_livre = selection[0]
+        id_membre = self.biblio.emprunts_actifs[isbn_livre][0]
 
         try:
             # Calcule combien de paramètres attend la méthode métier
@@ -565,13 +996,7 @@ class BibliothequeApp(tk.Tk):
                 # Signature (self, isbn, id_membre)
                 meth(isbn_livre, id_membre)
 
-            # Rafraîchit les vues (protégé pour éviter les AttributeError)
-            self._actualiser_liste_emprunts()
-            if hasattr(self, 'tree_membres'):
-                self._actualiser_liste_membres()
-            if hasattr(self, 'tree_livres'):
-                self._actualiser_liste_livres()
-            self._actualiser_comboboxes()
+            # Les vues affichées sont mises à jour par _sur_evenement (événement Retour)
             self._sauvegarder()
 
             self.afficher_notification("✅ Livre retourné avec succès", couleur="#27ae60")
@@ -583,59 +1008,54 @@ class BibliothequeApp(tk.Tk):
 
     def _actualiser_liste_emprunts(self):
         """Recharge le tableau des emprunts avec **uniquement** les livres encore non disponibles."""
+        # Index des emprunts en cours (pas de relecture de l'historique) ; seules les
+        # lignes visibles sont construites
+        self.modele_emprunts.actualiser()
+        self.liste_emprunts.rafraichir()
 
-    # 1) On vide d'abord le Treeview
-        self.tree_emprunts.delete(*self.tree_emprunts.get_children())
-        emprunts_actuels = {}
-    # 2) Parcours du fichier historique pour conserver la date d'emprunt,
-    #    mais on n'affiche la ligne que si le livre est encore emprunté
-        try:
-            with open('data/historique.csv', 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=';')
-                next(reader, None)  # saute l'entête
-
-
-                for row in reader:
-                    if len(row) >= 4:
-                        date_str, isbn, id_membre, action = row
-                        action = action.strip().lower()
-
-                        if action == "emprunt":
-                            emprunts_actuels[isbn] = (id_membre, date_str)
-                        elif action == "retour" and isbn in emprunts_actuels:
-                            del emprunts_actuels[isbn]  # livre retourné => supprimer de la liste
-
-
-                
-            for isbn, (id_membre, date_str) in emprunts_actuels.items():
-                livre = self.biblio.livres.get(isbn)
-                membre = self.biblio.membres.get(id_membre)
-
-                if livre and membre:
-                    self.tree_emprunts.insert('', 'end', values=(
-                        f"{membre.id} - {membre.nom}",
-                        f"{livre.isbn} - {livre.titre}",
-                        date_str
-                    ))
-
-        except FileNotFoundError:
-            pass
-
-    def _actualiser_comboboxes(self):
+    def _actualiser_combo_membres(self):
         membres = [f"{m.id} - {m.nom}" for m in self.biblio.membres.values()]
         self.combo_membres['values'] = membres
-        if membres:
+        if membres and self.combo_membres.get() not in membres:
             self.combo_membres.current(0)
-        
-        livres_dispo = [
-            f"{l.isbn} - {l.titre}" 
-            for l in self.biblio.livres.values() 
-            if l.statut == "disponible"
+        elif not membres:
+            self.combo_membres.set('')
+
+    def _actualiser_comboboxes(self):
+        self._actualiser_combo_membres()
+
+        # Ensemble des disponibles tenu à jour : seuls ces livres sont lus
+        self._options_livres = [
+            f"{isbn} - {self.biblio.livres[isbn].titre}"
+            for isbn in sorted(self.biblio.isbns_disponibles())
         ]
-        self.combo_livres['values'] = livres_dispo
-        if livres_dispo:
+        self.combo_livres['values'] = self._options_livres
+        if self._options_livres:
             self.combo_livres.current(0)
 
+    def _option_livre_disponible(self, isbn: str, disponible: bool):
+        """Ajoute ou retire un livre des choix d'emprunt, sans relire les autres livres."""
+        if not self._existe('combo_livres'):
+            return
+        # Les options commencent par l'ISBN : l'ordre des chaînes suit celui des ISBN, et
+        # l'option d'un livre se retrouve sans son titre (livre supprimé)
+        prefixe = f"{isbn} - "
+        rang = bisect_left(self._options_livres, prefixe)
+        present = rang < len(self._options_livres) and self._options_livres[rang].startswith(prefixe)
+        if disponible and not present:
+            option = prefixe + self.biblio.livres[isbn].titre
+            self._options_livres.insert(rang, option)
+        elif not disponible and present:
+            option = self._options_livres.pop(rang)
+        else:
+            return
+        self.combo_livres['values'] = self._options_livres
+        if not self._options_livres:
+            self.combo_livres.set('')
+        elif self.combo_livres.get() == option and not disponible or not self.combo_livres.get():
+            # Le livre choisi vient d'être emprunté (ou aucun choix) : on propose son voisin
+            self.combo_livres.current(min(rang, len(self._options_livres) - 1))
+
     def _emprunter_livre(self):
         membre_str = self.combo_membres.get()
         livre_str = self.combo_livres.get()
@@ -653,10 +1073,6 @@ class BibliothequeApp(tk.Tk):
         try:
 
             self.biblio.emprunter_livre(isbn_livre, id_membre)
-            self._actualiser_liste_emprunts()
-            self._actualiser_comboboxes()
-            self._actualiser_liste_membres()
-            self._actualiser_liste_livres()
             self._sauvegarder() 
             self.afficher_notification("✅ Livre emprunté avec succès", couleur="#27ae60")
 
@@ -672,7 +1088,15 @@ class BibliothequeApp(tk.Tk):
 
     # --- Statistiques ---
     def afficher_statistiques(self):
-        """Affiche les graphiques générés par Visualisation sans fermer l'app en cas d'erreur."""
+        """Affiche les graphiques générés par Visualisation sans bloquer la fenêtre.
+
+        Les cadres s'affichent tout de suite avec un espace réservé ; chaque graphique
+        est rendu en mémoire à sa taille d'affichage par le thread de travail (ou repris
+        du cache de Visualisation si ses données n'ont pas changé), puis remplace son
+        espace réservé dès qu'il est prêt (sondage par after()). Le thread de travail ne
+        reçoit que des copies : le catalogue n'est lu que dans le thread Tk.
+        Changer d'onglet abandonne les graphiques pas encore rendus.
+        """
         self.clear_main_area()
 
         ttk.Label(
@@ -681,63 +1105,80 @@ class BibliothequeApp(tk.Tk):
             font=("Segoe UI", 14, "bold"),
         ).pack(pady=15)
 
-        # 1) Génération des graphiques --------------------------------------------------------
+        # 1) Tâches : graphiques du catalogue déjà en cache pour cette version, repris tels
+        #    quels ; s'il en manque un, les livres sont copiés ici, dans le thread Tk, seul à
+        #    accéder au catalogue (CatalogueParesseux n'est pas utilisable depuis un autre thread)
+        version = self.biblio.version_catalogue
+        en_cache = {nom: Visualisation.en_cache(nom, TAILLE_GRAPHIQUE, version)
+                    for nom in Visualisation.DEPEND_DU_CATALOGUE}
         try:
-            chemins = Visualisation.generer_tous_graphiques(
-                livres=list(self.biblio.livres.values()),
-                historique_path="data/historique.csv",
+            taches = Visualisation.taches(
+                livres=() if all(en_cache.values()) else self.biblio.livres.values(),
+                historique_path="data/historique",
+                analyse=self.biblio.analyser_historique(),
             )
         except Exception as e:
             print("Erreur dans les statistiques :", e)
             messagebox.showerror("Erreur", f"Impossible de générer les statistiques : {e}")
             return  # on quitte proprement l'onglet, l'app reste ouverte
 
-        # 2) Mise en page --------------------------------------------------------------------
+        # 2) Mise en page et espaces réservés -------------------------------------------------
         frame_stats = ttk.LabelFrame(self.main_area, text="Visualisation des Données")
         frame_stats.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
 
-        images_refs: list[ImageTk.PhotoImage] = []  # pour éviter le garbage‑collection
+        self._images_refs = []  # PhotoImage affichées, pour éviter le garbage‑collection
         container = ttk.Frame(frame_stats)
         container.pack(fill=tk.BOTH, expand=True)
         cols = 2
 
-        # 3) Boucle d'affichage ---------------------------------------------------------------
-        for i, (titre, chemin) in enumerate(chemins.items()):
+        # 3) Un graphique par tâche confiée au thread de travail -------------------------------
+        for i, (titre, donnees) in enumerate(taches.items()):
             bloc = ttk.Frame(container)
             bloc.grid(row=i // cols, column=i % cols, padx=15, pady=10, sticky="nsew")
 
-            if not os.path.exists(chemin):
-                ttk.Label(
-                    bloc,
-                    text=f"{titre} : fichier manquant",
-                    foreground="red",
-                ).pack()
-                continue
-
-            # Essaye d'ouvrir l'image et passe à la suivante en cas d'échec
-            try:
-                img = Image.open(chemin)
-            except Exception as e:
-                ttk.Label(
-                    bloc,
-                    text=f"Impossible d'ouvrir : {chemin}\n{e}",
-                    foreground="red",
-                ).pack()
-                continue
-
-            # Redimensionne, convertit et affiche
-            img = img.resize((350, 250), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
-            images_refs.append(photo)
-
             ttk.Label(bloc, text=titre.upper(), font=("Segoe UI", 10, "bold")).pack(pady=5)
-            ttk.Label(bloc, image=photo).pack()
+            cadre = ttk.Frame(bloc, width=TAILLE_GRAPHIQUE[0], height=TAILLE_GRAPHIQUE[1])
+            cadre.pack_propagate(False)
+            cadre.pack()
+            emplacement = ttk.Label(cadre, text="⏳ Génération du graphique…", anchor="center")
+            emplacement.pack(expand=True, fill=tk.BOTH)
+
+            if en_cache.get(titre) is not None:
+                futur = Future()  # déjà rendu : placé au premier sondage
+                futur.set_result(en_cache[titre])
+            else:
+                futur = self._executeur_graphiques.submit(Visualisation.rendre, titre, donnees,
+                                                          TAILLE_GRAPHIQUE, version)
+            self._graphiques_en_cours[futur] = emplacement
 
         # 4) Colonnage flexible --------------------------------------------------------------
         for col in range(cols):
             container.columnconfigure(col, weight=1)
 
-        self._images_refs = images_refs  # garde les références vivantes
+        self.after(DELAI_SONDAGE_MS, self._sonder_graphiques, self._graphiques_en_cours)
+
+    def _sonder_graphiques(self, en_cours: dict):
+        """Place les graphiques terminés ; se reprogramme tant qu'il en reste."""
+        if en_cours is not self._graphiques_en_cours:
+            return  # onglet quitté ou réaffiché : ces graphiques sont abandonnés
+        for futur in [futur for futur in en_cours if futur.done()]:
+            emplacement = en_cours.pop(futur)
+            try:
+                photo = ImageTk.PhotoImage(futur.result())
+            except Exception as e:
+                emplacement.config(text=f"Impossible de générer le graphique :\n{e}", foreground="red")
+                continue
+            self._images_refs.append(photo)
+            emplacement.config(image=photo, text="")
+        if en_cours:
+            self.after(DELAI_SONDAGE_MS, self._sonder_graphiques, en_cours)
+
+    def _annuler_graphiques(self):
+        """Abandonne les graphiques en attente (celui en cours de rendu sera ignoré)."""
+        for futur in self._graphiques_en_cours:
+            futur.cancel()
+        self._graphiques_en_cours = {}
+
     def afficher_notification(self, texte, couleur="#27ae60"):
         """Affiche un message temporaire dans le pied de page."""
         if hasattr(self, 'footer_message'):
@@ -746,5 +1187,10 @@ class BibliothequeApp(tk.Tk):
         self.footer_message.pack(side=tk.BOTTOM, pady=5)
         self.after(4000, self.footer_message.destroy)
 if __name__ == "__main__":
-    app = BibliothequeApp()
+    import sys
+    try:
+        app = BibliothequeApp(sqlite="--sqlite" in sys.argv, compact="--compact" in sys.argv,
+                              paresseux="--paresseux" in sys.argv)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
     app.mainloop()
@@ -0,0 +1,289 @@
+import re
+import sys
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+
+_SEPARATEURS = re.compile(r'[\W_]+')
+# Ligatures que NFKD ne décompose pas
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ø': 'o', 'ł': 'l', 'đ': 'd'})
+
+
+def normaliser(texte: str) -> str:
+    """Clé de recherche : décomposition NFKD, accents retirés, casefold, ponctuation réduite à un espace.
+
+    Ex. "L'Énigme Quantique" -> "l enigme quantique", "Saint-Exupéry" -> "saint exupery".
+    """
+    if not texte.isascii():
+        decompose = unicodedata.normalize('NFKD', texte)
+        texte = ''.join(c for c in decompose if not unicodedata.combining(c)).casefold().translate(_LIGATURES)
+    else:
+        texte = texte.lower()  # équivalent à casefold pour l'ASCII, bien plus rapide
+    return _SEPARATEURS.sub(' ', texte).strip()
+
+
+@lru_cache(maxsize=1 << 18)
+def _jetons_mot(mot: str) -> tuple:
+    # Les mots se répètent d'un titre à l'autre : chacun n'est normalisé qu'une fois
+    return tuple(sys.intern(jeton) for jeton in normaliser(mot).split())
+
+
+def jetons(texte: str) -> list:
+    """Mots normalisés d'un texte (voir normaliser), partagés en mémoire (``sys.intern``)."""
+    return [jeton for mot in texte.split() for jeton in _jetons_mot(mot)]
+
+
+def trigrammes(mot: str) -> set:
+    return {mot[i:i + 3] for i in range(len(mot) - 2)}
+
+
+def distance_edition(a: str, b: str, maximum: int) -> int:
+    """Distance d'édition (Levenshtein, inversion de deux lettres voisines comptée pour une)
+    entre a et b, ou maximum + 1 dès qu'elle le dépasse."""
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    avant_precedente, precedente = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        courante = [i]
+        for j, cb in enumerate(b, 1):
+            cout = min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cout = min(cout, avant_precedente[j - 2] + 1)
+            courante.append(cout)
+        if min(courante) > maximum:
+            return maximum + 1  # toute la ligne dépasse déjà le seuil
+        avant_precedente, precedente = precedente, courante
+    return precedente[-1]
+
+
+def tolerance(mot: str) -> int:
+    """Nombre d'erreurs admises en recherche approchée selon la longueur du mot."""
+    return 0 if len(mot) < 4 else 1 if len(mot) < 9 else 2
+
+
+class _IndexChamp:
+    """Index inversé d'un champ : mot -> identifiants des livres, trigramme -> mots.
+
+    Les trigrammes portent sur le vocabulaire (bien plus petit que le catalogue) :
+    une recherche par sous-chaîne retrouve d'abord les mots candidats, puis les livres.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.trigrammes = {}
+        self.par_longueur = {}   # longueur -> mots, pour la recherche approchée des mots courts
+
+    def ajouter(self, identifiant: int, mots: tuple):
+        for mot in mots:
+            livres = self.postings.get(mot)
+            if livres is None:
+                livres = self.postings[mot] = set()
+                self.par_longueur.setdefault(len(mot), set()).add(mot)
+                for trigramme in trigrammes(mot):
+                    self.trigrammes.setdefault(trigramme, set()).add(mot)
+            livres.add(identifiant)
+
+    def supprimer(self, identifiant: int, mots: tuple):
+        for mot in mots:
+            livres = self.postings.get(mot)
+            if livres is None:
+                continue
+            livres.discard(identifiant)
+            if not livres:
+                del self.postings[mot]
+                self.par_longueur[len(mot)].discard(mot)
+                for trigramme in trigrammes(mot):
+                    mots_trigramme = self.trigrammes[trigramme]
+                    mots_trigramme.discard(mot)
+                    if not mots_trigramme:
+                        del self.trigrammes[trigramme]
+
+    def mots_contenant(self, fragment: str) -> list:
+        """Mots du vocabulaire dont ``fragment`` est une sous-chaîne."""
+        if len(fragment) < 3:
+            return [mot for mot in self.postings if fragment in mot]
+        candidats = sorted((self.trigrammes.get(t, ()) for t in trigrammes(fragment)), key=len)
+        if not candidats[0]:
+            return []
+        # Intersection en partant de la plus petite liste ; les trigrammes ne garantissent
+        # pas l'ordre, d'où la vérification finale de la sous-chaîne
+        mots = set(candidats[0]).intersection(*candidats[1:])
+        return [mot for mot in mots if fragment in mot]
+
+    def mots_proches(self, mot: str) -> list:
+        """Mots du vocabulaire à au plus ``tolerance(mot)`` modifications de ``mot``."""
+        k = tolerance(mot)
+        if not k:
+            return []
+        # Chaque modification détruit au plus 4 trigrammes (3 pour une substitution, 4 pour
+        # l'inversion de deux lettres voisines) : un mot proche en partage au moins seuil
+        seuil = len(trigrammes(mot)) - 4 * k
+        if seuil > 0:
+            communs = Counter()
+            for trigramme in trigrammes(mot):
+                communs.update(self.trigrammes.get(trigramme, ()))
+            candidats = [candidat for candidat, nb in communs.items() if nb >= seuil]
+        else:
+            candidats = [candidat for longueur in range(len(mot) - k, len(mot) + k + 1)
+                         for candidat in self.par_longueur.get(longueur, ())]
+        # Une modification change au plus deux lettres de l'ensemble des lettres : filtre peu coûteux
+        lettres = set(mot)
+        return [candidat for candidat in candidats
+                if len(lettres.symmetric_difference(candidat)) <= 2 * k
+                and distance_edition(mot, candidat, k) <= k]
+
+    def listes(self, fragment: str, flou: bool = False) -> list:
+        """Listes de livres (postings) des mots contenant ``fragment`` (ou proches, si flou)."""
+        mots = set(self.mots_contenant(fragment))
+        if flou:
+            mots.update(self.mots_proches(fragment))
+        return [self.postings[mot] for mot in mots]
+
+
+class _IndexIsbn:
+    """ISBN triés : recherche par préfixe (bisect), sans trigrammes sur des valeurs toutes distinctes."""
+
+    def __init__(self):
+        self.isbns = []
+        self.ids = {}
+
+    def ajouter(self, identifiant: int, mots: tuple):
+        isbn, = mots
+        insort(self.isbns, isbn)
+        self.ids[isbn] = identifiant
+
+    def supprimer(self, identifiant: int, mots: tuple):
+        isbn, = mots
+        i = bisect_left(self.isbns, isbn)
+        if i < len(self.isbns) and self.isbns[i] == isbn:
+            del self.isbns[i]
+            del self.ids[isbn]
+
+    def listes(self, fragment: str, flou: bool = False) -> list:
+        debut = bisect_left(self.isbns, fragment)
+        fin = bisect_left(self.isbns, fragment + '\uffff')
+        return [{self.ids[isbn] for isbn in self.isbns[debut:fin]}] if fin > debut else []
+
+
+class IndexRecherche:
+    """Index de recherche du catalogue, tenu à jour par Bibliotheque.
+
+    Les clés de recherche (mots normalisés, voir ``normaliser``) sont calculées une
+    seule fois, quand un livre entre dans l'index, et conservées sous forme de mots
+    partagés (``sys.intern``). Titre, auteur et genre ont chacun leur index inversé
+    (sous-chaînes de mots) ; l'ISBN est recherché par préfixe. Une requête est découpée
+    en mots ; chaque mot doit figurer dans au moins un des champs demandés. Le mot le
+    plus sélectif fournit les candidats, que les autres mots ne font que filtrer.
+    En mode ``flou``, un mot correspond aussi aux mots à faible distance d'édition.
+    Une suppression (ou une modification, qui supprime puis ajoute) laisse un identifiant
+    libre ; quand ils dépassent TAUX_COMPACTAGE des identifiants attribués, l'index est
+    renuméroté à partir des clés conservées, sans rien renormaliser.
+    """
+    CHAMPS = ("isbn", "titre", "auteur", "genre")
+    # Part d'identifiants libres (au-delà de MIN_COMPACTAGE) qui déclenche la renumérotation
+    TAUX_COMPACTAGE = 0.5
+    MIN_COMPACTAGE = 1024
+
+    def __init__(self, livres=()):
+        self._vider()
+        for livre in livres:
+            self.ajouter(livre)
+
+    def _vider(self):
+        self._ids = {}       # isbn -> identifiant entier
+        self._isbns = []     # identifiant -> isbn (None après suppression)
+        self._cles = []      # identifiant -> mots normalisés de chaque champ (None après suppression)
+        self._champs = {champ: _IndexIsbn() if champ == "isbn" else _IndexChamp() for champ in self.CHAMPS}
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def cles(livre) -> tuple:
+        """Mots normalisés de chaque champ du livre, dans l'ordre de CHAMPS."""
+        return ((normaliser(livre.isbn).replace(' ', ''),),) + tuple(
+            tuple(dict.fromkeys(jetons(getattr(livre, champ)))) for champ in IndexRecherche.CHAMPS[1:])
+
+    def ajouter(self, livre):
+        if livre.isbn in self._ids:
+            self.supprimer(livre.isbn)
+        self._indexer(livre.isbn, self.cles(livre))
+
+    def _indexer(self, isbn: str, cles: tuple):
+        identifiant = len(self._isbns)
+        self._ids[isbn] = identifiant
+        self._isbns.append(isbn)
+        self._cles.append(cles)
+        for index, mots in zip(self._champs.values(), cles):
+            index.ajouter(identifiant, mots)
+
+    def supprimer(self, isbn: str):
+        identifiant = self._ids.pop(isbn, None)
+        if identifiant is None:
+            return
+        for index, mots in zip(self._champs.values(), self._cles[identifiant]):
+            index.supprimer(identifiant, mots)
+        self._isbns[identifiant] = None
+        self._cles[identifiant] = None
+        libres = len(self._isbns) - len(self._ids)
+        if libres > self.MIN_COMPACTAGE and libres > self.TAUX_COMPACTAGE * len(self._isbns):
+            self._compacter()
+
+    def _compacter(self):
+        """Renumérote les livres restants dans leur ordre d'ajout (ordre des résultats conservé)."""
+        restants = [(isbn, cles) for isbn, cles in zip(self._isbns, self._cles) if isbn is not None]
+        self._vider()
+        for isbn, cles in restants:
+            self._indexer(isbn, cles)
+
+    def rechercher(self, requete: str, champs=("titre", "auteur", "genre"), flou: bool = False) -> list:
+        """ISBN des livres dont chaque mot de ``requete`` figure dans l'un des ``champs``."""
+        # Pour chaque mot : les listes de livres où il apparaît, tous champs confondus
+        plans = []
+        for fragment in set(jetons(requete)):
+            listes = [liste for champ in champs for liste in self._champs[champ].listes(fragment, flou)]
+            if not listes:
+                return []
+            plans.append((sum(map(len, listes)), listes))
+        if not plans:
+            return []
+
+        plans.sort(key=itemgetter(0))
+        resultat = set().union(*plans[0][1])
+        for _, listes in plans[1:]:
+            if len(listes) == 1:
+                resultat &= listes[0]
+            else:
+                resultat = {identifiant for identifiant in resultat
+                            if any(identifiant in liste for liste in listes)}
+            if not resultat:
+                return []
+        return [self._isbns[identifiant] for identifiant in sorted(resultat)]
+
+
+if __name__ == "__main__":
+    # python src/recherche.py [nb_livres] : temps de recherche sur un catalogue synthétique
+    from bibliotheque import Livre
+
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    mots = ["voyage", "nuit", "étoile", "secret", "jardin", "océan", "mémoire", "château",
+            "silence", "lumière", "histoire", "programmation", "python", "quantique", "énigme"]
+    genres = ["Roman", "Science", "Histoire", "Informatique", "Programmation", "Poésie"]
+    livres = [Livre(f"978{i:010d}", f"{mots[i % 15].capitalize()} {mots[i * 7 % 15]} {i}",
+                    f"Auteur{i % 50000} Nom{i % 997}", 1900 + i % 125, genres[i % 6])
+              for i in range(nb)]
+
+    debut = time.perf_counter()
+    index = IndexRecherche(livres)
+    print(f"=== Index de recherche ({nb} livres) ===")
+    print(f"construction : {time.perf_counter() - debut:7.2f} s")
+    for requete, flou in (("auteur4242", False), ("nom99", False), ("secret jardin 4242", False),
+                          ("4242", False), ("ENIGME", False), ("lumiere chateau", False),
+                          ("chatteau", True), ("programation", True)):
+        debut = time.perf_counter()
+        resultats = index.rechercher(requete, champs=IndexRecherche.CHAMPS, flou=flou)
+        duree = time.perf_counter() - debut
+        print(f"{requete!r:>22}{' (flou)' if flou else '':>7} : {1000 * duree:8.3f} ms  ({len(resultats)} résultats)")
@@ -1,115 +1,358 @@
-import matplotlib
-# Utilise un backend non‑interactif pour éviter tout conflit avec Tkinter
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from collections import Counter
-import csv
+import hashlib
+import os
+import shutil
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
 
+# API objet de matplotlib (Figure + canevas Agg) : aucun état global, chaque figure
+# peut être rendue hors du thread Tk
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+import historique as historique_partitions
+
+
+class CacheGraphiques:
+    """Graphiques déjà rendus, retrouvés par l'empreinte des données tracées.
+
+    En mémoire : au plus ``capacite`` images PIL, les moins récemment utilisées
+    évincées d'abord. Sur disque : au plus ``capacite_disque`` PNG dans ``dossier``,
+    élagués de même (date de modification, rafraîchie à chaque utilisation).
+    L'empreinte (SHA-1 des valeurs tracées et du format de sortie) reste valable d'une
+    exécution à l'autre ; quand l'appelant connaît une ``version`` des données sources
+    (Bibliotheque.version_catalogue), une image en mémoire est retrouvée sans même
+    recalculer les valeurs tracées.
+    """
+    CAPACITE = 16
+    CAPACITE_DISQUE = 64
+    # À incrémenter quand l'apparence des graphiques change : les PNG en cache sont alors ignorés
+    FORMAT = 1
+
+    def __init__(self, dossier="data/cache_graphiques", capacite=CAPACITE, capacite_disque=CAPACITE_DISQUE):
+        self.dossier = Path(dossier)
+        self.capacite = capacite
+        self.capacite_disque = capacite_disque
+        self._images = OrderedDict()  # empreinte -> image, de la moins à la plus récemment utilisée
+        self._versions = {}           # (nom, version, taille) -> empreinte
+        self._verrou = threading.Lock()  # thread Tk et thread de travail des graphiques
+
+    def empreinte(self, nom, valeurs, sortie) -> str:
+        return hashlib.sha1(repr((self.FORMAT, nom, valeurs, sortie)).encode("utf-8")).hexdigest()
+
+    def retrouver(self, nom, taille, version):
+        """Image en mémoire du graphique ``nom`` déjà rendu pour cette ``version`` des données
+        sources, ou None (sans rien calculer)."""
+        if version is None:
+            return None
+        with self._verrou:
+            cle = self._versions.get((nom, version, taille))
+            if cle not in self._images:
+                return None
+            self._images.move_to_end(cle)
+            return self._images[cle]
+
+    def image(self, nom, donnees, rendre, taille, version=None) -> Image.Image:
+        """Image du graphique ``nom`` à ``taille``. ``donnees()`` calcule les valeurs tracées
+        et ``rendre(valeurs)`` produit l'image : ni l'un ni l'autre n'est appelé si le cache
+        la contient déjà."""
+        image = self.retrouver(nom, taille, version)
+        if image is not None:
+            return image
+
+        valeurs = donnees()
+        cle = self.empreinte(nom, valeurs, taille)
+        with self._verrou:
+            image = self._images.get(cle)
+        if image is None:
+            chemin = self.dossier / f"{cle}.png"
+            try:
+                os.utime(chemin)  # PNG absent : FileNotFoundError
+                with Image.open(chemin) as png:
+                    png.load()
+                image = png
+            except OSError:
+                image = rendre(valeurs)
+                self._deposer(chemin, lambda fichier: image.save(fichier, format="PNG"))
+
+        with self._verrou:
+            self._images[cle] = image
+            self._images.move_to_end(cle)
+            if version is not None:
+                self._versions[(nom, version, taille)] = cle
+            while len(self._images) > self.capacite:
+                self._images.popitem(last=False)
+                self._versions = {v: c for v, c in self._versions.items() if c in self._images}
+        return image
+
+    def exporter(self, nom, donnees, ecrire, save_path) -> str:
+        """Copie le PNG du graphique ``nom`` depuis le cache disque vers ``save_path`` ;
+        à défaut ``ecrire(valeurs, save_path)`` le produit, puis il est mis en cache."""
+        valeurs = donnees()
+        chemin = self.dossier / f"{self.empreinte(nom, valeurs, 'png')}.png"
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        if chemin.is_file():
+            shutil.copyfile(chemin, save_path)
+            os.utime(chemin)
+        else:
+            ecrire(valeurs, save_path)
+            self._deposer(chemin, lambda fichier: shutil.copyfile(save_path, fichier))
+        return save_path
+
+    def vider(self):
+        """Oublie les images en mémoire (le cache disque est conservé)."""
+        with self._verrou:
+            self._images.clear()
+            self._versions.clear()
+
+    def _deposer(self, chemin: Path, ecrire):
+        # Le cache n'est qu'une optimisation : une erreur d'écriture est ignorée.
+        # Écriture dans un fichier temporaire puis renommage : un autre processus
+        # (CLI et GUI partagent le dossier) ne lit jamais un PNG incomplet.
+        temporaire = chemin.with_name(f"{chemin.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.dossier.mkdir(parents=True, exist_ok=True)
+            ecrire(temporaire)
+            os.replace(temporaire, chemin)
+            fichiers = sorted(self.dossier.glob("*.png"), key=lambda f: f.stat().st_mtime)
+            for ancien in fichiers[:max(len(fichiers) - self.capacite_disque, 0)]:
+                ancien.unlink(missing_ok=True)
+        except OSError:
+            temporaire.unlink(missing_ok=True)
+
 
 class Visualisation:
     """Génération de graphiques pour BibliothequeApp.
-    Tous les graphiques sont enregistrés sur disque (pas d'affichage direct).
-    Le backend "Agg" évite la fermeture intempestive de Tkinter.
+    Les figures sont des ``Figure`` autonomes rendues par un canevas Agg, sans pyplot :
+    elles peuvent être produites dans un thread de travail (voir ``taches``) sans
+    toucher à Tkinter ni à l'état global de matplotlib. Chaque graphique se découpe en
+    ``donnees_*`` (valeurs tracées) et ``tracer_*`` (Figure) ; ``rendre`` le produit en
+    mémoire à la taille voulue (interface) et ``exporter`` en PNG (CHEMINS), tous deux
+    à travers ``cache`` : un graphique dont les données n'ont pas changé n'est pas
+    redessiné.
     """
+    CHEMINS = {
+        "genres": "assets/stats_genres.png",
+        "auteurs": "assets/stats_auteurs.png",
+        "emprunts": "assets/stats_temps.png",
+    }
+    # Graphiques qui ne dépendent que des livres : Bibliotheque.version_catalogue les identifie
+    DEPEND_DU_CATALOGUE = ("genres", "auteurs")
+    # Résolution du rendu en mémoire : une taille en pixels donne des polices lisibles à l'écran
+    DPI_ECRAN = 72
+    cache = CacheGraphiques()
 
     # --- Méthodes internes utilitaires --------------------------------------------------
     @staticmethod
-    def _safe_savefig(save_path: str):
+    def _figure(figsize):
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots()
+
+    @staticmethod
+    def _safe_savefig(fig, save_path: str):
         Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-        plt.tight_layout()
-        plt.savefig(save_path, bbox_inches="tight")
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(save_path, bbox_inches="tight")
         return save_path
 
+    @staticmethod
+    def image(fig, taille) -> Image.Image:
+        """Rend ``fig`` à ``taille`` (largeur, hauteur en pixels) dans le tampon RGBA du
+        canevas Agg, partagé sans copie par l'image PIL renvoyée (ni PNG, ni disque, ni
+        rééchantillonnage). L'image reste valable tant qu'elle est référencée."""
+        largeur, hauteur = taille
+        fig.set_dpi(Visualisation.DPI_ECRAN)
+        fig.set_size_inches(largeur / Visualisation.DPI_ECRAN, hauteur / Visualisation.DPI_ECRAN)
+        fig.tight_layout()
+        fig.canvas.draw()
+        return Image.frombuffer("RGBA", fig.canvas.get_width_height(), fig.canvas.buffer_rgba(),
+                                "raw", "RGBA", 0, 1)
+
     # --- Graphique 1 : Répartition des genres -------------------------------------------
     @staticmethod
-    def diagramme_genres(livres, save_path="assets/stats_genres.png"):
+    def donnees_genres(livres) -> tuple:
+        """((genre, nombre de livres), ...) dans l'ordre de première apparition."""
         if not livres:
             raise ValueError("La liste des livres est vide")
+        return tuple(Counter(livre.genre for livre in livres).items())
 
-        genres = [livre.genre for livre in livres]
-        compteur = Counter(genres)
-
-        plt.figure(figsize=(6, 6))
-        plt.pie(
-            compteur.values(),
-            labels=compteur.keys(),
-            autopct=lambda p: f"{p:.1f}%\n({int(p * sum(compteur.values()) / 100)})",
+    @staticmethod
+    def tracer_genres(compteur) -> Figure:
+        total = sum(nb for _, nb in compteur)
+        fig, ax = Visualisation._figure((6, 6))
+        ax.pie(
+            [nb for _, nb in compteur],
+            labels=[genre for genre, _ in compteur],
+            autopct=lambda p: f"{p:.1f}%\n({int(p * total / 100)})",
             startangle=140,
         )
-        plt.title("Répartition des livres par genre")
-        return Visualisation._safe_savefig(save_path)
+        ax.set_title("Répartition des livres par genre")
+        return fig
+
+    @staticmethod
+    def figure_genres(livres) -> Figure:
+        return Visualisation.tracer_genres(Visualisation.donnees_genres(livres))
+
+    @staticmethod
+    def diagramme_genres(livres, save_path=CHEMINS["genres"]):
+        return Visualisation._safe_savefig(Visualisation.figure_genres(livres), save_path)
 
     # --- Graphique 2 : Top auteurs -------------------------------------------------------
     @staticmethod
-    def histogramme_auteurs(livres, save_path="assets/stats_auteurs.png"):
+    def donnees_auteurs(livres) -> tuple:
+        """((auteur, nombre de livres), ...) pour les 10 auteurs les plus représentés."""
         if not livres:
             raise ValueError("La liste des livres est vide")
-
-        auteurs = [livre.auteur for livre in livres]
-        top_auteurs = Counter(auteurs).most_common(10)
+        top_auteurs = Counter(livre.auteur for livre in livres).most_common(10)
         if not top_auteurs:
             raise ValueError("Aucun auteur disponible pour l'histogramme")
+        return tuple(top_auteurs)
 
-        plt.figure(figsize=(8, 5))
-        plt.barh(
+    @staticmethod
+    def tracer_auteurs(top_auteurs) -> Figure:
+        fig, ax = Visualisation._figure((8, 5))
+        ax.barh(
             [a for a, _ in top_auteurs],
             [c for _, c in top_auteurs],
             color="#5DADE2",
         )
-        plt.xlabel("Nombre de livres")
-        plt.title("Top 10 des auteurs")
-        plt.gca().invert_yaxis()
-        return Visualisation._safe_savefig(save_path)
+        ax.set_xlabel("Nombre de livres")
+        ax.set_title("Top 10 des auteurs")
+        ax.invert_yaxis()
+        return fig
+
+    @staticmethod
+    def figure_auteurs(livres) -> Figure:
+        return Visualisation.tracer_auteurs(Visualisation.donnees_auteurs(livres))
+
+    @staticmethod
+    def histogramme_auteurs(livres, save_path=CHEMINS["auteurs"]):
+        return Visualisation._safe_savefig(Visualisation.figure_auteurs(livres), save_path)
 
     # --- Graphique 3 : Courbe des emprunts ----------------------------------------------
     @staticmethod
-    def courbe_emprunts(historique_path="data/historique.csv", save_path="assets/stats_temps.png"):
-        jours = [(datetime.now().date() - timedelta(days=i)) for i in range(29, -1, -1)]
-        compteur = {jour: 0 for jour in jours}
+    def jours_courbe():
+        """Les 30 jours (jusqu'à aujourd'hui inclus) couverts par la courbe des emprunts."""
+        return [(datetime.now().date() - timedelta(days=i)) for i in range(29, -1, -1)]
 
-        try:
-            with open(historique_path, newline="", encoding="utf-8") as f:
-                for row in csv.DictReader(f, delimiter=";"):
-                    if row.get("action", "").lower() != "emprunt":
-                        continue
-                    try:
-                        date_evt = datetime.strptime(row["date"], "%Y-%m-%d %H:%M").date()
-                        if date_evt in compteur:
-                            compteur[date_evt] += 1
-                    except (ValueError, KeyError):
-                        continue
-        except FileNotFoundError:
-            # Pas d'historique : la courbe sera plate
-            pass
-
-        plt.figure(figsize=(10, 4))
-        plt.plot(list(compteur.keys()), list(compteur.values()), marker="o", linewidth=2)
-        plt.title("Emprunts sur 30 jours")
-        plt.xticks(rotation=45)
-        plt.grid(True, linestyle="--", alpha=0.6)
-        return Visualisation._safe_savefig(save_path)
+    @staticmethod
+    def _analyser(historique_path, historique, debut):
+        """Analyse en un passage un itérable de tuples, un dossier de partitions ou l'ancien CSV."""
+        if historique is None:
+            if Path(historique_path).is_dir():
+                # Seules les partitions des mois couverts par la courbe sont ouvertes
+                historique = historique_partitions.lire_partitions(historique_path, debut=debut)
+            else:
+                try:
+                    with open(historique_path, encoding="utf-8") as f:
+                        lignes = [ligne.strip().split(";") for ligne in f]
+                except FileNotFoundError:
+                    lignes = []  # Pas d'historique : la courbe sera plate
+                # Colonnes lues par position : l'entête a varié (membre / id_membre)
+                historique = (parts[:4] for parts in lignes if len(parts) >= 4 and parts[0] != "date")
+
+        analyse = historique_partitions.AnalyseHistorique()
+        for date_str, isbn, id_membre, action in historique:
+            analyse.enregistrer(date_str.strip(), isbn, id_membre, action.strip().lower())
+        return analyse.resultat()
+
+    @staticmethod
+    def donnees_emprunts(historique_path="data/historique", historique=None, analyse=None) -> tuple:
+        """((jour, nombre d'emprunts), ...) pour les 30 derniers jours.
+
+        ``analyse`` : ResultatAnalyse optionnel (``Bibliotheque.analyser_historique()``),
+        dont la série quotidienne est utilisée telle quelle. Sinon ``historique`` : itérable
+        optionnel de tuples (date, isbn, id_membre, action), par exemple
+        ``Bibliotheque.lire_historique(debut=...)`` ; à défaut ``historique_path`` est relu
+        (dossier de partitions mensuelles, ou ancien fichier CSV unique)."""
+        jours = Visualisation.jours_courbe()
+        if analyse is None:
+            analyse = Visualisation._analyser(historique_path, historique, debut=jours[0])
+        return tuple(zip(jours, analyse.serie(jours)))
+
+    @staticmethod
+    def tracer_emprunts(serie) -> Figure:
+        fig, ax = Visualisation._figure((10, 4))
+        ax.plot([jour for jour, _ in serie], [nb for _, nb in serie], marker="o", linewidth=2)
+        ax.set_title("Emprunts sur 30 jours")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.grid(True, linestyle="--", alpha=0.6)
+        return fig
+
+    @staticmethod
+    def figure_emprunts(historique_path="data/historique", historique=None, analyse=None) -> Figure:
+        """Voir ``donnees_emprunts`` pour ``historique_path``, ``historique`` et ``analyse``."""
+        return Visualisation.tracer_emprunts(Visualisation.donnees_emprunts(historique_path, historique, analyse))
+
+    @staticmethod
+    def courbe_emprunts(historique_path="data/historique", save_path=CHEMINS["emprunts"], historique=None,
+                        analyse=None):
+        """Voir ``donnees_emprunts`` pour ``historique_path``, ``historique`` et ``analyse``."""
+        return Visualisation._safe_savefig(
+            Visualisation.figure_emprunts(historique_path, historique, analyse), save_path)
 
     # --- Génération groupée --------------------------------------------------------------
     @classmethod
-    def generer_tous_graphiques(cls, livres, historique_path="data/historique.csv"):
-        """Tente de générer les trois graphiques. Ignore proprement ceux qui échouent."""
+    def _traceur(cls, nom):
+        return {"genres": cls.tracer_genres, "auteurs": cls.tracer_auteurs, "emprunts": cls.tracer_emprunts}[nom]
+
+    @classmethod
+    def taches(cls, livres, historique_path="data/historique", historique=None, analyse=None) -> dict:
+        """Nom -> fonction sans argument calculant les valeurs tracées du graphique,
+        à passer à ``rendre`` ou ``exporter``.
+
+        Les données sont figées à l'appel (``livres`` est copié) : les fonctions peuvent
+        s'exécuter dans un autre thread pendant que la bibliothèque est modifiée."""
+        livres = list(livres)
+        return {
+            "genres": partial(cls.donnees_genres, livres),
+            "auteurs": partial(cls.donnees_auteurs, livres),
+            "emprunts": partial(cls.donnees_emprunts, historique_path, historique=historique, analyse=analyse),
+        }
+
+    @classmethod
+    def rendre(cls, nom, donnees, taille, version_catalogue=None) -> Image.Image:
+        """Image en mémoire du graphique ``nom`` à ``taille`` (voir ``image``), reprise du cache
+        si ses valeurs n'ont pas changé. ``version_catalogue`` (Bibliotheque.version_catalogue)
+        évite jusqu'au calcul de ``donnees()`` pour les graphiques DEPEND_DU_CATALOGUE ; la
+        courbe des emprunts est identifiée par sa série, qui inclut la date du jour."""
+        version = version_catalogue if nom in cls.DEPEND_DU_CATALOGUE else None
+        tracer = cls._traceur(nom)
+        return cls.cache.image(nom, donnees, lambda valeurs: cls.image(tracer(valeurs), taille),
+                               tuple(taille), version)
+
+    @classmethod
+    def en_cache(cls, nom, taille, version_catalogue) -> Image.Image:
+        """Image déjà rendue du graphique ``nom`` pour ``version_catalogue``, ou None : lecture
+        seule du cache mémoire, sans calcul ni accès aux livres (utilisable dans le thread Tk)."""
+        if nom not in cls.DEPEND_DU_CATALOGUE:
+            return None
+        return cls.cache.retrouver(nom, tuple(taille), version_catalogue)
+
+    @classmethod
+    def exporter(cls, nom, donnees, save_path=None) -> str:
+        """Exporte le graphique ``nom`` en PNG (par défaut dans CHEMINS), repris du cache
+        disque si ses valeurs n'ont pas changé."""
+        tracer = cls._traceur(nom)
+        return cls.cache.exporter(nom, donnees,
+                                  lambda valeurs, chemin: cls._safe_savefig(tracer(valeurs), chemin),
+                                  save_path or cls.CHEMINS[nom])
+
+    @classmethod
+    def generer_tous_graphiques(cls, livres, historique_path="data/historique", historique=None, analyse=None):
+        """Tente d'exporter les trois graphiques en PNG (CHEMINS). Ignore proprement ceux qui échouent.
+
+        ``analyse`` (ResultatAnalyse) évite toute relecture de l'historique."""
         chemins = {}
-        try:
-            chemins["genres"] = cls.diagramme_genres(livres)
-        except Exception as e:
-            print("[Visualisation] Ignoré genres :", e)
-        try:
-            chemins["auteurs"] = cls.histogramme_auteurs(livres)
-        except Exception as e:
-            print("[Visualisation] Ignoré auteurs :", e)
-        try:
-            chemins["emprunts"] = cls.courbe_emprunts(historique_path)
-        except Exception as e:
-            print("[Visualisation] Ignoré emprunts :", e)
+        for nom, donnees in cls.taches(livres, historique_path, historique, analyse).items():
+            try:
+                chemins[nom] = cls.exporter(nom, donnees)
+            except Exception as e:
+                print(f"[Visualisation] Ignoré {nom} :", e)
         if not chemins:
             raise RuntimeError("Aucun graphique n'a pu être généré")
         return chemins
-
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application s'importent à plat depuis src/ (comme python src/main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture
+def dossier_donnees(tmp_path, monkeypatch):
+    """Répertoire de travail vide : les chemins ``data/...`` de l'application y sont relatifs."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def etat(biblio) -> tuple:
+    """État observable d'une bibliothèque, pour comparer deux chargements."""
+    livres = sorted((l.isbn, l.titre, l.auteur, l.annee, l.genre, l.statut) for l in biblio.livres.values())
+    membres = sorted((m.id, m.nom, tuple(m.livres_empruntes)) for m in biblio.membres.values())
+    emprunts = sorted((isbn, id_membre) for isbn, (id_membre, _) in biblio.emprunts_actifs.items())
+    return livres, membres, emprunts
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+from bibliotheque import Bibliotheque, Livre
+from BibliothequeCLI import BibliothequeCLI
+
+
+def test_donnees_chargees_une_seule_fois(dossier_donnees, monkeypatch):
+    biblio = Bibliotheque(journal=True)
+    biblio.ajouter_livre(Livre("9780000000001", "Titre", "Auteur", 2001, "Roman"))
+    biblio.flush()  # journal non compacté : le démarrage suivant le rejoue
+    biblio._ecrivain.fermer()
+
+    chargements, rejeux = [], []
+    charger, rejouer = Bibliotheque.charger_donnees, Bibliotheque._rejouer_journal
+    monkeypatch.setattr(Bibliotheque, "charger_donnees", lambda self: chargements.append(1) or charger(self))
+    monkeypatch.setattr(Bibliotheque, "_rejouer_journal", lambda self: rejeux.append(1) or rejouer(self))
+    cli = BibliothequeCLI()
+
+    assert chargements == [1] and rejeux == [1]
+    assert "9780000000001" in cli.biblio.livres
+    cli.biblio.fermer()
+
+
+@pytest.mark.parametrize("options", [{"compact": True}, {"paresseux": True}, {"compact": True, "paresseux": True}])
+def test_sqlite_refuse_compact_et_paresseux(dossier_donnees, options):
+    with pytest.raises(ValueError, match="--sqlite"):
+        BibliothequeCLI(sqlite=True, **options)
+    assert not (dossier_donnees / "data" / "bibliotheque.db").exists()
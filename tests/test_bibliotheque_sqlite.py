@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+import historique
+from bibliotheque import Livre, Membre
+from bibliotheque_sqlite import VERSION_IMPORTEE, BibliothequeSQLite
+from conftest import etat
+from exceptions import QuotaEmpruntDepasseError
+
+
+@pytest.fixture
+def fichiers_texte(dossier_donnees):
+    """Données au format texte d'une version précédente, à importer dans la base."""
+    (dossier_donnees / "data").mkdir()
+    (dossier_donnees / "data" / "livres.txt").write_text(
+        "9780000000001;Germinal;Émile Zola;1885;Roman;emprunté:M1\n"
+        "9780000000002;La Peste;Albert Camus;1947;Roman;disponible\n", encoding="utf-8")
+    (dossier_donnees / "data" / "membres.txt").write_text("M1;Alice;9780000000001\nM2;Bob;\n", encoding="utf-8")
+    return dossier_donnees
+
+
+class ConnexionDefaillante:
+    """Connexion dont les écritures commençant par ``prefixe`` échouent avant de toucher la base."""
+
+    def __init__(self, connexion, prefixe):
+        self._connexion, self._prefixe = connexion, prefixe
+
+    def execute(self, sql, *args):
+        if sql.startswith(self._prefixe):
+            raise sqlite3.OperationalError("disque plein")
+        return self._connexion.execute(sql, *args)
+
+    def __getattr__(self, nom):
+        return getattr(self._connexion, nom)
+
+
+def base(biblio) -> tuple:
+    """État enregistré dans la base, au format de ``etat``."""
+    relue = BibliothequeSQLite()
+    try:
+        return etat(relue)
+    finally:
+        relue.fermer()
+
+
+def test_import_unique_des_fichiers_texte(fichiers_texte):
+    biblio = BibliothequeSQLite()
+    assert sorted(biblio.livres) == ["9780000000001", "9780000000002"]
+    assert biblio.emprunts_actifs["9780000000001"][0] == "M1"
+    assert biblio._conn.execute("PRAGMA user_version").fetchone()[0] == VERSION_IMPORTEE
+    biblio.rendre_livre("9780000000001")
+    for isbn in list(biblio.livres):
+        biblio.supprimer_livre(isbn)
+    biblio.fermer()
+
+    # Base vidée : les fichiers texte, toujours présents, ne sont pas réimportés
+    relue = BibliothequeSQLite()
+    assert relue.livres == {} and set(relue.membres) == {"M1", "M2"}
+    relue.fermer()
+
+
+def test_base_anterieure_au_marqueur_non_reimportee(fichiers_texte):
+    biblio = BibliothequeSQLite()
+    biblio.supprimer_livre("9780000000002")
+    biblio._conn.execute("PRAGMA user_version = 0")  # base créée avant le marqueur d'import
+    biblio.fermer()
+
+    relue = BibliothequeSQLite()
+    assert sorted(relue.livres) == ["9780000000001"]
+    assert relue._conn.execute("PRAGMA user_version").fetchone()[0] == VERSION_IMPORTEE
+    relue.fermer()
+
+
+@pytest.mark.parametrize("prefixe, operation", [
+    ("INSERT INTO historique", lambda b: b.emprunter_livre("9780000000002", "M2")),
+    ("INSERT INTO historique", lambda b: b.rendre_livre("9780000000001")),
+    ("UPDATE livres", lambda b: b.emprunter_livre("9780000000002", "M2")),
+    ("INSERT INTO livres", lambda b: b.ajouter_livre(Livre("9780000000003", "Nana", "Émile Zola", 1880, "Roman"))),
+    ("INSERT INTO membres", lambda b: b.enregistrer_membre(Membre("M3", "Chloé"))),
+    ("DELETE FROM membres", lambda b: b.supprimer_membre("M1")),
+])
+def test_ecriture_en_echec_annulee_en_memoire(fichiers_texte, prefixe, operation):
+    biblio = BibliothequeSQLite()
+    avant = etat(biblio)
+    connexion = biblio._conn
+    biblio._conn = ConnexionDefaillante(connexion, prefixe)
+    with pytest.raises(sqlite3.OperationalError):
+        operation(biblio)
+    biblio._conn = connexion
+
+    # Rien n'a été écrit (écriture refusée avant de toucher la base) : la mémoire est rétablie
+    assert etat(biblio) == avant == base(biblio)
+    assert "9780000000002" in biblio.isbns_disponibles()
+    biblio.fermer()
+
+
+def test_erreur_de_validation_sans_rechargement(fichiers_texte, monkeypatch):
+    biblio = BibliothequeSQLite()
+    for i in range(3, 3 + Membre.MAX_EMPRUNTS):
+        biblio.ajouter_livre(Livre(f"978000000000{i}", f"Titre {i}", "Auteur", 2000, "Roman"))
+        biblio.emprunter_livre(f"978000000000{i}", "M2")
+    rechargements = []
+    monkeypatch.setattr(BibliothequeSQLite, "charger_donnees", lambda self: rechargements.append(1))
+    with pytest.raises(QuotaEmpruntDepasseError):
+        biblio.emprunter_livre("9780000000002", "M2")
+    assert rechargements == []
+    biblio.fermer()
+
+
+def test_pas_d_ecrivain_d_historique(fichiers_texte, monkeypatch):
+    crees = []
+    monkeypatch.setattr(historique.EcrivainHistorique, "__init__", lambda self, *a, **k: crees.append(self))
+    biblio = BibliothequeSQLite()
+    biblio.emprunter_livre("9780000000002", "M2")
+    biblio.sauvegarder_donnees()
+    assert crees == [] and biblio._ecrivain is None
+    assert [evt[1:] for evt in biblio.lire_historique()] == [("9780000000002", "M2", "emprunt")]
+    biblio.fermer()
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from bibliotheque import Livre
+from catalogue_paresseux import CatalogueParesseux
+
+LIVRES = [Livre(f"978{i:010d}", f"Titre {i}", f"Auteur {i % 3}", 1900 + i, "Roman",
+                "disponible" if i % 2 else f"emprunté:M{i}") for i in range(20)]
+
+
+def champs(livre) -> tuple:
+    return livre.isbn, livre.titre, livre.auteur, livre.annee, livre.genre, livre.statut
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    chemin = tmp_path / "livres.txt"
+    # Ordre du fichier différent de l'ordre des ISBN, espaces superflus et ligne incomplète
+    lignes = [f" {l.isbn} ;{l.titre};{l.auteur};{l.annee};{l.genre};{l.statut}\n" for l in reversed(LIVRES)]
+    chemin.write_text("".join(lignes) + "ligne;incomplète\n", encoding="utf-8")
+    catalogue = CatalogueParesseux(str(chemin), str(tmp_path / "livres.idx"), taille_cache=4)
+    catalogue.rouvrir()
+    yield catalogue
+    catalogue.fermer()
+
+
+def test_lecture_depuis_le_fichier(catalogue):
+    assert len(catalogue) == len(LIVRES)
+    assert sorted(catalogue) == sorted(l.isbn for l in LIVRES)
+    assert [champs(catalogue[l.isbn]) for l in LIVRES] == [champs(l) for l in LIVRES]
+    assert "ligne" not in catalogue
+    with pytest.raises(KeyError):
+        catalogue["9780000000999"]
+
+
+def test_index_relu_puis_reconstruit_si_perime(catalogue):
+    # Un second catalogue relit le .idx sans analyser livres.txt
+    relu = CatalogueParesseux(catalogue.chemin, catalogue.chemin_index)
+    relu._construire_index = lambda stat: pytest.fail("index valide reconstruit")
+    relu.rouvrir()
+    assert relu._isbns == catalogue._isbns and relu._positions == catalogue._positions
+    assert champs(relu[LIVRES[7].isbn]) == champs(LIVRES[7])
+    relu.fermer()
+
+    # livres.txt modifié (taille et date) : l'index est périmé et reconstruit
+    with open(catalogue.chemin, "a", encoding="utf-8") as f:
+        f.write("9781111111111;Nouveau;Auteur;2024;Essai;disponible\n")
+    stat = os.stat(catalogue.chemin)
+    os.utime(catalogue.chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    relu = CatalogueParesseux(catalogue.chemin, catalogue.chemin_index)
+    relu.rouvrir()
+    assert len(relu) == len(LIVRES) + 1
+    assert relu["9781111111111"].titre == "Nouveau"
+    relu.fermer()
+
+
+def test_index_corrompu_reconstruit(catalogue):
+    with open(catalogue.chemin_index, "r+b") as f:
+        f.truncate(os.path.getsize(catalogue.chemin_index) - 5)
+    relu = CatalogueParesseux(catalogue.chemin, catalogue.chemin_index)
+    relu.rouvrir()
+    assert sorted(relu) == sorted(l.isbn for l in LIVRES)
+    relu.fermer()
+
+
+def test_cache_lru_borne(catalogue):
+    for livre in LIVRES[:4]:
+        catalogue[livre.isbn]
+    premier = catalogue[LIVRES[0].isbn]  # redevient le plus récent
+    catalogue[LIVRES[4].isbn]            # évince LIVRES[1], le moins récemment lu
+    assert list(catalogue._cache) == [LIVRES[i].isbn for i in (2, 3, 0, 4)]
+    assert catalogue[LIVRES[0].isbn] is premier
+    for livre in LIVRES:
+        catalogue[livre.isbn]
+    assert len(catalogue._cache) == catalogue.taille_cache
+
+
+def test_modifications_et_suppressions_en_surcouche(catalogue):
+    modifie = Livre(LIVRES[3].isbn, "Titre modifié", "Auteur", 2000, "Essai")
+    ajoute = Livre("9789999999999", "Ajouté", "Auteur", 2024, "Essai")
+    catalogue[LIVRES[3].isbn]
+    catalogue[modifie.isbn] = modifie
+    catalogue[ajoute.isbn] = ajoute
+    del catalogue[LIVRES[5].isbn]
+    with pytest.raises(KeyError):
+        del catalogue[LIVRES[5].isbn]
+
+    # Les modifications ne sont pas évincées par le cache LRU
+    for livre in LIVRES:
+        if livre.isbn != LIVRES[5].isbn:
+            catalogue[livre.isbn]
+    assert catalogue[modifie.isbn] is modifie
+    assert catalogue[ajoute.isbn] is ajoute
+    assert LIVRES[5].isbn not in catalogue
+    with pytest.raises(KeyError):
+        catalogue[LIVRES[5].isbn]
+    assert len(catalogue) == len(LIVRES)
+    assert sorted(catalogue) == sorted({l.isbn for l in LIVRES} - {LIVRES[5].isbn} | {ajoute.isbn})
+
+    # Un livre supprimé puis rajouté redevient visible ; rouvrir oublie la surcouche
+    catalogue[LIVRES[5].isbn] = LIVRES[5]
+    assert len(catalogue) == len(LIVRES) + 1 and LIVRES[5].isbn in catalogue
+    catalogue.rouvrir()
+    assert len(catalogue) == len(LIVRES) and ajoute.isbn not in catalogue
+    assert champs(catalogue[modifie.isbn]) == champs(LIVRES[3])
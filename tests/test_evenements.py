@@ -0,0 +1,88 @@
+import pytest
+
+from bibliotheque import Bibliotheque, Livre, Membre
+from evenements import (BusEvenements, DonneesChargees, Emprunt, LivreAjoute, LivreSupprime,
+                        MembreAjoute, MembreSupprime, Retour)
+from exceptions import LivreIndisponibleError
+
+
+def test_bus_diffuse_dans_l_ordre_et_filtre_par_type():
+    bus, recus = BusEvenements(), []
+    tous = bus.abonner(lambda e: recus.append(("tous", e)))
+    bus.abonner(lambda e: recus.append(("livres", e)), LivreAjoute, LivreSupprime)
+    ajout, emprunt = LivreAjoute("9780000000001"), Emprunt("9780000000001", "M1")
+
+    bus.publier(ajout)
+    bus.publier(emprunt)
+    assert recus == [("tous", ajout), ("livres", ajout), ("tous", emprunt)]
+
+    recus.clear()
+    bus.desabonner(tous)
+    bus.publier(ajout)
+    assert recus == [("livres", ajout)]
+
+
+def test_bus_abonnement_pendant_la_diffusion():
+    # La liste des abonnés est figée pour chaque publication
+    bus, recus = BusEvenements(), []
+
+    def premier(evenement):
+        recus.append("premier")
+        bus.desabonner(premier)
+        bus.abonner(lambda e: recus.append("nouveau"))
+
+    bus.abonner(premier)
+    bus.abonner(lambda e: recus.append("second"))
+    bus.publier(DonneesChargees())
+    assert recus == ["premier", "second"]
+    bus.publier(DonneesChargees())
+    assert recus == ["premier", "second", "second", "nouveau"]
+
+
+def champs(evenement) -> dict:
+    return {nom: getattr(evenement, nom) for nom in evenement.__slots__}
+
+
+@pytest.fixture
+def biblio(dossier_donnees):
+    biblio = Bibliotheque()
+    yield biblio
+    biblio.fermer()
+
+
+def test_bibliotheque_publie_chaque_modification(biblio):
+    recus = []
+    biblio.evenements.abonner(recus.append)
+    version = biblio.version_catalogue
+
+    biblio.ajouter_livre(Livre("9780000000001", "Germinal", "Émile Zola", 1885, "Roman"))
+    biblio.enregistrer_membre(Membre("M1", "Alice"))
+    biblio.emprunter_livre("9780000000001", "M1")
+    with pytest.raises(LivreIndisponibleError):
+        biblio.emprunter_livre("9780000000001", "M1")   # refusé : rien n'est publié
+    biblio.retourner_livre("9780000000001")
+    biblio.supprimer_membre("M1")
+    biblio.supprimer_livre("9780000000001")
+    biblio.charger_donnees()
+
+    assert [(type(e), champs(e)) for e in recus] == [
+        (LivreAjoute, {"isbn": "9780000000001"}),
+        (MembreAjoute, {"id_membre": "M1"}),
+        (Emprunt, {"isbn": "9780000000001", "id_membre": "M1"}),
+        (Retour, {"isbn": "9780000000001", "id_membre": "M1"}),
+        (MembreSupprime, {"id_membre": "M1"}),
+        (LivreSupprime, {"isbn": "9780000000001"}),
+        (DonneesChargees, {}),
+    ]
+    assert biblio.version_catalogue > version
+
+
+def test_abonne_voit_la_modification_appliquee(biblio):
+    vus = []
+    biblio.evenements.abonner(
+        lambda e: vus.append((e.isbn in biblio.livres, biblio.version_catalogue)), LivreAjoute, LivreSupprime)
+    biblio.ajouter_livre(Livre("9780000000001", "Germinal", "Émile Zola", 1885, "Roman"))
+    apres_ajout = biblio.version_catalogue
+    biblio.supprimer_livre("9780000000001")
+    assert vus == [(True, apres_ajout), (False, biblio.version_catalogue)]
+    assert biblio.version_catalogue != apres_ajout
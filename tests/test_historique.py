@@ -0,0 +1,226 @@
+import gzip
+import os
+import random
+import time
+
+import pytest
+
+import historique
+from historique import AnalyseHistorique
+
+
+def evenements(nb: int, graine: int = 0) -> list:
+    """Événements chronologiques sur trois mois : emprunts, retours et actions ignorées."""
+    aleatoire = random.Random(graine)
+    lignes = []
+    for i in range(nb):
+        mois, jour = 4 + i * 3 // nb, 1 + i % 28
+        date = f"2025-{mois:02d}-{jour:02d} {i % 24:02d}:{i % 60:02d}"
+        action = aleatoire.choice(["emprunt", "emprunt", "retour", "Retour", "consultation"])
+        lignes.append((date, f"978{aleatoire.randrange(40):010d}", f"M{aleatoire.randrange(15)}", action))
+    return sorted(lignes)
+
+
+def ecrire_partitions(dossier, lignes: list, compresser: str = "2025-04"):
+    """Écrit une partition par mois (entête comprise) ; le mois ``compresser`` est archivé en .gz."""
+    os.makedirs(dossier, exist_ok=True)
+    par_mois = {}
+    for ligne in lignes:
+        par_mois.setdefault(ligne[0][:7], []).append(";".join(ligne) + "\n")
+    for mois, contenu in par_mois.items():
+        texte = (";".join(historique.ENTETE) + "\n" + "".join(contenu)).encode("utf-8")
+        if mois == compresser:
+            with gzip.open(os.path.join(dossier, f"{mois}.csv.gz"), "wb") as f:
+                f.write(texte)
+        else:
+            with open(os.path.join(dossier, f"{mois}.csv"), "wb") as f:
+                f.write(texte)
+
+
+def agregats(analyse: AnalyseHistorique) -> tuple:
+    return (dict(analyse.par_livre), dict(analyse.par_membre), dict(analyse.emprunts_par_jour),
+            dict(analyse.retours_par_jour), analyse.en_cours, analyse.positions)
+
+
+def reference(lignes: list) -> AnalyseHistorique:
+    """Analyse directe, événement par événement, sans passer par les fichiers."""
+    analyse = AnalyseHistorique()
+    for date, isbn, id_membre, action in lignes:
+        analyse.enregistrer(date, isbn, id_membre, action.lower())
+    return analyse
+
+
+@pytest.fixture
+def dossier(tmp_path):
+    chemin = str(tmp_path / "historique")
+    ecrire_partitions(chemin, evenements(3000))
+    return chemin
+
+
+def test_lire_partitions_dans_l_ordre(dossier):
+    lignes = evenements(3000)
+    assert list(historique.lire_partitions(dossier)) == [
+        (date, isbn, id_membre, action.lower()) for date, isbn, id_membre, action in lignes]
+    assert [e[0][:7] for e in historique.lire_partitions(dossier, "2025-05", "2025-05")] == \
+        ["2025-05"] * sum(1 for e in lignes if e[0].startswith("2025-05"))
+
+
+def test_sequentiel_parallele_et_numpy_identiques(dossier):
+    attendu = agregats(reference(evenements(3000)))[:5]
+
+    sequentielle = AnalyseHistorique()
+    sequentielle.SEUIL_VECTORISATION = float("inf")
+    sequentielle.lire_suite(dossier)
+
+    vectorisee = AnalyseHistorique()
+    vectorisee.SEUIL_VECTORISATION = 0
+    vectorisee.lire_suite(dossier)
+
+    parallele = AnalyseHistorique()
+    parallele.SEUIL_PARALLELE = 0
+    parallele.TAILLE_PLAGE = 4096  # plusieurs plages par partition
+    parallele.lire_suite(dossier, processus=2)
+
+    assert agregats(sequentielle)[:5] == attendu
+    assert agregats(vectorisee) == agregats(sequentielle)
+    assert agregats(parallele) == agregats(sequentielle)
+
+
+def test_decouper_aligne_sur_les_lignes(dossier):
+    chemin = os.path.join(dossier, "2025-05.csv")
+    with open(chemin, "rb") as f:
+        contenu = f.read()
+    plages = historique._decouper(chemin, 0, 1000)
+    assert len(plages) > 1
+    assert plages[0][0] == 0 and plages[-1][1] == len(contenu)
+    for (_, fin), (debut, _) in zip(plages, plages[1:]):
+        assert fin == debut and contenu[fin - 1:fin] == b"\n"
+
+
+def test_point_de_reprise_ne_relit_que_les_ajouts(dossier, tmp_path, monkeypatch):
+    point = str(tmp_path / "historique.compteurs")
+    AnalyseHistorique.charger(dossier, point)
+
+    partition = os.path.join(dossier, "2025-06.csv")
+    taille = os.path.getsize(partition)
+    ajout = "2025-06-29 09:00;9780000000001;M1;emprunt\n2025-06-29 10:00;9780000000002;M2;retour\n"
+    with open(partition, "a", encoding="utf-8") as f:
+        f.write(ajout + "2025-06-29 11:00;978000")  # dernière ligne en cours d'écriture
+
+    lectures = []
+    analyser = AnalyseHistorique._analyser
+    monkeypatch.setattr(AnalyseHistorique, "_analyser",
+                        lambda self, chemin, debut, fin=None: lectures.append((os.path.basename(chemin), debut))
+                        or analyser(self, chemin, debut, fin))
+    reprise = AnalyseHistorique.charger(dossier, point)
+
+    assert lectures == [("2025-06.csv", taille)]
+    assert reprise.positions["2025-06.csv"] == taille + len(ajout)
+    complet = evenements(3000) + [tuple(ligne.split(";")) for ligne in ajout.splitlines()]
+    assert agregats(reprise)[:5] == agregats(reference(complet))[:5]
+
+    # Point de reprise sauvegardé : un nouveau chargement ne relit rien
+    lectures.clear()
+    assert agregats(AnalyseHistorique.charger(dossier, point)) == agregats(reprise)
+    assert lectures == []
+
+
+def test_partition_remplacee_reconstruit_l_analyse(dossier, tmp_path):
+    point = str(tmp_path / "historique.compteurs")
+    AnalyseHistorique.charger(dossier, point)
+
+    lignes = evenements(500, graine=1)
+    for nom in os.listdir(dossier):
+        os.remove(os.path.join(dossier, nom))
+    ecrire_partitions(dossier, lignes)
+
+    assert agregats(AnalyseHistorique.charger(dossier, point))[:5] == agregats(reference(lignes))[:5]
+
+
+@pytest.mark.parametrize("ligne_invalide", [
+    "2025-05-3;9780000000001;M1;emprunt\n",           # date tronquée
+    "n'importe quoi;9780000000001;M1;emprunt\n",      # date illisible
+    "2025-13-01 10:00;9780000000001;M1;retour\n",     # mois hors limites
+    ";9780000000001;M1;emprunt\n",                    # date vide
+    "2025-05-30 1\n",                                 # ligne coupée
+])
+def test_ligne_mal_formee_dans_un_gros_bloc(tmp_path, ligne_invalide):
+    lignes = evenements(80000, graine=2)
+    dossier = str(tmp_path / "historique")
+    ecrire_partitions(dossier, lignes, compresser=None)
+    # Ligne invalide au milieu de la plus grosse partition (au-delà de SEUIL_VECTORISATION)
+    chemin = os.path.join(dossier, "2025-05.csv")
+    with open(chemin, encoding="utf-8") as f:
+        contenu = f.readlines()
+    contenu.insert(len(contenu) // 2, ligne_invalide)
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.writelines(contenu)
+    assert os.path.getsize(chemin) >= AnalyseHistorique.SEUIL_VECTORISATION
+
+    vectorisee = AnalyseHistorique()
+    vectorisee.lire_suite(dossier)
+    sequentielle = AnalyseHistorique()
+    sequentielle.SEUIL_VECTORISATION = float("inf")
+    sequentielle.lire_suite(dossier)
+
+    assert agregats(vectorisee) == agregats(sequentielle)
+    assert agregats(sequentielle)[:5] == agregats(reference(lignes))[:5]
+
+
+def lignes_ecrites(dossier) -> list:
+    """Lignes de données (entêtes exclues) des partitions non compressées, dans l'ordre."""
+    lignes = []
+    for chemin in historique.partitions(dossier):
+        with open(chemin, encoding="utf-8") as f:
+            lignes += [tuple(ligne.rstrip("\n").split(";")) for ligne in f][1:]
+    return lignes
+
+
+@pytest.fixture
+def ecrivain(tmp_path):
+    ecrivain = historique.EcrivainHistorique(str(tmp_path / "historique"), tous_les_n=5, delai_ms=0)
+    yield ecrivain
+    ecrivain.fermer()
+
+
+def test_ecrivain_ecrit_par_blocs_de_n(ecrivain):
+    lignes = evenements(12)
+    for ligne in lignes[:4]:
+        ecrivain.ecrire(*ligne)
+    assert lignes_ecrites(ecrivain.dossier) == []
+    for ligne in lignes[4:]:
+        ecrivain.ecrire(*ligne)
+    # Deux blocs de 5 écrits ; les 2 derniers événements attendent le prochain flush
+    assert lignes_ecrites(ecrivain.dossier) == lignes[:10]
+    ecrivain.fermer()
+    assert lignes_ecrites(ecrivain.dossier) == lignes
+
+
+def test_ecrivain_ecrit_apres_le_delai(tmp_path):
+    ecrivain = historique.EcrivainHistorique(str(tmp_path / "historique"), tous_les_n=50, delai_ms=50)
+    ligne = evenements(1)[0]
+    ecrivain.ecrire(*ligne)
+    assert lignes_ecrites(ecrivain.dossier) == []
+    for _ in range(100):
+        if lignes_ecrites(ecrivain.dossier):
+            break
+        time.sleep(0.05)
+    assert lignes_ecrites(ecrivain.dossier) == [ligne]
+    assert ecrivain._minuteur is None
+    ecrivain.fermer()
+
+
+def test_ecrivain_ferme_ecrit_le_tampon_et_quitte_atexit(tmp_path, monkeypatch):
+    enregistres = []
+    monkeypatch.setattr(historique.atexit, "register", enregistres.append)
+    monkeypatch.setattr(historique.atexit, "unregister", enregistres.remove)
+    ecrivains = [historique.EcrivainHistorique(str(tmp_path / f"historique{i}"), delai_ms=0) for i in range(3)]
+    assert enregistres == [ecrivain.flush for ecrivain in ecrivains]
+
+    lignes = evenements(3)
+    for ligne in lignes:
+        ecrivains[0].ecrire(*ligne)
+    for ecrivain in ecrivains:
+        ecrivain.fermer()
+    assert lignes_ecrites(ecrivains[0].dossier) == lignes
+    assert enregistres == []
@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+from bibliotheque import Bibliotheque, Livre, Membre
+from index_catalogue import IndexCatalogue
+from recherche import normaliser
+
+AUTEURS = ["Victor Hugo", "Émile Zola", "George Sand", "Albert Camus"]
+GENRES = ["Roman", "Poésie", "Théâtre", "Essai"]
+
+
+def catalogue(nb: int, graine: int = 0) -> list:
+    aleatoire = random.Random(graine)
+    livres = []
+    for i in aleatoire.sample(range(10 * nb), nb):
+        statut = "disponible" if aleatoire.random() < 0.7 else f"emprunté:M{i % 5}"
+        livres.append(Livre(f"978{i:010d}", f"Titre {i}", aleatoire.choice(AUTEURS), 1800 + i % 150,
+                            aleatoire.choice(GENRES), statut))
+    return livres
+
+
+def filtre(livres, auteur=None, genre=None, annee_min=None, annee_max=None, disponible=None) -> set:
+    """Même requête par parcours complet."""
+    return {l.isbn for l in livres
+            if (auteur is None or normaliser(l.auteur) == normaliser(auteur))
+            and (genre is None or normaliser(l.genre) == normaliser(genre))
+            and (annee_min is None or l.annee >= annee_min)
+            and (annee_max is None or l.annee <= annee_max)
+            and (disponible is None or (l.statut == "disponible") == disponible)}
+
+
+def parcourir(index: IndexCatalogue, ordre: str, taille: int, entre_pages=None) -> list:
+    """Tous les ISBN page par page, en suivant le curseur ; ``entre_pages(curseur)`` modifie l'index."""
+    vus, curseur = [], None
+    for _ in range(2 * len(index) + 1):  # un curseur qui n'avance pas ferait boucler sans fin
+        isbns, dernier, _ = index.tranche(ordre, taille, apres=curseur)
+        if not isbns:
+            return vus
+        vus.extend(isbns)
+        curseur = dernier
+        if entre_pages:
+            entre_pages(curseur)
+    raise AssertionError("la pagination ne se termine pas")
+
+
+@pytest.mark.parametrize("criteres", [
+    {}, {"auteur": "victor HUGO"}, {"auteur": "Emile Zola", "disponible": True}, {"genre": "poesie"},
+    {"genre": "Théâtre", "disponible": False}, {"annee_min": 1900}, {"annee_min": 1850, "annee_max": 1860},
+    {"auteur": "George Sand", "genre": "Roman", "annee_max": 1870}, {"annee_min": 1900, "annee_max": 1800},
+    {"auteur": "Inconnu"},
+])
+def test_requete_identique_au_parcours(criteres):
+    livres = catalogue(500)
+    index = IndexCatalogue(livres)
+    resultat = index.requete(**criteres)
+    assert len(resultat) == len(set(resultat))
+    assert set(resultat) == filtre(livres, **criteres)
+
+
+def test_requete_apres_mises_a_jour():
+    livres = catalogue(300)
+    index = IndexCatalogue(livres[:200])
+    for livre in livres[200:]:
+        index.ajouter(livre)
+    for livre in livres[:50]:
+        index.supprimer(livre.isbn)
+    for livre in livres[50:100]:
+        livre.statut = "disponible" if livre.statut != "disponible" else "emprunté:M1"
+        index.changer_statut(livre.isbn, livre.statut)
+    restants = livres[50:]
+    assert len(index) == len(restants)
+    assert index.disponibles == filtre(restants, disponible=True)
+    assert set(index.requete(genre="Roman", disponible=False)) == filtre(restants, genre="Roman", disponible=False)
+    assert index.isbns == sorted(l.isbn for l in restants)
+    assert index.annees == sorted((l.annee, l.isbn) for l in restants)
+
+
+@pytest.mark.parametrize("ordre", IndexCatalogue.ORDRES)
+def test_pagination_complete_dans_l_ordre(ordre):
+    livres = catalogue(250)
+    index = IndexCatalogue(livres)
+    cle = (lambda l: l.isbn) if ordre == "isbn" else (lambda l: (l.annee, l.isbn))
+    assert parcourir(index, ordre, 20) == [l.isbn for l in sorted(livres, key=cle)]
+
+    # Accès direct par rang
+    isbns, _, position = index.tranche(ordre, 20, decalage=40)
+    assert position == 40 and isbns == parcourir(index, ordre, 20)[40:60]
+    with pytest.raises(ValueError):
+        index.tranche("titre", 20)
+
+
+@pytest.mark.parametrize("ordre", IndexCatalogue.ORDRES)
+def test_pagination_stable_malgre_les_insertions(ordre):
+    livres = catalogue(200)
+    index = IndexCatalogue(livres)
+    cle = (lambda l: l.isbn) if ordre == "isbn" else (lambda l: (l.annee, l.isbn))
+    attendus = [l.isbn for l in sorted(livres, key=cle)]
+    candidats = [l for l in catalogue(400, graine=1) if l.isbn not in set(attendus)]
+    avant, apres, supprimes = [], [], []
+
+    def modifier(curseur):
+        # Entre deux pages : un ajout avant le curseur, un après, et la suppression d'un livre déjà vu
+        for destination, cote in ((avant, lambda l: cle(l) <= curseur), (apres, lambda l: cle(l) > curseur)):
+            livre = next((l for l in candidats if cote(l)), None)
+            if livre is not None:
+                candidats.remove(livre)
+                index.ajouter(livre)
+                destination.append(livre.isbn)
+        deja_vu = next(isbn for isbn in attendus if isbn not in supprimes)
+        index.supprimer(deja_vu)
+        supprimes.append(deja_vu)
+
+    vus = parcourir(index, ordre, 15, lambda curseur: modifier(tuple(curseur) if ordre == "annee" else curseur))
+    # Ni doublon ni livre sauté ; ajouts derrière le curseur absents, ajouts devant présents
+    assert len(vus) == len(set(vus))
+    assert [isbn for isbn in vus if isbn not in apres] == attendus
+    assert set(apres) <= set(vus)
+    assert avant and apres and not set(avant) & set(vus)
+
+
+def test_pages_de_la_bibliotheque(dossier_donnees):
+    biblio = Bibliotheque()
+    for livre in catalogue(60):
+        livre.statut = "disponible"
+        biblio.ajouter_livre(livre)
+    for i in range(25):
+        biblio.enregistrer_membre(Membre(f"M{i:02d}", f"Membre {i}"))
+
+    page = biblio.page_livres(taille=25)
+    assert (page.position, page.total, len(page.elements)) == (0, 60, 25)
+    biblio.ajouter_livre(Livre("9770000000000", "Premier", "Auteur", 2001, "Roman"))
+    suite = biblio.page_livres(taille=25, apres=page.suivant)
+    assert suite.elements[0].isbn > page.elements[-1].isbn
+    assert all(livre.isbn != "9770000000000" for livre in suite.elements)
+    fin = biblio.page_livres(taille=25, apres=suite.suivant)
+    assert len(fin.elements) == 10 and fin.suivant is None
+
+    membres = biblio.page_membres(taille=10)
+    biblio.enregistrer_membre(Membre("M00a", "Nouveau"))
+    biblio.supprimer_membre("M01")
+    suite = biblio.page_membres(taille=10, apres=membres.suivant)
+    assert [m.id for m in suite.elements] == [f"M{i:02d}" for i in range(10, 20)]
+    assert biblio.page_membres(taille=10, apres=suite.suivant).suivant is None
+    biblio.fermer()
@@ -0,0 +1,84 @@
+import os
+
+import instantane
+from bibliotheque import Bibliotheque, Livre, Membre
+from conftest import etat
+
+
+LIVRES = [("9780000000000", "Titre", "Auteur", 2001, "Roman", "emprunté:M1"),
+          ("9780000000001", "Été", "Autrice", 1999, "Poésie", "disponible")]
+MEMBRES = [("M1", "Alice", ("9780000000000",)), ("M2", "Bob", ())]
+EMPRUNTS = [("9780000000000", "M1", "2025-06-01 10:00")]
+
+
+def test_aller_retour(tmp_path):
+    chemin = str(tmp_path / "donnees.bin")
+    instantane.ecrire(chemin, LIVRES, MEMBRES, EMPRUNTS)
+    assert instantane.lire(chemin) == (LIVRES, MEMBRES, EMPRUNTS)
+    assert not os.path.exists(chemin + ".tmp")
+
+
+def test_fichier_absent(tmp_path):
+    assert instantane.lire(str(tmp_path / "absent.bin")) is None
+
+
+def test_signature_ou_version_inconnue(tmp_path):
+    chemin = str(tmp_path / "donnees.bin")
+    instantane.ecrire(chemin, LIVRES, MEMBRES, EMPRUNTS)
+    with open(chemin, "rb") as f:
+        donnees = f.read()
+
+    with open(chemin, "wb") as f:
+        f.write(b"AUTRESIG" + donnees[8:])
+    assert instantane.lire(chemin) is None
+
+    entete = instantane._ENTETE.pack(instantane.SIGNATURE, instantane.VERSION + 1, len(donnees) - instantane._ENTETE.size)
+    with open(chemin, "wb") as f:
+        f.write(entete + donnees[instantane._ENTETE.size:])
+    assert instantane.lire(chemin) is None
+
+
+def test_fichier_tronque(tmp_path):
+    chemin = str(tmp_path / "donnees.bin")
+    instantane.ecrire(chemin, LIVRES, MEMBRES, EMPRUNTS)
+    with open(chemin, "rb") as f:
+        donnees = f.read()
+    for taille in (0, 4, instantane._ENTETE.size, len(donnees) - 1):
+        with open(chemin, "wb") as f:
+            f.write(donnees[:taille])
+        assert instantane.lire(chemin) is None
+
+
+def test_est_a_jour(tmp_path):
+    chemin, source = str(tmp_path / "donnees.bin"), str(tmp_path / "livres.txt")
+    assert not instantane.est_a_jour(chemin, source)
+
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("9780000000000;Titre;Auteur;2001;Roman;disponible\n")
+    instantane.ecrire(chemin, LIVRES, MEMBRES, EMPRUNTS)
+    os.utime(source, ns=(1_000_000_000, 1_000_000_000))
+    os.utime(chemin, ns=(2_000_000_000, 2_000_000_000))
+    assert instantane.est_a_jour(chemin, source)
+    # Une source absente n'invalide pas l'instantané
+    assert instantane.est_a_jour(chemin, source, str(tmp_path / "membres.txt"))
+
+    # Source modifiée après l'écriture de l'instantané
+    os.utime(source, ns=(3_000_000_000, 3_000_000_000))
+    assert not instantane.est_a_jour(chemin, source)
+
+
+def test_chargement_instantane_identique_aux_fichiers_texte(dossier_donnees):
+    biblio = Bibliotheque()
+    for i in range(3):
+        biblio.ajouter_livre(Livre(f"978000000000{i}", f"Titre {i}", "Auteur", 2000 + i, "Roman"))
+    biblio.enregistrer_membre(Membre("M1", "Alice"))
+    biblio.emprunter_livre("9780000000001", "M1")
+    biblio.fermer()
+    assert instantane.est_a_jour("data/donnees.bin", "data/livres.txt", "data/membres.txt")
+
+    depuis_instantane = Bibliotheque()
+    depuis_instantane.fermer()
+    os.remove("data/donnees.bin")
+    depuis_texte = Bibliotheque()
+    depuis_texte.fermer()
+    assert etat(depuis_instantane) == etat(depuis_texte)
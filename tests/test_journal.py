@@ -0,0 +1,132 @@
+import os
+import warnings
+from functools import partial
+
+import pytest
+
+from bibliotheque import Bibliotheque, Livre, Membre
+from conftest import etat
+from journal import Journal
+
+
+def remplir(biblio):
+    """Une suite de modifications couvrant toutes les opérations journalisées."""
+    for i in range(5):
+        biblio.ajouter_livre(Livre(f"978000000000{i}", f"Titre {i}", f"Auteur {i % 2}", 2000 + i, "Roman"))
+    for id_membre, nom in (("M1", "Alice"), ("M2", "Bob"), ("M3", "Chloé")):
+        biblio.enregistrer_membre(Membre(id_membre, nom))
+    biblio.emprunter_livre("9780000000000", "M1")
+    biblio.emprunter_livre("9780000000001", "M2")
+    biblio.emprunter_livre("9780000000002", "M3")
+    biblio.rendre_livre("9780000000001")
+    biblio.supprimer_membre("M3")        # rend aussi 9780000000002
+    biblio.supprimer_livre("9780000000004")
+
+
+def test_journal_relit_les_entrees_dans_l_ordre(dossier_donnees):
+    journal = Journal()
+    journal.ajouter("ajout_membre", id="M1", nom="Élise")
+    journal.ajouter("suppression_membre", id="M1")
+    journal.fermer()
+    assert Journal().relire() == [{"op": "ajout_membre", "id": "M1", "nom": "Élise"},
+                                  {"op": "suppression_membre", "id": "M1"}]
+
+
+def test_journal_coupe_une_fin_tronquee(dossier_donnees):
+    journal = Journal()
+    journal.ajouter("ajout_membre", id="M1", nom="Alice")
+    journal.fermer()
+    with open(journal.chemin, "a", encoding="utf-8") as f:
+        f.write('{"op": "ajout_membre", "id": "M2"')  # arrêt brutal au milieu d'une ligne
+
+    relu = Journal()
+    assert relu.relire() == [{"op": "ajout_membre", "id": "M1", "nom": "Alice"}]
+    # La fin corrompue est retirée : un ajout suivant reste lisible
+    relu.ajouter("ajout_membre", id="M3", nom="Chloé")
+    relu.fermer()
+    assert [e["id"] for e in Journal().relire()] == ["M1", "M3"]
+
+
+def test_rejeu_du_journal_redonne_le_meme_etat(dossier_donnees):
+    biblio = Bibliotheque(journal=True)
+    remplir(biblio)
+    attendu = etat(biblio)
+    biblio.flush()
+    assert biblio._journal.nb_entrees > 0
+
+    # Pas de compactage : le nouvel objet relit l'instantané vide puis rejoue le journal
+    rejoue = Bibliotheque(journal=True)
+    assert etat(rejoue) == attendu
+    rejoue._ecrivain.fermer()
+    biblio._ecrivain.fermer()
+
+
+def test_compactage_vide_le_journal_sans_perte(dossier_donnees):
+    biblio = Bibliotheque(journal=True)
+    remplir(biblio)
+    attendu = etat(biblio)
+    biblio.fermer()
+
+    assert Journal().relire() == []
+    relu = Bibliotheque(journal=True)
+    assert etat(relu) == attendu
+    relu.fermer()
+
+
+class Arret(Exception):
+    """Arrêt brutal simulé au milieu d'un compactage."""
+
+
+@pytest.mark.parametrize("paresseux", [False, True])
+@pytest.mark.parametrize("etape", range(6))
+def test_compactage_interrompu_sans_etat_mixte(dossier_donnees, monkeypatch, paresseux, etape):
+    biblio = Bibliotheque(journal=True, paresseux=paresseux)
+    remplir(biblio)
+    biblio.compacter_journal()
+    # Modifications postérieures au premier instantané : seul le journal les contient
+    biblio.ajouter_livre(Livre("9780000000009", "Tard", "Auteur", 2020, "Essai"))
+    biblio.enregistrer_membre(Membre("M9", "Zoé"))
+    biblio.emprunter_livre("9780000000009", "M9")
+    biblio.rendre_livre("9780000000000")
+    attendu = etat(biblio)
+
+    # Arrêt à la ``etape``-ième opération de fichier : avant la validation, entre deux
+    # remplacements, avant le vidage du journal ou avant le retrait du marqueur
+    appels = []
+
+    def interrompre(*args, original=None):
+        appels.append(args)
+        if len(appels) > etape:
+            raise Arret
+        return original(*args)
+
+    with monkeypatch.context() as m, pytest.raises(Arret):
+        m.setattr(os, "replace", partial(interrompre, original=os.replace))
+        m.setattr(os, "remove", partial(interrompre, original=os.remove))
+        biblio.compacter_journal()
+    biblio._journal.fermer()
+    biblio._ecrivain.fermer()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # aucune entrée du journal ne doit échouer
+        relu = Bibliotheque(journal=True, paresseux=paresseux)
+    assert etat(relu) == attendu
+    assert not os.path.exists(Bibliotheque.MARQUEUR_COMPACTAGE)
+    relu.fermer()
+    assert etat(Bibliotheque(journal=True, paresseux=paresseux)) == attendu
+
+
+def test_entree_du_journal_en_echec_signalee(dossier_donnees):
+    biblio = Bibliotheque(journal=True)
+    remplir(biblio)
+    biblio.fermer()
+    journal = Journal()
+    journal.ajouter("retour", isbn="9780000000003")          # livre jamais emprunté
+    journal.ajouter("ajout_membre", id="M7", nom="Gaël")
+    journal.fermer()
+
+    with pytest.warns(RuntimeWarning, match="1 entrée"):
+        relu = Bibliotheque(journal=True)
+    assert [entree["op"] for entree, _ in relu.entrees_ignorees] == ["retour"]
+    assert "M7" in relu.membres
+    relu.fermer()
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("tkinter")
+from bibliotheque import Bibliotheque, Livre
+from main import BibliothequeApp, ListeVirtuelle, ModeleLivres
+
+
+@pytest.fixture
+def biblio(dossier_donnees):
+    biblio = Bibliotheque()
+    for i, (titre, auteur) in enumerate([("Les Misérables", "Victor Hugo"), ("Germinal", "Émile Zola"),
+                                         ("Notre-Dame de Paris", "Victor Hugo"), ("La Peste", "Albert Camus")]):
+        biblio.ajouter_livre(Livre(f"978000000000{i}", titre, auteur, 1850 + i, "Roman"))
+    yield biblio
+    biblio.fermer()
+
+
+def liste(modele) -> ListeVirtuelle:
+    """ListeVirtuelle sans widget (pas d'affichage ici) : seul l'état de sélection est utilisé."""
+    vue = ListeVirtuelle.__new__(ListeVirtuelle)
+    vue.modele, vue._selection = modele, None
+    return vue
+
+
+def test_livre_masque_par_le_filtre_hors_du_modele(biblio):
+    modele = ModeleLivres(biblio)
+    assert "9780000000001" in modele and len(modele) == 4
+
+    modele.filtrer([livre.isbn for livre in biblio.rechercher("hugo", champs=("auteur",))])
+    assert len(modele) == 2
+    assert "9780000000000" in modele and "9780000000002" in modele
+    assert "9780000000001" not in modele and "9780000000003" not in modele
+
+    modele.retirer("9780000000000")
+    assert "9780000000000" not in modele and len(modele) == 1
+    modele.filtrer(None)
+    assert "9780000000001" in modele
+
+
+@pytest.mark.parametrize("tri", [("isbn", False), ("titre", True)])
+def test_selection_masquee_par_une_recherche_oubliee(biblio, tri):
+    modele = ModeleLivres(biblio)
+    modele.trier(*tri)
+    vue = liste(modele)
+    vue._selection = "9780000000001"  # Germinal sélectionné
+    assert vue.selection() == ("9780000000001",)
+
+    # La recherche masque le livre : il ne doit plus pouvoir être supprimé ou modifié
+    modele.filtrer(["9780000000000", "9780000000002"])
+    assert vue.selection() == ()
+    modele.filtrer(None)
+    assert vue.selection() == ()
+
+
+@pytest.mark.parametrize("options", [{"compact": True}, {"paresseux": True}])
+def test_sqlite_refuse_compact_et_paresseux(dossier_donnees, options):
+    # Refus avant toute création de fenêtre : vérifiable sans affichage
+    with pytest.raises(ValueError, match="--sqlite"):
+        BibliothequeApp(sqlite=True, **options)
@@ -0,0 +1,88 @@
+import pytest
+
+from bibliotheque import Livre
+from recherche import IndexRecherche, distance_edition, normaliser
+
+
+LIVRES = [
+    Livre("9780000000001", "La lumière du château", "Antoine de Saint-Exupéry", 1943, "Roman"),
+    Livre("9780000000002", "Apprendre Python", "Guido Van Rossum", 2001, "Programmation"),
+    Livre("9780000000003", "L'Énigme quantique", "Bruce Rosenblum", 2006, "Science"),
+    Livre("9780000000004", "Mémoire de l'océan", "Marie Nuit", 1999, "Poésie"),
+]
+
+
+@pytest.fixture
+def index():
+    return IndexRecherche(LIVRES)
+
+
+def test_normaliser_retire_accents_casse_et_ponctuation():
+    assert normaliser("L'Énigme Quantique") == "l enigme quantique"
+    assert normaliser("Saint-Exupéry") == "saint exupery"
+    assert normaliser("Cœur") == "coeur"
+
+
+def test_distance_edition_compte_une_inversion_pour_une():
+    assert distance_edition("python", "pyhton", 2) == 1
+    assert distance_edition("chateau", "chateau", 2) == 0
+    assert distance_edition("abc", "xyz", 1) == 2  # seuil dépassé : maximum + 1
+
+
+def test_recherche_exacte_multi_mots_et_sous_chaine(index):
+    assert index.rechercher("chateau lumiere") == ["9780000000001"]
+    assert index.rechercher("ENIGME") == ["9780000000003"]
+    assert index.rechercher("exup") == ["9780000000001"]
+    assert index.rechercher("python roman") == []
+
+
+def test_recherche_isbn_par_prefixe(index):
+    assert index.rechercher("978000000000", champs=("isbn",)) == [l.isbn for l in LIVRES]
+    assert index.rechercher("9780000000002", champs=IndexRecherche.CHAMPS) == ["9780000000002"]
+
+
+@pytest.mark.parametrize("requete, attendu", [
+    ("lumiare", "9780000000001"),     # substitution
+    ("lumierre", "9780000000001"),    # insertion
+    ("lumire", "9780000000001"),      # suppression
+    ("lumeire", "9780000000001"),     # inversion de deux lettres voisines
+    ("chtaeau", "9780000000001"),     # inversion
+    ("pyhton", "9780000000002"),      # inversion, mot court (recherche par longueur)
+    ("quantqiue", "9780000000003"),   # inversion, mot long (tolérance 2)
+])
+def test_recherche_floue(index, requete, attendu):
+    assert index.rechercher(requete) == []
+    assert index.rechercher(requete, flou=True) == [attendu]
+
+
+def test_index_suit_ajouts_et_suppressions(index):
+    index.supprimer("9780000000001")
+    assert index.rechercher("chateau") == []
+    index.ajouter(Livre("9780000000005", "Retour au château", "Anonyme", 2020, "Roman"))
+    assert index.rechercher("chateau") == ["9780000000005"]
+    assert len(index) == 4
+
+
+MOTS = ("soleil", "riviere", "montagne", "foret")
+
+
+def test_identifiants_liberes_repris_apres_modifications():
+    livres = [Livre(f"978000000{i:04d}", f"Titre {MOTS[i % len(MOTS)]}", f"Auteur {i % 7}", 2000, "Roman")
+              for i in range(40)]
+    index = IndexRecherche(livres)
+    index.MIN_COMPACTAGE = 10
+    # Longue session : chaque livre est modifié (supprimé puis réindexé) de nombreuses fois
+    for tour in range(50):
+        for livre in livres[:30]:
+            index.ajouter(livre)
+        index.supprimer(livres[tour % 40].isbn)
+        index.ajouter(livres[tour % 40])
+    assert len(index) == 40
+    assert len(index._isbns) <= 2 * 40 + index.MIN_COMPACTAGE
+    for mot in MOTS:
+        attendus = [l.isbn for l in livres if mot in normaliser(l.titre)]
+        assert sorted(index.rechercher(mot)) == sorted(attendus)
+    # L'ordre des résultats (ordre d'ajout) survit à la renumérotation
+    ordre = index.rechercher("titre")
+    index._compacter()
+    assert index.rechercher("titre") == ordre
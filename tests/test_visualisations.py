@@ -0,0 +1,151 @@
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("matplotlib")
+from bibliotheque import Livre
+from PIL import Image
+from visualisations import CacheGraphiques, Visualisation
+
+TAILLE = (120, 90)
+
+
+@pytest.fixture
+def visualisation(tmp_path, monkeypatch):
+    """Visualisation avec un cache vide, dans un dossier temporaire."""
+    monkeypatch.setattr(Visualisation, "cache", CacheGraphiques(dossier=tmp_path / "cache"))
+    return Visualisation
+
+
+def livres(nb: int = 12) -> list:
+    return [Livre(f"978000000{i:04d}", f"Titre {i}", f"Auteur {i % 4}", 2000 + i, ["Roman", "Essai"][i % 2])
+            for i in range(nb)]
+
+
+def test_en_cache_sans_acces_aux_livres(visualisation):
+    assert visualisation.en_cache("genres", TAILLE, 7) is None
+    taches = visualisation.taches(livres(), analyse=None, historique=[])
+    image = visualisation.rendre("genres", taches["genres"], TAILLE, 7)
+
+    assert visualisation.en_cache("genres", TAILLE, 7) is image
+    assert visualisation.en_cache("genres", TAILLE, 8) is None            # catalogue modifié
+    assert visualisation.en_cache("genres", (200, 150), 7) is None        # autre taille
+    assert visualisation.en_cache("auteurs", TAILLE, 7) is None
+    assert visualisation.en_cache("emprunts", TAILLE, 7) is None          # ne dépend pas du catalogue
+
+
+def test_taches_figent_les_livres(visualisation):
+    catalogue = livres(4)
+    taches = visualisation.taches(catalogue, historique=[])
+    attendu = taches["genres"]()
+    # Modifications de la bibliothèque pendant que le thread de travail calcule
+    catalogue.append(Livre("9780000009999", "Ajouté", "Autre", 2024, "Poésie"))
+    del catalogue[0]
+    assert taches["genres"]() == attendu == (("Roman", 2), ("Essai", 2))
+    assert [jour for jour, _ in taches["emprunts"]()] == visualisation.jours_courbe()
+
+
+def test_rendu_en_memoire_a_la_taille_demandee(visualisation, dossier_donnees):
+    taches = visualisation.taches(livres(), historique=[])
+    for nom in visualisation.CHEMINS:
+        image = visualisation.rendre(nom, taches[nom], (300, 225))
+        assert image.mode == "RGBA" and image.size == (300, 225)
+        assert image.getextrema()[0] != (255, 255)  # quelque chose est tracé
+    # Aucun export PNG : les fichiers de CHEMINS ne sont écrits que par exporter
+    assert not (dossier_donnees / "assets").exists()
+
+    chemins = visualisation.generer_tous_graphiques(livres(), historique=[])
+    assert chemins == visualisation.CHEMINS
+    assert all((dossier_donnees / chemin).stat().st_size > 0 for chemin in chemins.values())
+
+
+class Compteur:
+    """``donnees`` et ``rendre`` d'un graphique factice, qui comptent leurs appels."""
+
+    def __init__(self, valeurs=(("Roman", 3),)):
+        self.valeurs, self.calculs, self.rendus = valeurs, 0, 0
+
+    def donnees(self):
+        self.calculs += 1
+        return self.valeurs
+
+    def rendre(self, valeurs):
+        self.rendus += 1
+        return Image.new("RGBA", TAILLE, (self.rendus, len(valeurs), 0, 255))
+
+
+def test_empreinte_des_valeurs_tracees(tmp_path, monkeypatch):
+    cache = CacheGraphiques(dossier=tmp_path)
+    cle = cache.empreinte("genres", (("Roman", 3),), TAILLE)
+    assert cle == hashlib.sha1(repr((CacheGraphiques.FORMAT, "genres", (("Roman", 3),), TAILLE))
+                               .encode("utf-8")).hexdigest()
+    assert cache.empreinte("genres", (("Roman", 3),), TAILLE) == cle                 # stable
+    assert len({cle, cache.empreinte("genres", (("Roman", 4),), TAILLE),
+                cache.empreinte("auteurs", (("Roman", 3),), TAILLE),
+                cache.empreinte("genres", (("Roman", 3),), (200, 150))}) == 4
+    monkeypatch.setattr(CacheGraphiques, "FORMAT", CacheGraphiques.FORMAT + 1)
+    assert cache.empreinte("genres", (("Roman", 3),), TAILLE) != cle                 # apparence changée
+
+
+def test_version_evite_le_calcul_des_valeurs(tmp_path):
+    cache, graphique = CacheGraphiques(dossier=tmp_path), Compteur()
+    image = cache.image("genres", graphique.donnees, graphique.rendre, TAILLE, version=1)
+    assert cache.image("genres", graphique.donnees, graphique.rendre, TAILLE, version=1) is image
+    assert (graphique.calculs, graphique.rendus) == (1, 1)
+
+    # Nouvelle version, mêmes valeurs : recalculées mais pas redessinées
+    assert cache.image("genres", graphique.donnees, graphique.rendre, TAILLE, version=2) is image
+    assert (graphique.calculs, graphique.rendus) == (2, 1)
+    assert cache.retrouver("genres", TAILLE, 2) is image
+    assert cache.retrouver("genres", TAILLE, 3) is None and cache.retrouver("genres", TAILLE, None) is None
+
+    # Valeurs modifiées : redessiné
+    graphique.valeurs = (("Roman", 4),)
+    assert cache.image("genres", graphique.donnees, graphique.rendre, TAILLE, version=3) is not image
+    assert (graphique.calculs, graphique.rendus) == (3, 2)
+
+
+def test_eviction_lru_en_memoire(tmp_path):
+    cache = CacheGraphiques(dossier=tmp_path, capacite=2)
+    graphiques = [Compteur(((f"Genre {i}", i),)) for i in range(3)]
+    images = [cache.image("genres", g.donnees, g.rendre, TAILLE, version=i) for i, g in enumerate(graphiques)]
+    # La première image a été évincée, et sa version avec elle
+    assert cache.retrouver("genres", TAILLE, 0) is None
+    assert [cache.retrouver("genres", TAILLE, v) for v in (1, 2)] == images[1:]
+    cache.retrouver("genres", TAILLE, 1)                    # redevient la plus récente
+    cache.image("genres", graphiques[0].donnees, graphiques[0].rendre, TAILLE, version=0)
+    assert cache.retrouver("genres", TAILLE, 1) is images[1]
+    assert cache.retrouver("genres", TAILLE, 2) is None
+    assert len(cache._images) == len(cache._versions) == 2
+
+
+def test_png_repris_du_disque_puis_elague(tmp_path):
+    graphique = Compteur()
+    image = CacheGraphiques(dossier=tmp_path).image("genres", graphique.donnees, graphique.rendre, TAILLE)
+    # Autre exécution (cache mémoire vide) : l'image est relue depuis le PNG, pas redessinée
+    relue = CacheGraphiques(dossier=tmp_path).image("genres", graphique.donnees, graphique.rendre, TAILLE)
+    assert graphique.rendus == 1
+    assert relue.size == image.size and relue.tobytes() == image.tobytes()
+    assert not list(tmp_path.glob("*.tmp"))
+
+    cache = CacheGraphiques(dossier=tmp_path, capacite_disque=2)
+    premier = next(tmp_path.glob("*.png"))
+    os.utime(premier, (0, 0))  # le plus anciennement utilisé
+    for i in range(2):
+        autre = Compteur(((f"Genre {i}", i),))
+        cache.image("genres", autre.donnees, autre.rendre, TAILLE)
+    assert len(list(tmp_path.glob("*.png"))) == 2 and not premier.exists()
+
+
+def test_exporter_reprend_le_png_en_cache(visualisation, tmp_path, monkeypatch):
+    taches = visualisation.taches(livres(), historique=[])
+    premier = visualisation.exporter("auteurs", taches["auteurs"], str(tmp_path / "a" / "auteurs.png"))
+    monkeypatch.setattr(visualisation, "_safe_savefig", lambda fig, chemin: pytest.fail("PNG redessiné"))
+    second = visualisation.exporter("auteurs", taches["auteurs"], str(tmp_path / "b" / "auteurs.png"))
+    with open(premier, "rb") as a, open(second, "rb") as b:
+        assert a.read() == b.read()
+
+    # Catalogue modifié : nouvel export
+    with pytest.raises(pytest.fail.Exception):
+        visualisation.exporter("auteurs", visualisation.taches(livres(5))["auteurs"], str(tmp_path / "c.png"))